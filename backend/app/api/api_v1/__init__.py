@@ -5,5 +5,7 @@ api_router = APIRouter()
 
 # Import and include route modules here
 from . import recipes  # noqa: E402
+from . import admin  # noqa: E402
 
 api_router.include_router(recipes.router, prefix="/v1/recipes", tags=["recipes"])
+api_router.include_router(admin.router, prefix="/v1/admin", tags=["admin"])
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import os
+import secrets
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from app.core import memory, profiler
+from app.core.config import settings
+from app.services.chef_service import get_memory_usage
+from app.utils.responses import get_error_responses
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class ChefMemoryReport(BaseModel):
+    """Bytes held by a single chef, by component."""
+    name: str
+    bytes: Dict[str, int] = Field(..., description="Byte counts per component plus a total")
+
+
+class MemoryReportResponse(BaseModel):
+    """Per-chef memory accounting for this worker."""
+    pid: int
+    process: Dict[str, float] = Field(..., description="Process RSS/VMS in MB and percent of system memory")
+    chefs: List[ChefMemoryReport]
+    total_bytes: int
+
+
+class AllocationSite(BaseModel):
+    """Memory growth attributed to one allocation site."""
+    site: str
+    traceback: List[str]
+    size_diff: int
+    count_diff: int
+    size: int
+    count: int
+
+
+class AllocationDiffResponse(BaseModel):
+    """Tracemalloc snapshot diff over a window of live traffic."""
+    pid: int
+    seconds: float
+    total_size_diff: int
+    traced_current: int
+    traced_peak: int
+    sites: List[AllocationSite]
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Allow the request only if it carries the configured admin token.
+    
+    Admin endpoints are disabled entirely when ``ADMIN_TOKEN`` is not set.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled"
+        )
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token"
+        )
+
+
+@router.post(
+    "/profile",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Sample stacks of this worker",
+    description="""
+    Run a low-overhead stack-sampling profiler on the worker that handles this
+    request for `seconds` seconds and return collapsed stacks
+    (`frame;frame;frame count`), ready for flamegraph.pl or speedscope.
+    
+    Each worker profiles only itself; the `X-Profile-Pid` header identifies it.
+    """,
+    responses=get_error_responses(
+        status.HTTP_401_UNAUTHORIZED,
+        status.HTTP_403_FORBIDDEN,
+        status.HTTP_409_CONFLICT,
+        status.HTTP_422_UNPROCESSABLE_ENTITY
+    ),
+    dependencies=[Depends(require_admin)]
+)
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, description="Length of the profiling window"),
+    interval_ms: float = Query(5.0, ge=1.0, le=1000.0, description="Sampling interval in milliseconds"),
+    lines: bool = Query(False, description="Include line numbers in frame labels"),
+    idle: bool = Query(False, description="Include threads parked in waits/selects")
+) -> PlainTextResponse:
+    """
+    Profile the current worker and return collapsed stacks.
+    
+    Raises:
+        HTTPException: 409 if a profile is already running in this worker.
+    """
+    duration = min(seconds, settings.PROFILER_MAX_SECONDS)
+    logger.info("Starting %.1fs profile (interval=%.1fms) in worker %d", duration, interval_ms, os.getpid())
+    try:
+        # Sample from a separate thread so the event loop keeps serving traffic
+        sampler = await asyncio.to_thread(
+            profiler.profile, duration, interval_ms / 1000.0, lines, idle
+        )
+    except profiler.ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    
+    return PlainTextResponse(
+        sampler.collapsed(),
+        headers={
+            "X-Profile-Pid": str(os.getpid()),
+            "X-Profile-Samples": str(sampler.samples),
+        }
+    )
+
+
+@router.get(
+    "/memory",
+    response_model=MemoryReportResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Report memory held by each chef",
+    description="""
+    Account for the bytes held by each loaded chef in this worker, broken down
+    into TF-IDF CSR arrays, vocabulary, IDF, stop words, Recipe objects and
+    recipe strings.
+    """,
+    responses=get_error_responses(
+        status.HTTP_401_UNAUTHORIZED,
+        status.HTTP_403_FORBIDDEN
+    ),
+    dependencies=[Depends(require_admin)]
+)
+async def memory_report() -> MemoryReportResponse:
+    """Return per-chef memory accounting for the current worker."""
+    from app.api.api_v1.recipes import chef_service
+    
+    def build_report() -> List[ChefMemoryReport]:
+        return [
+            ChefMemoryReport(name=chef.name, bytes=chef.memory_usage())
+            for chef in chef_service.get_chefs()
+        ]
+    
+    chefs = await asyncio.to_thread(build_report)
+    return MemoryReportResponse(
+        pid=os.getpid(),
+        process=get_memory_usage(),
+        chefs=chefs,
+        total_bytes=sum(chef.bytes["total"] for chef in chefs)
+    )
+
+
+@router.post(
+    "/tracemalloc",
+    response_model=AllocationDiffResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Diff allocations over a window of live traffic",
+    description="""
+    Take a tracemalloc snapshot, keep serving traffic for `seconds` seconds,
+    take a second snapshot and return the allocation sites that grew the most.
+    
+    Tracing is only enabled for the duration of the window.
+    """,
+    responses=get_error_responses(
+        status.HTTP_401_UNAUTHORIZED,
+        status.HTTP_403_FORBIDDEN,
+        status.HTTP_409_CONFLICT,
+        status.HTTP_422_UNPROCESSABLE_ENTITY
+    ),
+    dependencies=[Depends(require_admin)]
+)
+async def tracemalloc_diff(
+    seconds: float = Query(30.0, gt=0, description="Length of the observation window"),
+    top: int = Query(25, ge=1, le=500, description="Number of allocation sites to return"),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$",
+                          description="Group allocations by line, file or full traceback"),
+    frames: int = Query(1, ge=1, le=50, description="Frames stored per allocation")
+) -> AllocationDiffResponse:
+    """
+    Diff tracemalloc snapshots over a window of live traffic.
+    
+    Raises:
+        HTTPException: 409 if a window is already running in this worker.
+    """
+    duration = min(seconds, settings.PROFILER_MAX_SECONDS)
+    logger.info("Starting %.1fs tracemalloc window in worker %d", duration, os.getpid())
+    try:
+        result: Dict[str, Any] = await asyncio.to_thread(
+            memory.allocation_diff, duration, top, group_by, frames
+        )
+    except memory.TracingBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return AllocationDiffResponse(pid=os.getpid(), **result)
@@ -1,8 +1,21 @@
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, Field, field_validator, ConfigDict
+import asyncio
 import logging
+import threading
+import time
 
+from app.core import log, timing
+from app.core.capture import TrafficCapture
+from app.core.config import settings
+from app.core.ratelimit import (
+    AdmissionController,
+    OverloadedError,
+    RateLimiter,
+    REQUESTS_SHED,
+    retry_after_seconds,
+)
 from app.services.chef_service import ChefService
 from app.utils.responses import get_error_responses
 
@@ -12,6 +25,40 @@ logger = logging.getLogger(__name__)
 # Get the singleton instance of ChefService
 chef_service = ChefService()
 
+# Sampled request capture for replay (disabled unless CAPTURE_PATH is set)
+traffic_capture = TrafficCapture(settings.CAPTURE_PATH, settings.CAPTURE_SAMPLE_RATE)
+
+# Per-client token buckets and global admission control for the scoring endpoint
+rate_limiter = RateLimiter(settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST)
+admission = AdmissionController(
+    concurrency=settings.ADMISSION_CONCURRENCY,
+    latency_target=settings.ADMISSION_LATENCY_TARGET_MS / 1000,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+)
+
+
+def client_id(request: Request) -> str:
+    """Identify the caller for rate limiting."""
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce_rate_limit(request: Request) -> None:
+    """Dependency rejecting clients that exceed their token bucket with 429."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    delay = rate_limiter.check(client_id(request))
+    if delay > 0:
+        REQUESTS_SHED.inc("rate_limit")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(retry_after_seconds(delay))}
+        )
+
 class RecipeIngredient(BaseModel):
     """Represents an ingredient in a recipe with availability status."""
     name: str
@@ -129,7 +176,7 @@ async def health_check() -> HealthCheckResponse:
             service="FridgePal Recipes"
         )
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Service unavailable"
@@ -138,12 +185,20 @@ async def health_check() -> HealthCheckResponse:
 class RecipeListResponse(BaseModel):
     """Response model for recipe recommendations."""
     recipes: List[RecipeResponse]
+    debug: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Per-stage timings in milliseconds, broken down per chef (present only with debug=true)"
+    )
 
 
 @router.post(
     "",
     response_model=RecipeListResponse,
+    # "debug" is only set with debug=true; every recipe field is always set,
+    # so null ids/cuisines are still returned
+    response_model_exclude_unset=True,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(enforce_rate_limit)],
     summary="Get recipe recommendations",
     description="""
     Get personalized recipe recommendations based on available ingredients.
@@ -154,6 +209,12 @@ class RecipeListResponse(BaseModel):
     
     - **variety=0.0**: Strict ingredient matching
     - **variety=1.0**: Broader, more creative suggestions
+    
+    Stage timings are returned in the `Server-Timing` header; pass
+    `debug=true` to also get them in the response body, broken down per chef.
+    
+    Clients over their rate limit get `429`, and requests arriving while the
+    service is overloaded get `503`; both carry a `Retry-After` header.
     """,
     responses={
         status.HTTP_200_OK: {
@@ -163,18 +224,22 @@ class RecipeListResponse(BaseModel):
         **get_error_responses(
             status.HTTP_400_BAD_REQUEST,
             status.HTTP_422_UNPROCESSABLE_ENTITY,
-            status.HTTP_500_INTERNAL_SERVER_ERROR
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status.HTTP_503_SERVICE_UNAVAILABLE
         )
     }
 )
 async def get_recipes(
-    request: RecipeRequest
+    request: RecipeRequest,
+    debug: bool = False
 ) -> RecipeListResponse:
     """
     Retrieve recipe recommendations based on available ingredients.
     
     Args:
         request: The recipe search request containing ingredients and preferences.
+        debug: Include per-stage timings in the response body.
         
     Returns:
         RecipeListResponse: List of recommended recipes with scores and details.
@@ -182,6 +247,10 @@ async def get_recipes(
     Raises:
         HTTPException: If the request is invalid or an error occurs.
     """
+    sampled = traffic_capture.should_sample()
+    start_time = time.perf_counter()
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    result_count = 0
     try:
         if not request.ingredients:
             raise HTTPException(
@@ -189,19 +258,62 @@ async def get_recipes(
                 detail="At least one ingredient is required"
             )
         
-        logger.info(
-            "Getting recipes for %d ingredients (max_results=%d, variety=%.2f)",
-            len(request.ingredients),
-            request.max_results,
-            request.variety
-        )
+        # Per-request detail, only for the sampled fraction of requests
+        if log.sample_request():
+            logger.info(
+                "Getting recipes for %d ingredients (max_results=%d, variety=%.2f)",
+                len(request.ingredients),
+                request.max_results,
+                request.variety
+            )
         
-        # Get recommendations from all chefs
-        recommendations = chef_service.get_recommendations(
-            ingredients=request.ingredients,
-            top_n=request.max_results,
-            cosine_weight=request.variety
-        )
+        timings = timing.current()
+        token = None
+        if timings is None and debug:
+            timings = timing.StageTimings()
+            token = timing.activate(timings)
+        timer = timing.start()
+        
+        try:
+            admission.admit()
+        except OverloadedError as e:
+            REQUESTS_SHED.inc(e.reason)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Service is overloaded, please retry later",
+                headers={"Retry-After": str(retry_after_seconds(e.retry_after))}
+            )
+        
+        # Whichever side takes this first releases the admission: the worker
+        # thread once it starts scoring, or the handler if it is cancelled
+        # (client disconnect) before the thread ever ran
+        handoff = threading.Lock()
+        
+        def score() -> List[Dict[str, Any]]:
+            if not handoff.acquire(blocking=False):
+                return []
+            try:
+                with admission.slot():
+                    return chef_service.get_recommendations(
+                        ingredients=request.ingredients,
+                        top_n=request.max_results,
+                        cosine_weight=request.variety
+                    )
+            finally:
+                admission.release()
+        
+        # Get recommendations from all chefs off the event loop, so the worker
+        # keeps accepting (and if needed shedding) requests while scoring
+        try:
+            recommendations = await asyncio.to_thread(score)
+        except asyncio.CancelledError:
+            if handoff.acquire(blocking=False):
+                admission.release()
+            raise
+        finally:
+            if token is not None:
+                timing.deactivate(token)
+        timer.mark("service")
         
         # Convert to response model
         response_recipes = []
@@ -225,9 +337,16 @@ async def get_recipes(
                 )
                 continue
         
-        return RecipeListResponse(recipes=response_recipes)
+        response = RecipeListResponse(recipes=response_recipes)
+        timer.mark("serialize")
+        if debug and timings is not None:
+            response.debug = timings.as_dict()
+        status_code = status.HTTP_200_OK
+        result_count = len(response_recipes)
+        return response
         
-    except HTTPException:
+    except HTTPException as e:
+        status_code = e.status_code
         raise
     except Exception:
         logger.exception("Unexpected error processing recipe request")
@@ -235,3 +354,8 @@ async def get_recipes(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while processing your request"
         )
+    finally:
+        if sampled:
+            traffic_capture.record(
+                request.model_dump(), time.perf_counter() - start_time, status_code, result_count
+            )
@@ -0,0 +1,141 @@
+"""Sampled capture of recommendation traffic for deterministic replay.
+
+When ``CAPTURE_PATH`` is set, a ``CAPTURE_SAMPLE_RATE`` fraction of requests is
+appended as JSON lines (request body, status, latency, result count). Lines are
+handed to a background writer thread through a bounded queue, so the request
+path never touches the disk; when the queue is full the record is dropped and
+counted instead of blocking.
+
+Each line is written with a single ``write`` on an ``O_APPEND`` descriptor, so
+several uvicorn workers can share one capture file. If the file can't be
+opened, the error is logged once and capture switches itself off.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.core.metrics import registry as metrics_registry
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_RECORDS = metrics_registry.counter(
+    "fridgepal_capture_records_total",
+    "Captured requests by outcome (written/dropped)",
+    ("outcome",),
+)
+
+
+class TrafficCapture:
+    """Append-only, sampled request log."""
+
+    def __init__(self, path: Optional[str], sample_rate: float = 0.01, max_queue: int = 10000):
+        self.path = path
+        self.sample_rate = sample_rate if path else 0.0
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def should_sample(self) -> bool:
+        """Decide up front so unsampled requests pay nothing else."""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def record(self, body: Dict[str, Any], latency_s: float, status: int, results: int) -> None:
+        """Queue a captured request; never blocks."""
+        if not self.enabled:
+            return
+        line = json.dumps({
+            "ts": time.time(),
+            "pid": os.getpid(),
+            "body": body,
+            "status": status,
+            "latency_ms": round(latency_s * 1000, 3),
+            "results": results,
+        }, separators=(",", ":")) + "\n"
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(line.encode("utf-8"))
+        except queue.Full:
+            CAPTURE_RECORDS.inc("dropped")
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, name="traffic-capture", daemon=True)
+                self._thread.start()
+
+    def _write_loop(self) -> None:
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        except OSError as e:
+            self._disable(e)
+            return
+        try:
+            while True:
+                line = self._queue.get()
+                if line is None:
+                    break
+                try:
+                    os.write(fd, line)
+                    CAPTURE_RECORDS.inc("written")
+                except OSError as e:
+                    CAPTURE_RECORDS.inc("dropped")
+                    logger.warning("Failed to write traffic capture: %s", e)
+                finally:
+                    self._queue.task_done()
+        finally:
+            os.close(fd)
+
+    def _disable(self, error: OSError) -> None:
+        """Stop sampling after the capture file can't be opened, dropping what was queued."""
+        self.sample_rate = 0.0
+        logger.error("Traffic capture disabled, cannot open %s: %s", self.path, error)
+        while True:
+            try:
+                line = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if line is not None:
+                CAPTURE_RECORDS.inc("dropped")
+            self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until queued records are written (used by tests and shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def close(self) -> None:
+        if self._thread is not None:
+            if self._thread.is_alive():
+                self._queue.put(None)
+                self._thread.join(timeout=5)
+            self._thread = None
+
+
+def load_capture(path: str):
+    """Yield captured records in file order, skipping torn or invalid lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "body" in record:
+                yield record
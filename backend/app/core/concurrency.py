@@ -0,0 +1,219 @@
+"""CPU-aware sizing of the thread pools in a worker process.
+
+Every uvicorn worker scores chefs on a thread pool, and numpy/scipy may run
+their own BLAS/OpenMP pools inside each scoring thread. Left at their defaults
+(``cpu_count + 4`` threads per request, one native thread per core) several
+workers oversubscribe the cores the container is actually allowed to use.
+
+:func:`plan_concurrency` splits the usable CPUs (the affinity mask or the
+cgroup CPU quota, whichever is lower) between the worker processes, and
+:func:`apply_plan` caps the native thread pools and optionally pins the process
+to its own slice of a set of cores (see :func:`claim_worker_slot`). :class:`~app.services.chef_service.ChefService` sizes its
+executor from :func:`current_plan`.
+"""
+import logging
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.metrics import registry as metrics_registry
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+# Read by OpenMP/BLAS runtimes when they are first loaded
+NATIVE_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS",
+)
+
+_plan: Optional["ConcurrencyPlan"] = None
+_native_limiter: Any = None
+_slot: Any = None  # (index, lock file) claimed by this worker, held open for its lifetime
+
+
+def cgroup_cpu_quota(root: Path = CGROUP_ROOT) -> Optional[float]:
+    """CPUs granted by the cgroup CPU quota (v2 ``cpu.max`` or v1 CFS), or None if unlimited."""
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    for controller in ("cpu", "cpu,cpuacct"):
+        try:
+            quota = int((root / controller / "cpu.cfs_quota_us").read_text())
+            period = int((root / controller / "cpu.cfs_period_us").read_text())
+        except (OSError, ValueError):
+            continue
+        return quota / period if quota > 0 and period > 0 else None
+    return None
+
+
+def affinity_cpus() -> List[int]:
+    """Cores this process may run on."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS/Windows
+        return list(range(os.cpu_count() or 1))
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> int:
+    """Usable CPUs: the affinity mask, capped by the cgroup quota (rounded up)."""
+    cpus = len(affinity_cpus())
+    quota = cgroup_cpu_quota(root)
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def parse_cpu_list(spec: Optional[str]) -> Optional[List[int]]:
+    """Parse a Linux-style CPU list such as ``"0-3,8"``; None/empty means no pinning."""
+    if not spec or not spec.strip():
+        return None
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        elif part:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def claim_worker_slot(workers: int, directory: Optional[str] = None) -> Optional[int]:
+    """
+    A worker index in ``range(workers)`` not held by a sibling worker, or None
+    if none is free or file locking isn't available.
+
+    Each slot is an exclusive lock on a file named after the parent (uvicorn
+    supervisor) process; the lock is released when the worker exits, so a
+    restarted worker takes over the slot of the one it replaces.
+    """
+    global _slot
+    if _slot is not None:
+        return _slot[0]
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        return None
+    directory = directory or tempfile.gettempdir()
+    for index in range(max(1, workers)):
+        f = open(os.path.join(directory, f"fridgepal-{os.getppid()}-worker-{index}.lock"), "a")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            continue
+        _slot = (index, f)
+        return index
+    return None
+
+
+def worker_cpus(affinity: List[int], workers: int, index: int) -> List[int]:
+    """
+    Worker ``index``'s contiguous share of ``affinity``; a single (shared)
+    core when there are fewer cores than workers.
+    """
+    workers = max(1, workers)
+    if len(affinity) < workers:
+        return [affinity[index % len(affinity)]]
+    start = index * len(affinity) // workers
+    return affinity[start:(index + 1) * len(affinity) // workers]
+
+
+class ConcurrencyPlan:
+    """Thread budget of one worker process."""
+
+    def __init__(self, cpus: int, workers: int, chef_threads: int, native_threads: int,
+                 affinity: Optional[List[int]] = None):
+        self.cpus = cpus
+        self.workers = workers
+        self.chef_threads = chef_threads
+        self.native_threads = native_threads
+        self.affinity = affinity
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "cpus": self.cpus,
+            "workers": self.workers,
+            "chef_threads": self.chef_threads,
+            "native_threads": self.native_threads,
+            "affinity": self.affinity,
+        }
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={value}" for key, value in self.as_dict().items())
+        return f"ConcurrencyPlan({fields})"
+
+
+def plan_concurrency(cpus: Optional[int] = None, workers: int = 1, chef_threads: Optional[int] = None,
+                     native_threads: Optional[int] = None,
+                     affinity: Optional[Iterable[int]] = None,
+                     worker_index: Optional[int] = None) -> ConcurrencyPlan:
+    """
+    Split the usable CPUs between ``workers`` processes.
+
+    Each worker gets ``cpus // workers`` cores (at least one) for its chef
+    threads; native libraries get whatever is left per chef thread, which is a
+    single thread unless ``chef_threads`` is set lower. Explicit values win.
+
+    With ``affinity`` and a ``worker_index``, the plan pins this worker to its
+    own slice of those cores; without an index, to the whole (shared) set.
+    """
+    affinity = sorted(set(affinity)) if affinity else None
+    cpus = cpus or available_cpus()
+    if affinity:
+        cpus = min(cpus, len(affinity))
+    workers = max(1, workers)
+    share = max(1, cpus // workers)
+    chef_threads = chef_threads or share
+    native_threads = native_threads or max(1, share // chef_threads)
+    if affinity and worker_index is not None:
+        affinity = worker_cpus(affinity, workers, worker_index)
+    return ConcurrencyPlan(cpus, workers, chef_threads, native_threads, affinity)
+
+
+def apply_plan(plan: ConcurrencyPlan) -> ConcurrencyPlan:
+    """Cap native thread pools and pin the process as planned; makes ``plan`` current."""
+    global _plan, _native_limiter
+    # Libraries loaded later read the environment; explicit settings in it are kept
+    for name in NATIVE_THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(plan.native_threads))
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        logger.debug("threadpoolctl not installed; native thread pools limited through the environment only")
+    else:
+        # Pools of libraries that are already loaded (e.g. numpy's BLAS)
+        _native_limiter = threadpool_limits(limits=plan.native_threads)
+    if plan.affinity and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, plan.affinity)
+        except OSError as e:
+            logger.warning("Could not pin process to CPUs %s: %s", plan.affinity, e)
+    _plan = plan
+    logger.info("Concurrency plan applied", extra=plan.as_dict())
+    return plan
+
+
+def current_plan() -> ConcurrencyPlan:
+    """The applied plan, or the default one for this machine."""
+    global _plan
+    if _plan is None:
+        _plan = plan_concurrency()
+    return _plan
+
+
+def _collect_plan():
+    plan = current_plan()
+    for setting in ("cpus", "workers", "chef_threads", "native_threads"):
+        yield ("fridgepal_concurrency_plan", {"setting": setting}, getattr(plan, setting))
+
+
+metrics_registry.register_collector(
+    "fridgepal_concurrency_plan", "gauge", "Thread budget of this worker process", _collect_plan
+)
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Optional, Union
 from pydantic import field_validator, ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -27,6 +27,49 @@ class Settings(BaseSettings):
     
     # Application settings
     DEBUG: bool = True
+    MODELS_DIR: Optional[str] = None  # Directory of *.joblib chef models (default: app/models/trained_models)
+    MODEL_FLOAT32: bool = False  # Convert loaded TF-IDF matrices to float32 (Chef.to_float32)
+    MODEL_QUANTIZATION: Optional[str] = None  # Quantize loaded TF-IDF matrices: "uint8", "uint8-row" or "float16"
+    RECIPE_TEXT_CACHE_BLOCKS: int = 64  # Decompressed recipe text blocks kept per chef (see RecipeStore.externalize)
+    SCORING_ENGINE: str = "exact"  # Chef scoring engine used for responses (see Chef.ENGINES)
+    TWO_STAGE_CANDIDATES: Optional[int] = None  # Rows re-ranked by the "two_stage" engine (default: adaptive)
+    SHADOW_ENGINE: Optional[str] = None  # Engine compared against SCORING_ENGINE off the response path
+    SHADOW_SAMPLE_RATE: float = 0.0  # Fraction of requests also scored with SHADOW_ENGINE
+    
+    # CPU budget per worker (see app.core.concurrency); by default the usable CPUs are split between workers
+    WEB_CONCURRENCY: int = 1  # Worker processes sharing this host/container (uvicorn reads it too)
+    CHEF_THREADS: Optional[int] = None  # Chef scoring threads per worker (default: its share of CPUs)
+    NATIVE_THREADS: Optional[int] = None  # BLAS/OpenMP threads per chef thread (default: spare cores, usually 1)
+    CPU_AFFINITY: Optional[str] = None  # Split these cores between the workers and pin each to its slice, e.g. "0-3,8"
+    
+    # Rate limiting and admission control for POST /api/v1/recipes (per worker process)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_SECOND: float = 20.0  # Sustained requests per second per client
+    RATE_LIMIT_BURST: int = 60  # Requests a client may send at once before being limited
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # Identify clients by X-Forwarded-For (behind a proxy)
+    ADMISSION_CONCURRENCY: int = 4  # Requests scored at the same time
+    ADMISSION_MAX_QUEUE: int = 64  # Requests waiting for a scoring slot before new ones are shed
+    ADMISSION_LATENCY_TARGET_MS: float = 2000  # Shed new requests when their expected wait exceeds this
+    
+    @field_validator("RATE_LIMIT_PER_SECOND", "RATE_LIMIT_BURST")
+    def check_rate_limit(cls, v: float, info) -> float:
+        if v <= 0:
+            raise ValueError(f"{info.field_name} must be positive; set RATE_LIMIT_ENABLED=false to disable rate limiting")
+        return v
+    
+    # Observability settings
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # "text" or "json" (one object per line)
+    LOG_QUEUE_SIZE: int = 10000  # Records buffered for the logging thread before dropping
+    LOG_SAMPLE_RATE: float = 0.01  # Fraction of requests that log per-request detail
+    METRICS_ENABLED: bool = True  # Expose Prometheus text metrics at /metrics
+    SERVER_TIMING_ENABLED: bool = True  # Add per-stage Server-Timing headers to responses
+    CAPTURE_PATH: Optional[str] = None  # Append sampled recipe requests to this JSONL file
+    CAPTURE_SAMPLE_RATE: float = 0.01  # Fraction of requests captured when CAPTURE_PATH is set
+    
+    # Admin endpoints (disabled unless a token is configured)
+    ADMIN_TOKEN: Optional[str] = None  # Expected value of the X-Admin-Token header
+    PROFILER_MAX_SECONDS: int = 60  # Upper bound for a single profiling window
     
     model_config = ConfigDict(
         case_sensitive=True,
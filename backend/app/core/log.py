@@ -0,0 +1,144 @@
+"""Non-blocking, structured logging.
+
+:func:`configure_logging` installs a single ``QueueHandler`` on the root logger;
+a ``QueueListener`` thread does the formatting and the stream writes. Callers
+only pay for building the record and a ``put_nowait``; when the queue is full
+the record is dropped and counted instead of blocking a scoring thread.
+
+Records are structured: fields passed with ``extra=`` are kept as attributes
+and rendered as ``key=value`` pairs (text) or JSON keys (``LOG_FORMAT=json``).
+
+Per-request detail (memory snapshots, per-chef completions) is only logged for
+a sampled fraction of requests, see :func:`sample_request`.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from typing import Any, Dict, Optional
+
+from app.core.metrics import registry as metrics_registry
+
+LOG_RECORDS_DROPPED = metrics_registry.counter(
+    "fridgepal_log_records_dropped_total",
+    "Log records dropped because the logging queue was full",
+)
+
+# Attributes every LogRecord has; anything else was passed via ``extra=``
+_RESERVED = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_sample_rate = 0.01
+
+
+def record_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    """Structured fields attached to ``record`` through ``extra=``."""
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED}
+
+
+class TextFormatter(logging.Formatter):
+    """``time - logger - LEVEL - message key=value ...``"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **record_fields(record),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback now (they may not survive the
+        # thread hop), but leave the formatting itself to the listener thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def configure_logging(level: str = "INFO", fmt: str = "text", queue_size: int = 10000,
+                      sample_rate: float = 0.01) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a bounded queue drained by a background thread.
+
+    Replaces the root logger's handlers; loggers other than uvicorn's are reset
+    to propagate to the root so everything goes through the queue. Safe to call
+    again (e.g. on reload): the previous listener is stopped first.
+    """
+    global _listener, _sample_rate
+    _sample_rate = sample_rate
+    if _listener is not None:
+        _listener.stop()
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        # Replace console handlers (e.g. from basicConfig) and a previous queue handler
+        if type(existing) in (logging.StreamHandler, DroppingQueueHandler):
+            root.removeHandler(existing)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(level)
+
+    for name in list(logging.root.manager.loggerDict):
+        if not name.startswith("uvicorn"):  # Don't override uvicorn's logging
+            logger = logging.getLogger(name)
+            logger.handlers = []
+            logger.propagate = True
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def sample_request() -> bool:
+    """Whether to log per-request detail for the current request."""
+    return _sample_rate > 0 and random.random() < _sample_rate
+
+
+atexit.register(shutdown_logging)
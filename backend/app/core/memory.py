@@ -0,0 +1,118 @@
+"""Memory accounting helpers.
+
+``sizeof_*`` functions compute the bytes held by common containers using
+``sys.getsizeof`` and count every object once, so shared (e.g. interned)
+strings are not double counted when the same ``seen`` set is reused.
+
+:func:`allocation_diff` wraps tracemalloc to attribute memory growth over a
+window of live traffic to allocation sites.
+"""
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Serializes tracemalloc windows within a worker process
+_trace_lock = threading.Lock()
+
+
+class TracingBusyError(RuntimeError):
+    """Raised when a tracemalloc window is already running in this process."""
+
+
+def sizeof_object(obj: Any, seen: Set[int]) -> int:
+    """Shallow size of ``obj``, or 0 if it was already counted."""
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    return sys.getsizeof(obj)
+
+
+def sizeof_strings(values: Iterable[Any], seen: Set[int]) -> int:
+    """Total size of the distinct string objects in ``values``."""
+    return sum(sizeof_object(v, seen) for v in values if isinstance(v, str))
+
+
+def sizeof_dict(mapping: Optional[dict], seen: Set[int]) -> int:
+    """Size of a dict including its keys and values (one level deep)."""
+    if mapping is None:
+        return 0
+    total = sizeof_object(mapping, seen)
+    for key, value in mapping.items():
+        total += sizeof_object(key, seen) + sizeof_object(value, seen)
+    return total
+
+
+def sizeof_collection(items: Optional[Iterable[Any]], seen: Set[int]) -> int:
+    """Size of a list/set/tuple and its elements (one level deep)."""
+    if items is None:
+        return 0
+    total = sizeof_object(items, seen)
+    for item in items:
+        total += sizeof_object(item, seen)
+    return total
+
+
+def sizeof_array(array: Any) -> int:
+    """Bytes of a numpy array buffer (0 for anything else)."""
+    return int(getattr(array, "nbytes", 0) or 0)
+
+
+def _site(stat) -> str:
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def allocation_diff(seconds: float, top: int = 25, group_by: str = "lineno",
+                    frames: int = 1) -> Dict[str, Any]:
+    """
+    Snapshot tracemalloc, wait ``seconds`` while traffic runs, and diff.
+
+    Tracing is started for the window (and stopped afterwards) unless it was
+    already running. Blocks the calling thread for the duration of the window.
+
+    Returns:
+        Dictionary with the window length and the top allocation sites by growth.
+    """
+    if not _trace_lock.acquire(blocking=False):
+        raise TracingBusyError("A tracemalloc window is already running in this worker")
+    started_here = False
+    try:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            started_here = True
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+        before = tracemalloc.take_snapshot().filter_traces(filters)
+        start = time.perf_counter()
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+        elapsed = time.perf_counter() - start
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+        _trace_lock.release()
+
+    stats = after.compare_to(before, group_by)
+    sites: List[Dict[str, Any]] = []
+    for stat in stats[:top]:
+        sites.append({
+            "site": _site(stat),
+            "traceback": [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+            "size_diff": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size": stat.size,
+            "count": stat.count,
+        })
+    return {
+        "seconds": round(elapsed, 3),
+        "total_size_diff": sum(stat.size_diff for stat in stats),
+        "traced_current": traced_current,
+        "traced_peak": traced_peak,
+        "sites": sites,
+    }
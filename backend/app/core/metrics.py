@@ -0,0 +1,382 @@
+"""In-process metrics exposed in the Prometheus text exposition format.
+
+Every writer thread gets its own shard of counter/histogram values, so the hot
+path is a plain dict update without any lock. Shards are only aggregated when
+``/metrics`` is scraped. Shards of threads that have exited are folded into a
+retired total so short-lived executor threads don't accumulate.
+
+Each uvicorn worker keeps its own registry; the ``pid`` label on
+``fridgepal_process_info`` tells scraped workers apart.
+"""
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds (5ms .. 10s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+# Buckets for result counts per request/chef
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Buckets for fractions such as top-k overlap (0..1)
+RATIO_BUCKETS = (0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0)
+# Buckets for absolute score differences between scoring engines
+SCORE_DELTA_BUCKETS = (0.0, 1e-6, 1e-4, 1e-3, 0.01, 0.05, 0.1, 0.25, 0.5)
+# Buckets for latency ratios (shadow / primary)
+SPEEDUP_BUCKETS = (0.1, 0.25, 0.5, 0.75, 0.9, 1.0, 1.1, 1.25, 1.5, 2.0, 4.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for a metric family; values live in the registry shards."""
+
+    type_name = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, LabelValues]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return (self.name, tuple(str(v) for v in labels))
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    type_name = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        values = self._registry._shard()
+        key = self._key(labels)
+        values[key] = values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Up/down gauge. Per-thread deltas are summed on scrape."""
+
+    type_name = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        values = self._registry._shard()
+        key = self._key(labels)
+        values[key] = values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bounds; ``+Inf`` is implicit."""
+
+    type_name = "histogram"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str,
+                 labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        values = self._registry._shard()
+        key = self._key(labels)
+        slot = values.get(key)
+        if slot is None:
+            # Per-bucket counts (non-cumulative), then sum and count
+            slot = values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        slot[bisect.bisect_left(self.buckets, value)] += 1
+        slot[-2] += value
+        slot[-1] += 1
+
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram: Histogram, labels: Sequence[str]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start, *self._labels)
+        return False
+
+
+class MetricsRegistry:
+    """Holds metric families and the per-thread value shards."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Tuple[str, str, Callable[[], Iterable[Sample]]]] = {}
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different shape")
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def register_collector(self, name: str, type_name: str, documentation: str,
+                           collector: Callable[[], Iterable[Sample]]) -> None:
+        """Register a callback evaluated on every scrape.
+
+        The callback returns ``(sample_name, labels, value)`` tuples belonging
+        to the metric family ``name``.
+        """
+        with self._lock:
+            self._collectors[name] = (type_name, documentation, collector)
+
+    def _merged(self) -> dict:
+        """Sum all live shards plus the retired totals."""
+        with self._lock:
+            live = []
+            for thread, values in self._shards:
+                if thread.is_alive():
+                    live.append((thread, values))
+                else:
+                    _merge_into(self._retired, values)
+            self._shards = live
+            merged: dict = {}
+            _merge_into(merged, self._retired)
+            shards = [values for _, values in live]
+        for values in shards:
+            # Copy first: the owning thread may insert keys concurrently
+            _merge_into(merged, dict(values))
+        return merged
+
+    def value(self, name: str, *labels: str) -> Optional[float]:
+        """Current aggregated value of a counter/gauge sample (mainly for tests)."""
+        return self._merged().get((name, tuple(str(v) for v in labels)))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+        merged = self._merged()
+        by_name: Dict[str, List[Tuple[LabelValues, object]]] = {}
+        for (name, labels), value in merged.items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type_name}")
+            for labels, value in sorted(by_name.get(name, ()), key=lambda item: item[0]):
+                if isinstance(metric, Histogram):
+                    lines.extend(_render_histogram(metric, labels, value))
+                else:
+                    lines.append(f"{name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+
+        for name, (type_name, documentation, collector) in sorted(self._collectors.items()):
+            try:
+                samples = list(collector())
+            except Exception:
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {type_name}")
+            for sample_name, labels, value in samples:
+                names = tuple(labels)
+                lines.append(
+                    f"{sample_name}{_format_labels(names, [labels[n] for n in names])} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _merge_into(target: dict, source: dict) -> None:
+    for key, value in source.items():
+        if isinstance(value, list):
+            slot = target.get(key)
+            if slot is None:
+                target[key] = list(value)
+            else:
+                for i, v in enumerate(value):
+                    slot[i] += v
+        else:
+            target[key] = target.get(key, 0.0) + value
+
+
+def _render_histogram(metric: Histogram, labels: LabelValues, slot: list) -> List[str]:
+    lines = []
+    names = metric.labelnames + ("le",)
+    cumulative = 0
+    for bound, count in zip(metric.buckets + (float("inf"),), slot[:-2]):
+        cumulative += count
+        lines.append(
+            f"{metric.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+        )
+    label_str = _format_labels(metric.labelnames, labels)
+    lines.append(f"{metric.name}_sum{label_str} {_format_value(slot[-2])}")
+    lines.append(f"{metric.name}_count{label_str} {slot[-1]}")
+    return lines
+
+
+# Global registry and the metric families used across the service
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    "fridgepal_http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "fridgepal_http_requests_in_flight",
+    "HTTP requests currently being processed",
+)
+CHEF_LATENCY = registry.histogram(
+    "fridgepal_chef_scoring_duration_seconds",
+    "Time spent scoring a request in a single chef",
+    ("chef",),
+)
+CHEF_ERRORS = registry.counter(
+    "fridgepal_chef_errors_total",
+    "Chef scoring calls that raised an error",
+    ("chef",),
+)
+CHEF_QUEUE_DEPTH = registry.gauge(
+    "fridgepal_chef_queue_depth",
+    "Chef scoring tasks submitted but not yet started",
+)
+CHEF_RESULTS = registry.histogram(
+    "fridgepal_chef_results",
+    "Number of recommendations returned by a chef per request",
+    ("chef",),
+    buckets=COUNT_BUCKETS,
+)
+RECOMMENDATION_RESULTS = registry.histogram(
+    "fridgepal_recommendation_results",
+    "Number of merged recommendations returned per request",
+    buckets=COUNT_BUCKETS,
+)
+SHADOW_COMPARISONS = registry.counter(
+    "fridgepal_shadow_comparisons_total",
+    "Shadow engine comparisons by chef and outcome (compared/error)",
+    ("chef", "outcome"),
+)
+SHADOW_SKIPPED = registry.counter(
+    "fridgepal_shadow_skipped_total",
+    "Sampled shadow comparisons skipped because the previous one was still running",
+)
+SHADOW_LATENCY = registry.histogram(
+    "fridgepal_shadow_scoring_duration_seconds",
+    "Scoring latency of the primary and shadow engines on the same sampled request",
+    ("engine", "chef"),
+)
+SHADOW_LATENCY_RATIO = registry.histogram(
+    "fridgepal_shadow_latency_ratio",
+    "Shadow engine latency divided by primary engine latency",
+    ("chef",),
+    buckets=SPEEDUP_BUCKETS,
+)
+SHADOW_RANK_OVERLAP = registry.histogram(
+    "fridgepal_shadow_rank_overlap",
+    "Fraction of the primary top-k also returned by the shadow engine",
+    ("chef",),
+    buckets=RATIO_BUCKETS,
+)
+SHADOW_SCORE_DELTA = registry.histogram(
+    "fridgepal_shadow_score_delta",
+    "Largest absolute score difference for recipes returned by both engines",
+    ("chef",),
+    buckets=SCORE_DELTA_BUCKETS,
+)
+CACHE_REQUESTS = registry.counter(
+    "fridgepal_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ("cache", "result"),
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup; the hit ratio is derived on scrape."""
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def _collect_cache_ratios() -> Iterable[Sample]:
+    totals: Dict[str, List[float]] = {}
+    for (name, labels), value in registry._merged().items():
+        if name != CACHE_REQUESTS.name:
+            continue
+        cache, result = labels
+        hits_misses = totals.setdefault(cache, [0.0, 0.0])
+        hits_misses[0 if result == "hit" else 1] += value
+    for cache, (hits, misses) in sorted(totals.items()):
+        if hits + misses:
+            yield ("fridgepal_cache_hit_ratio", {"cache": cache}, hits / (hits + misses))
+
+
+def _collect_process_info() -> Iterable[Sample]:
+    yield ("fridgepal_process_info", {"pid": str(os.getpid())}, 1)
+
+
+def _collect_rss() -> Iterable[Sample]:
+    import psutil
+    yield ("process_resident_memory_bytes", {}, psutil.Process(os.getpid()).memory_info().rss)
+
+
+registry.register_collector(
+    "fridgepal_cache_hit_ratio", "gauge", "Cache hit ratio since process start", _collect_cache_ratios
+)
+registry.register_collector(
+    "fridgepal_process_info", "gauge", "Worker process identity", _collect_process_info
+)
+registry.register_collector(
+    "process_resident_memory_bytes", "gauge", "Resident set size in bytes", _collect_rss
+)
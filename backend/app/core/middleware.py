@@ -0,0 +1,86 @@
+"""Pure ASGI middleware used by the application.
+
+These are plain ASGI callables rather than ``BaseHTTPMiddleware`` subclasses so
+they don't spawn an extra task per request or buffer streaming responses.
+"""
+import time
+
+from app.core import timing
+from app.core.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope) -> str:
+    """
+    Path template of the route that handled the request (e.g. ``/items/{id}``),
+    or ``UNMATCHED_ROUTE`` when routing found none, whatever the response
+    status (404s, but also CORS preflights answered before routing).
+    """
+    route = scope.get("route")  # Set by FastAPI's APIRoute when it matches
+    if route is None and "endpoint" in scope and "app" in scope:
+        # Plain Starlette routes (docs, OpenAPI schema) only leave their endpoint
+        routes = getattr(getattr(scope["app"], "router", None), "routes", ())
+        route = next((r for r in routes if getattr(r, "endpoint", None) is scope["endpoint"]), None)
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Record per-endpoint latency and the number of in-flight requests."""
+
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # Label by route template so cardinality is bounded by the app's routes
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start, scope["method"], route_template(scope), str(status_code)
+            )
+
+
+class ServerTimingMiddleware:
+    """Collect stage timings for each request and emit a ``Server-Timing`` header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = timing.StageTimings()
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and (timings.stages or timings.chefs):
+                timings.add("total", time.perf_counter() - start)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.to_header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = timing.activate(timings)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timing.deactivate(token)
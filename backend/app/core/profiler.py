@@ -0,0 +1,116 @@
+"""On-demand stack-sampling profiler.
+
+A background thread periodically reads ``sys._current_frames()`` and counts the
+stack of every other thread. Nothing is installed while the profiler is idle,
+so there is no cost outside of a profiling window. Output uses the "collapsed
+stack" format (``frame;frame;frame count``) understood by flamegraph.pl and
+speedscope.
+
+Profiling is per process: under ``uvicorn --workers N`` each request profiles
+the worker that happened to accept it, and a lock prevents two concurrent
+profiles in the same worker.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+# Serializes profiling windows within a worker process
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is already running in this process."""
+
+
+def _frame_label(frame, include_lines: bool) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    if include_lines:
+        return f"{code.co_name} ({filename}:{frame.f_lineno})"
+    return f"{code.co_name} ({filename})"
+
+
+class StackSampler:
+    """Samples the stacks of all threads at a fixed interval."""
+
+    def __init__(self, interval: float = 0.005, include_lines: bool = False,
+                 include_idle: bool = False):
+        self.interval = interval
+        self.include_lines = include_lines
+        self.include_idle = include_idle
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def _collapse(self, frame, thread_name: str) -> Optional[str]:
+        if not self.include_idle and _is_idle(frame):
+            return None
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame, self.include_lines).replace(";", ":"))
+            frame = frame.f_back
+        if not labels:
+            return None
+        labels.append(thread_name.replace(";", ":").replace(" ", "_"))
+        return ";".join(reversed(labels))
+
+    def sample_once(self) -> None:
+        own_ident = threading.get_ident()
+        names: Dict[int, str] = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = self._collapse(frame, names.get(ident, f"thread-{ident}"))
+            if stack:
+                self.stacks[stack] += 1
+        self.samples += 1
+
+    def run(self, duration: float) -> "StackSampler":
+        """Sample for ``duration`` seconds in the calling thread."""
+        deadline = time.perf_counter() + duration
+        next_tick = time.perf_counter()
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now >= next_tick:
+                self.sample_once()
+                next_tick += self.interval
+                # Don't try to catch up after a stall; keep the sampling rate bounded
+                if next_tick < now:
+                    next_tick = now + self.interval
+            time.sleep(max(0.0, min(next_tick, deadline) - time.perf_counter()))
+        return self
+
+    def collapsed(self) -> str:
+        """Return the collapsed stacks, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# Leaf frames of threads that are parked rather than doing work
+_IDLE_LEAVES = frozenset({
+    ("wait", "threading.py"),
+    ("select", "selectors.py"),
+    ("_worker", "thread.py"),
+    ("get", "queue.py"),
+})
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (code.co_name, os.path.basename(code.co_filename)) in _IDLE_LEAVES
+
+
+def profile(duration: float, interval: float = 0.005, include_lines: bool = False,
+            include_idle: bool = False) -> StackSampler:
+    """Run a profiling window in this process; raises ProfilerBusyError if one is active."""
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running in this worker")
+    try:
+        sampler = StackSampler(interval=interval, include_lines=include_lines,
+                               include_idle=include_idle)
+        return sampler.run(duration)
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,153 @@
+"""In-process rate limiting and admission control.
+
+:class:`RateLimiter` keeps a token bucket per client so one client can't
+monopolize a worker. :class:`AdmissionController` bounds how many requests
+score at once and sheds new arrivals when the estimated queueing delay
+(requests ahead x smoothed service time / scoring slots) exceeds a latency
+target. Shedding early with ``Retry-After`` is cheaper for everyone than
+accepting work that will time out anyway.
+
+State is per worker process; under ``uvicorn --workers N`` the effective
+limits are N times the configured ones.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+from app.core.metrics import registry as metrics_registry
+
+REQUESTS_SHED = metrics_registry.counter(
+    "fridgepal_requests_shed_total",
+    "Requests rejected by rate limiting or admission control, by reason",
+    ("reason",),
+)
+ADMISSION_QUEUE_WAIT = metrics_registry.histogram(
+    "fridgepal_admission_queue_wait_seconds",
+    "Time admitted requests waited for a scoring slot",
+)
+
+
+def retry_after_seconds(delay: float) -> int:
+    """Round a delay up to whole seconds for the ``Retry-After`` header."""
+    return max(1, int(math.ceil(delay)))
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` tokens per second."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens; returns 0 on success, else the seconds until they are available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-client token buckets, keeping at most ``max_clients`` (least recently seen are evicted)."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Rate limits need rate > 0 and burst >= 1, got rate={rate}, burst={burst}")
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client: str, now: Optional[float] = None) -> float:
+        """Charge one request to ``client``; returns 0 if allowed, else the retry delay in seconds."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+                if len(self._buckets) > self.max_clients:
+                    # An evicted client simply starts again with a full bucket
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            return bucket.take(now)
+
+
+class OverloadedError(RuntimeError):
+    """Raised when a request is shed by the admission controller."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Service overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency-based admission control.
+
+    At most ``concurrency`` admitted requests score at a time; the rest wait
+    for a slot. A new request is rejected when ``max_queue`` requests are
+    already waiting or when its estimated wait exceeds ``latency_target``.
+    """
+
+    def __init__(self, concurrency: int, latency_target: float, max_queue: int, smoothing: float = 0.2):
+        self.concurrency = max(1, concurrency)
+        self.latency_target = latency_target
+        self.max_queue = max_queue
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.service_time: Optional[float] = None  # EWMA of scoring time in seconds
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+
+    def estimated_wait(self) -> float:
+        """Expected wait for a slot if one more request were admitted now."""
+        ahead = self.in_flight - self.concurrency + 1
+        if ahead <= 0 or not self.service_time:
+            return 0.0
+        return ahead * self.service_time / self.concurrency
+
+    def admit(self) -> None:
+        """Admit a request or raise :class:`OverloadedError`; pair with :meth:`release`."""
+        with self._lock:
+            if self.in_flight - self.concurrency >= self.max_queue:
+                raise OverloadedError("queue_full", self.estimated_wait() or self.latency_target)
+            wait = self.estimated_wait()
+            if wait > self.latency_target:
+                raise OverloadedError("latency", wait)
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    @contextmanager
+    def slot(self):
+        """Hold a scoring slot for the duration of the block (blocks; use from a worker thread)."""
+        queued_at = time.perf_counter()
+        self._slots.acquire()
+        start = time.perf_counter()
+        ADMISSION_QUEUE_WAIT.observe(start - queued_at)
+        try:
+            yield
+        finally:
+            self._slots.release()
+            self._observe(time.perf_counter() - start)
+
+    def _observe(self, duration: float) -> None:
+        with self._lock:
+            if self.service_time is None:
+                self.service_time = duration
+            else:
+                self.service_time += self.smoothing * (duration - self.service_time)
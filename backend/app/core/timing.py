@@ -0,0 +1,97 @@
+"""Lightweight per-request stage timers.
+
+A request activates a :class:`StageTimings` in a context variable; code on the
+hot path marks stage boundaries with :func:`start`. When nothing is active the
+markers are no-ops, so instrumented code costs one context variable lookup.
+
+Chef scoring runs in executor threads, which don't inherit the request context,
+so :class:`~app.services.chef_service.ChefService` activates a per-chef
+``StageTimings`` in the worker and attaches it to the request afterwards.
+"""
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+_current: ContextVar[Optional["StageTimings"]] = ContextVar("stage_timings", default=None)
+
+
+class StageTimings:
+    """Accumulated stage durations (seconds) for a request or a single chef."""
+
+    __slots__ = ("stages", "chefs")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.chefs: Dict[str, "StageTimings"] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_chef(self, chef_name: str, timings: "StageTimings") -> None:
+        self.chefs[chef_name] = timings
+
+    def chef_stage_max(self) -> Dict[str, float]:
+        """Slowest chef per stage; chefs run in parallel so this is the critical path."""
+        result: Dict[str, float] = {}
+        for timings in self.chefs.values():
+            for name, seconds in timings.stages.items():
+                if seconds > result.get(name, 0.0):
+                    result[name] = seconds
+        return result
+
+    def to_header(self) -> str:
+        """Format as a ``Server-Timing`` header value (durations in ms)."""
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+        if self.chefs:
+            desc = f"max of {len(self.chefs)} chefs"
+            entries.extend(
+                f'chef-{name};dur={seconds * 1000:.2f};desc="{desc}"'
+                for name, seconds in self.chef_stage_max().items()
+            )
+        return ", ".join(entries)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Debug representation with millisecond values, broken down per chef."""
+        return {
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            "chefs_ms": {
+                chef: {name: round(seconds * 1000, 3) for name, seconds in timings.stages.items()}
+                for chef, timings in self.chefs.items()
+            },
+        }
+
+
+class _Marker:
+    """Records the time since the previous mark under the given stage name."""
+
+    __slots__ = ("_timings", "_last")
+
+    def __init__(self, timings: Optional[StageTimings]):
+        self._timings = timings
+        self._last = time.perf_counter() if timings is not None else 0.0
+
+    def mark(self, name: str) -> None:
+        if self._timings is None:
+            return
+        now = time.perf_counter()
+        self._timings.add(name, now - self._last)
+        self._last = now
+
+
+def current() -> Optional[StageTimings]:
+    """Return the active timings of this context, if any."""
+    return _current.get()
+
+
+def activate(timings: StageTimings):
+    """Make ``timings`` the active collector; returns a token for :func:`deactivate`."""
+    return _current.set(timings)
+
+
+def deactivate(token) -> None:
+    _current.reset(token)
+
+
+def start() -> _Marker:
+    """Start a stage marker bound to the active timings (no-op when inactive)."""
+    return _Marker(_current.get())
@@ -1,37 +1,41 @@
 import logging
-import sys
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import PlainTextResponse
 
 from app.utils.exception_handlers import register_exception_handlers
 
 from app.core.config import settings
+from app.core.concurrency import apply_plan, claim_worker_slot, parse_cpu_list, plan_concurrency
+from app.core.log import configure_logging
+from app.core.metrics import registry as metrics_registry
+from app.core.middleware import MetricsMiddleware, ServerTimingMiddleware
 from app.api.api_v1 import api_router
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
+# Configure logging: records are queued and written by a background thread
+configure_logging(
+    level=settings.LOG_LEVEL,
+    fmt=settings.LOG_FORMAT,
+    queue_size=settings.LOG_QUEUE_SIZE,
+    sample_rate=settings.LOG_SAMPLE_RATE
 )
 
-# Get the root logger and set level to INFO
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
-
-# Ensure all loggers use our configuration
-for logger_name in logging.root.manager.loggerDict:
-    if not logger_name.startswith('uvicorn'):  # Don't override uvicorn's logging
-        logging.getLogger(logger_name).handlers = []
-        logging.getLogger(logger_name).propagate = True
-
 # Get logger for this module
 logger = logging.getLogger(__name__)
 logger.info("Application logger configured")
 
+# Size thread pools to this worker's share of the CPUs (cgroup quota aware);
+# with CPU_AFFINITY each worker is pinned to its own slice of those cores
+cpu_affinity = parse_cpu_list(settings.CPU_AFFINITY)
+apply_plan(plan_concurrency(
+    workers=settings.WEB_CONCURRENCY,
+    chef_threads=settings.CHEF_THREADS,
+    native_threads=settings.NATIVE_THREADS,
+    affinity=cpu_affinity,
+    worker_index=claim_worker_slot(settings.WEB_CONCURRENCY) if cpu_affinity else None
+))
+
 # Initialize FastAPI with OpenAPI configuration
 def get_application() -> FastAPI:
     app = FastAPI(
@@ -42,6 +46,10 @@ def get_application() -> FastAPI:
         openapi_url=f"{settings.API_V1_STR}/openapi.json"
     )
     
+    # Middleware are pure ASGI (no BaseHTTPMiddleware), so streaming responses
+    # pass through unbuffered. The last one added runs first:
+    # Metrics -> ServerTiming -> CORS (also answers preflight requests) -> routes
+    
     # Add CORS middleware
     if settings.BACKEND_CORS_ORIGINS:
         app.add_middleware(
@@ -56,8 +64,24 @@ def get_application() -> FastAPI:
     
     # Include API router
     app.include_router(api_router, prefix=settings.API_V1_STR)
+    
+    # Per-stage timings in the Server-Timing response header
+    if settings.SERVER_TIMING_ENABLED:
+        app.add_middleware(ServerTimingMiddleware)
+    
+    # Expose Prometheus-style metrics
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
     return app
 
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Serve the metrics of this worker in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 def custom_openapi(app: FastAPI):
     logger.info("Generating custom OpenAPI schema...")
     if not app:
@@ -69,7 +93,7 @@ def custom_openapi(app: FastAPI):
         return app.openapi_schema
     
     try:
-        logger.info(f"Generating OpenAPI schema for {settings.PROJECT_NAME}")
+        logger.info("Generating OpenAPI schema for %s", settings.PROJECT_NAME)
         openapi_schema = get_openapi(
             title=settings.PROJECT_NAME,
             version="1.0.0",
@@ -95,7 +119,7 @@ def custom_openapi(app: FastAPI):
         logger.info("Successfully generated OpenAPI schema")
         return app.openapi_schema
     except Exception as e:
-        logger.error(f"Error generating OpenAPI schema: {str(e)}")
+        logger.error("Error generating OpenAPI schema: %s", e)
         raise
 
 # Create the FastAPI application
@@ -114,21 +138,6 @@ if app is None:
 app.openapi = lambda: custom_openapi(app)
 logger.info("Custom OpenAPI schema setup completed successfully")
 
-# CORS preflight handler
-@app.middleware("http")
-async def add_cors_preflight_headers(request: Request, call_next):
-    if request.method == "OPTIONS":
-        response = Response()
-        response.headers["Access-Control-Allow-Origin"] = ",".join(settings.BACKEND_CORS_ORIGINS) if settings.BACKEND_CORS_ORIGINS else "*"
-        response.headers["Access-Control-Allow-Methods"] = ",".join(settings.CORS_ALLOW_METHODS)
-        response.headers["Access-Control-Allow-Headers"] = ",".join(settings.CORS_ALLOW_HEADERS)
-        response.headers["Access-Control-Allow-Credentials"] = "true"
-        response.status_code = 200
-        return response
-    
-    response = await call_next(request)
-    return response
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,259 @@
+import argparse
+import csv
+import json
+import random
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.models.recipe import Recipe
+
+# python -m app.models.Training.generate_corpus --rows 2000000 --output data/synthetic_recipes.csv
+
+# Frequent real-world ingredients, roughly in RecipeNLG popularity order
+BASE_INGREDIENTS = [
+    "salt", "sugar", "butter", "flour", "eggs", "onion", "garlic", "milk", "water",
+    "black pepper", "olive oil", "vanilla", "baking powder", "baking soda", "brown sugar",
+    "lemon juice", "cinnamon", "vegetable oil", "chicken", "tomatoes", "cheddar cheese",
+    "sour cream", "parmesan cheese", "celery", "carrots", "potatoes", "green pepper",
+    "mushrooms", "rice", "ground beef", "cream cheese", "honey", "soy sauce", "ginger",
+    "parsley", "oregano", "basil", "thyme", "paprika", "cumin", "chili powder", "bacon",
+    "heavy cream", "lemon", "lime", "orange juice", "pecans", "walnuts", "raisins",
+    "mayonnaise", "mustard", "ketchup", "vinegar", "cornstarch", "spinach", "broccoli",
+]
+
+# Building blocks for the long tail of the vocabulary
+_DESCRIPTORS = [
+    "fresh", "dried", "ground", "chopped", "frozen", "smoked", "sweet", "hot", "light",
+    "whole", "toasted", "shredded", "sliced", "crushed", "roasted", "canned", "low-fat",
+    "unsalted", "red", "green", "yellow", "white", "wild", "baby", "pickled",
+]
+_NOUNS = [
+    "basil", "paprika", "cabbage", "beans", "corn", "peas", "almonds", "cashews", "shrimp",
+    "salmon", "tuna", "pork", "lamb", "turkey", "sausage", "ham", "zucchini", "squash",
+    "eggplant", "kale", "leeks", "shallots", "chives", "dill", "sage", "rosemary", "nutmeg",
+    "cloves", "cardamom", "coriander", "turmeric", "fennel", "mint", "cilantro", "apples",
+    "pears", "peaches", "berries", "cherries", "dates", "figs", "coconut", "oats", "barley",
+    "quinoa", "lentils", "chickpeas", "tofu", "noodles", "tortillas", "bread", "crackers",
+    "yogurt", "ricotta", "mozzarella", "feta", "gouda", "broth", "stock", "wine", "syrup",
+    "molasses", "jam", "olives", "capers", "anchovies", "peppers", "chiles", "radishes",
+]
+_UNITS = ["c.", "tsp.", "Tbsp.", "lb.", "oz.", "pkg.", "can", "qt.", "pt.", "stick", "dash"]
+_AMOUNTS = ["1", "2", "3", "4", "1/2", "1/4", "3/4", "1 1/2", "2 1/2", "1/3"]
+_DISHES = ["Casserole", "Soup", "Salad", "Bake", "Stew", "Pie", "Cake", "Bread", "Dip",
+           "Cookies", "Muffins", "Skillet", "Pasta", "Stir-Fry", "Chili", "Bars", "Pudding"]
+_VERBS = ["Mix", "Combine", "Stir in", "Add", "Fold in", "Whisk", "Pour", "Sprinkle",
+          "Spread", "Layer", "Season with"]
+_METHODS = ["Bake at 350° for {m} minutes.", "Simmer for {m} minutes.",
+            "Chill for {m} minutes.", "Cook over medium heat for {m} minutes.",
+            "Let stand {m} minutes before serving."]
+
+NER_FORMATS = ("json", "python", "comma")
+RECIPENLG_COLUMNS = ["", "title", "ingredients", "directions", "link", "source", "NER"]
+
+
+def ingredient_vocabulary(size: int = 5000) -> List[str]:
+    """
+    Build an ingredient vocabulary ordered by popularity rank.
+
+    Args:
+        size: Number of distinct ingredients
+
+    Returns:
+        Base ingredients followed by descriptor/noun combinations and numbered variants
+    """
+    vocab = list(dict.fromkeys(BASE_INGREDIENTS))
+    seen = set(vocab)
+    for noun in _NOUNS:
+        if noun not in seen:
+            vocab.append(noun)
+            seen.add(noun)
+    for descriptor in _DESCRIPTORS:
+        for noun in _NOUNS + BASE_INGREDIENTS:
+            name = f"{descriptor} {noun}"
+            if name not in seen:
+                vocab.append(name)
+                seen.add(name)
+    i = 0
+    while len(vocab) < size:
+        # Beyond the combinations, add rare branded/regional variants
+        vocab.append(f"{_NOUNS[i % len(_NOUNS)]} variety{i // len(_NOUNS)}")
+        i += 1
+    return vocab[:size]
+
+
+def zipf_sampler(vocab: Sequence[str], exponent: float = 1.1, seed: int = 0):
+    """
+    Return a function sampling ``k`` distinct items with Zipf-like popularity.
+
+    Items are drawn by inverse CDF in batches and de-duplicated, which is much
+    faster than weighted sampling without replacement for large vocabularies.
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(vocab) + 1) ** exponent
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+
+    def sample(k: int) -> List[str]:
+        k = min(k, len(vocab))
+        picked: Dict[int, None] = {}
+        while len(picked) < k:
+            draws = np.searchsorted(cdf, rng.random(2 * k + 4))
+            for i in draws.tolist():
+                picked[min(i, len(vocab) - 1)] = None
+                if len(picked) == k:
+                    break
+        return [vocab[i] for i in picked]
+
+    return sample
+
+
+def format_ner(ingredients: Sequence[str], fmt: str) -> str:
+    """Render NER ingredients in one of the formats found in the wild."""
+    if fmt == "json":
+        return json.dumps(list(ingredients))
+    if fmt == "python":
+        return repr(list(ingredients))
+    if fmt == "comma":
+        return ", ".join(ingredients)
+    raise ValueError(f"Unknown NER format: {fmt}")
+
+
+class CorpusGenerator:
+    """
+    Generates RecipeNLG-shaped rows one at a time.
+
+    Ingredients follow a Zipf distribution over ``vocab_size`` names, ingredient
+    counts and direction lengths follow log-normal distributions similar to the
+    real dataset (about 9 ingredients and 6 steps on average), and NER columns
+    mix JSON lists, Python-literal lists and comma strings.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        vocab_size: int = 20000,
+        exponent: float = 1.07,
+        ner_formats: Optional[Dict[str, float]] = None,
+    ):
+        self._rng = random.Random(seed)
+        self.vocabulary = ingredient_vocabulary(vocab_size)
+        self._sample = zipf_sampler(self.vocabulary, exponent=exponent, seed=seed)
+        ner_formats = ner_formats or {"json": 0.8, "python": 0.1, "comma": 0.1}
+        unknown = set(ner_formats) - set(NER_FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown NER formats: {sorted(unknown)}")
+        self._formats = list(ner_formats)
+        self._format_weights = [ner_formats[f] for f in self._formats]
+
+    def _count(self, mu: float, sigma: float, low: int, high: int) -> int:
+        return max(low, min(high, int(round(self._rng.lognormvariate(mu, sigma)))))
+
+    def row(self, row_id: int) -> Dict[str, str]:
+        """Generate a single row with RecipeNLG column names."""
+        rng = self._rng
+        ingredients = self._sample(self._count(2.1, 0.4, 1, 40))
+        quantities = [
+            f"{rng.choice(_AMOUNTS)} {rng.choice(_UNITS)} {ingredient}" for ingredient in ingredients
+        ]
+        steps = []
+        for _ in range(self._count(1.7, 0.5, 1, 30)):
+            picked = rng.sample(ingredients, min(len(ingredients), rng.randint(1, 3)))
+            steps.append(f"{rng.choice(_VERBS)} {' and '.join(picked)}.")
+        steps.append(rng.choice(_METHODS).format(m=rng.choice([5, 10, 15, 20, 30, 45, 60])))
+        fmt = rng.choices(self._formats, weights=self._format_weights)[0]
+        return {
+            "": str(row_id),
+            "title": f"{rng.choice(ingredients).title()} {rng.choice(_DISHES)}",
+            "ingredients": json.dumps(quantities),
+            "directions": json.dumps(steps),
+            "link": f"www.example.com/recipe/{row_id}",
+            "source": rng.choice(["Gathered", "Recipes1M"]),
+            "NER": format_ner(ingredients, fmt),
+        }
+
+    def rows(self, n: int, start_id: int = 0) -> Iterator[Dict[str, str]]:
+        """Lazily generate ``n`` rows."""
+        for row_id in range(start_id, start_id + n):
+            yield self.row(row_id)
+
+    def recipes(self, n: int, start_id: int = 0) -> Iterator[Recipe]:
+        """Lazily generate ``n`` Recipe objects, preprocessed like load_and_preprocess_data."""
+        for row in self.rows(n, start_id):
+            yield Recipe(
+                id=int(row[""]),
+                title=row["title"],
+                ingredients=row["ingredients"].lower(),
+                instructions=row["directions"],
+                NER_ingredients=row["NER"],
+            )
+
+
+def write_csv(path: str, rows: Iterator[Dict[str, str]]) -> int:
+    """Stream rows to a CSV file; returns the number of rows written."""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=RECIPENLG_COLUMNS, quoting=csv.QUOTE_MINIMAL)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_parquet(path: str, rows: Iterator[Dict[str, str]], batch_size: int = 50000) -> int:
+    """Stream rows to a Parquet file in row groups of ``batch_size``; requires pyarrow."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+
+    columns = ["id"] + RECIPENLG_COLUMNS[1:]
+    schema = pa.schema([(name, pa.int64() if name == "id" else pa.string()) for name in columns])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch: Dict[str, List] = {name: [] for name in columns}
+        for row in rows:
+            batch["id"].append(int(row[""]))
+            for name in columns[1:]:
+                batch[name].append(row[name])
+            count += 1
+            if len(batch["id"]) >= batch_size:
+                writer.write_table(pa.table(batch, schema=schema))
+                batch = {name: [] for name in columns}
+        if batch["id"]:
+            writer.write_table(pa.table(batch, schema=schema))
+    return count
+
+
+def main(argv: Sequence[str] = None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic RecipeNLG-shaped recipe corpus")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--output", default="data/synthetic_recipes.csv")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None,
+                        help="Output format (default: from the file extension)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vocab-size", type=int, default=20000)
+    parser.add_argument("--zipf", type=float, default=1.07, help="Zipf exponent of ingredient popularity")
+    parser.add_argument("--ner-formats", default="json=0.8,python=0.1,comma=0.1",
+                        help="Mix of NER formats, e.g. json=0.8,python=0.1,comma=0.1")
+    args = parser.parse_args(argv)
+
+    ner_formats = {}
+    for part in args.ner_formats.split(","):
+        name, _, weight = part.partition("=")
+        ner_formats[name.strip()] = float(weight or 1)
+
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+    generator = CorpusGenerator(
+        seed=args.seed, vocab_size=args.vocab_size, exponent=args.zipf, ner_formats=ner_formats
+    )
+    print(f"Generating {args.rows} recipes to {args.output} ({fmt})...")
+    writer = write_parquet if fmt == "parquet" else write_csv
+    count = writer(args.output, generator.rows(args.rows))
+    print(f"Wrote {count} recipes")
+
+
+if __name__ == "__main__":
+    main()
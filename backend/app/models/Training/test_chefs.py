@@ -3,6 +3,7 @@ import joblib
 from pathlib import Path
 from typing import List, Dict, Any
 from app.models.chef import Chef
+from app.models.recipe_store import RecipeStore
 
 # python -m app.models.Training.test_chefs
 
@@ -32,6 +33,8 @@ def load_chefs(models_dir: str = "trained_models") -> List[Chef]:
     for model_file in model_files:
         print(f"Loading model: {model_file.name}")
         chef = joblib.load(model_file)
+        if isinstance(getattr(chef, "recipes", None), RecipeStore):
+            chef.recipes.locate_text(model_file.parent)
         chefs.append(chef)
 
     print(f"\nLoaded {len(chefs)} chef(s)")
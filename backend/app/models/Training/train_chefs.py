@@ -1,9 +1,11 @@
 import os
 import pandas as pd
-from typing import List
+from typing import List, Optional
 import joblib
 from datetime import datetime
 from app.models.chef import Chef
+from app.models.hashing import HashingChef
+from app.models.quantized import parse_quantization
 from app.models.recipe import Recipe
 
 # python -m app.models.Training.train_chefs
@@ -130,7 +132,8 @@ def load_and_preprocess_data(filepath: str, sample_size: int = 1000) -> pd.DataF
     # If we get here, all attempts failed
     raise ValueError("Could not read the CSV file with any of the supported encodings")
 
-def create_chefs(df: pd.DataFrame, num_chefs: int = 5, recipes_per_chef: int = 1) -> List[Chef]:
+def create_chefs(df: pd.DataFrame, num_chefs: int = 5, recipes_per_chef: int = 1,
+                 mode: str = "tfidf", n_features: int = 2 ** 18) -> List[Chef]:
     """
     Create and train multiple chef models on different subsets of the data.
     
@@ -138,10 +141,14 @@ def create_chefs(df: pd.DataFrame, num_chefs: int = 5, recipes_per_chef: int = 1
         df: DataFrame containing recipe data
         num_chefs: Number of chefs to create
         recipes_per_chef: Number of recipes per chef
+        mode: "tfidf" (stored vocabulary) or "hashing" (HashingChef, no vocabulary)
+        n_features: Hashed feature space size in "hashing" mode
         
     Returns:
         List of trained Chef objects
     """
+    if mode not in ("tfidf", "hashing"):
+        raise ValueError(f"Unknown chef mode: {mode}")
     chefs = []
     
     # List of chef names
@@ -157,7 +164,10 @@ def create_chefs(df: pd.DataFrame, num_chefs: int = 5, recipes_per_chef: int = 1
         
         # Create a chef with a name
         chef_name = f"Chef {i+1} ({chef_names[i % len(chef_names)]})"
-        chef = Chef(name=chef_name)
+        if mode == "hashing":
+            chef = HashingChef(name=chef_name, n_features=n_features)
+        else:
+            chef = Chef(name=chef_name)
         
         # Create Recipe objects
         recipes = []
@@ -180,13 +190,15 @@ def create_chefs(df: pd.DataFrame, num_chefs: int = 5, recipes_per_chef: int = 1
     
     return chefs
 
-def save_chefs(chefs: List[Chef], output_dir: str = "trained_models", recipes_per_chef: int = 1):
+def save_chefs(chefs: List[Chef], output_dir: str = "trained_models", recipes_per_chef: int = 1,
+               quantization: Optional[str] = None):
     """
     Save trained chef models to disk.
     
     Args:
         chefs: List of trained Chef objects
         output_dir: Directory name to save the models (relative to app/models/)
+        quantization: Save quantized TF-IDF weights ("uint8", "uint8-row" or "float16", see Chef.quantize)
     """
     # Create output directory if it doesn't exist
     models_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -199,6 +211,12 @@ def save_chefs(chefs: List[Chef], output_dir: str = "trained_models", recipes_pe
         timestamp = datetime.now().strftime("%d%m%Y")
         filename = os.path.join(output_path, f"{chef.name.lower().replace(' ', '_')}_{recipes_per_chef}_recipes_{timestamp}.joblib")
         
+        # Keep instructions/ingredient text in a compressed file next to the model
+        chef.recipes.externalize(filename[:-len(".joblib")] + ".rtext")
+        if quantization:
+            dtype, scale = parse_quantization(quantization)
+            chef.quantize(dtype=dtype, scale=scale)
+        
         # Save the chef object
         joblib.dump(chef, filename)
         print(f"Saved {chef.name} to {filename}")
@@ -211,6 +229,8 @@ def main():
     OUTPUT_DIR = "trained_models"  # This will be relative to app/models/
     NUM_CHEFS = 5
     RECIPES_PER_CHEF = 10000  # Number of recipes per chef
+    QUANTIZATION = None  # e.g. "uint8" to save quantized TF-IDF weights
+    CHEF_MODE = "tfidf"  # or "hashing" for HashingChef models without a stored vocabulary
     sample_size = RECIPES_PER_CHEF * NUM_CHEFS
     
     try:
@@ -218,10 +238,11 @@ def main():
         df = load_and_preprocess_data(DATA_FILE, sample_size=sample_size)
         
         # Create and train chefs
-        chefs = create_chefs(df, num_chefs=NUM_CHEFS, recipes_per_chef=RECIPES_PER_CHEF)
+        chefs = create_chefs(df, num_chefs=NUM_CHEFS, recipes_per_chef=RECIPES_PER_CHEF, mode=CHEF_MODE)
         
         # Save the trained models
-        save_chefs(chefs, output_dir=OUTPUT_DIR, recipes_per_chef=RECIPES_PER_CHEF)
+        save_chefs(chefs, output_dir=OUTPUT_DIR, recipes_per_chef=RECIPES_PER_CHEF,
+                   quantization=QUANTIZATION)
         
         print("\nTraining completed successfully!")
         
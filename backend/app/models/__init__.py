@@ -1,5 +1,7 @@
 from .base import BaseModel
 from .recipe import Recipe
+from .recipe_store import RecipeStore
 from .chef import Chef
+from .hashing import HashingChef
 
-__all__ = ["BaseModel", "Recipe", "Chef"]
+__all__ = ["BaseModel", "Recipe", "RecipeStore", "Chef", "HashingChef"]
@@ -3,6 +3,15 @@ from typing import Dict, Any
 class BaseModel:
     """Base model class for our in-memory models"""
     
+    # Empty so subclasses can use __slots__; subclasses without them still get a __dict__
+    __slots__ = ()
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert model to dictionary"""
-        return {k: v for k, v in self.__dict__.items() if not k.startswith('_')}
+        fields = {}
+        for cls in reversed(type(self).__mro__):
+            for name in getattr(cls, "__slots__", ()):
+                if hasattr(self, name):
+                    fields[name] = getattr(self, name)
+        fields.update(getattr(self, "__dict__", {}))
+        return {k: v for k, v in fields.items() if not k.startswith('_')}
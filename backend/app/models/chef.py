@@ -1,11 +1,46 @@
-from typing import List, Dict, Any, Optional
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import copy
+from typing import List, Dict, Any, Optional, Union
 import numpy as np
 import logging
+from .ingredients import normalize_ingredient
 from .recipe import Recipe
+from .kernels import csc_postings, fused_top_k, gather_postings
+from .quantized import QuantizedMatrix
+from .query_encoder import QueryEncoder, shared_encoder
+from .recipe_store import RecipeStore
+from .vocabulary import CompactVocabulary
+from app.core import timing
+from app.core import memory
 import json
-import ast
+
+logger = logging.getLogger(__name__)
+
+
+def preprocess_ingredients(ing):
+    if not ing or not isinstance(ing, str):
+        return ""
+    # If it's a JSON string, parse it first
+    if (ing.startswith('[') and ing.endswith(']')) or (ing.startswith('{') and ing.endswith('}')):
+        try:
+            ings = json.loads(ing)
+            if isinstance(ings, dict):
+                ings = list(ings.values())
+            return ' '.join(str(i).strip() for i in ings if str(i).strip())
+        except json.JSONDecodeError as e:
+            # For JSON decode errors, log and return the original string
+            logger.warning("Failed to parse JSON ingredients: %s. Error: %s", ing, e)
+            return ing
+        except Exception as e:
+            # For any other unexpected errors, log and return empty string
+            logger.error("Unexpected error processing ingredients: %s", ing, exc_info=True)
+            return ""
+    return ing
+
+
+def ingredient_documents(recipes) -> List[str]:
+    """The text vectorized for each recipe: its preprocessed ingredients ("" without any)."""
+    return [preprocess_ingredients(recipe.ingredients) if hasattr(recipe, 'ingredients') else ""
+            for recipe in recipes]
 
 
 class Chef:
@@ -14,194 +49,510 @@ class Chef:
     Each Chef can have a cuisine specialization and provides recipe recommendations.
     """
 
+    # Cosine scoring implementations selectable per call; "exact" is the reference.
+    # "quantized" needs a chef converted with quantize(), which then always uses it.
+    # "fused" scores and selects the top-k from the query's posting lists only.
+    # "two_stage" picks candidates from the ingredient postings, then scores only those
+    ENGINES = ("exact", "sparse", "quantized", "fused", "two_stage")
+    # Two-stage candidates per requested result at cosine_weight=0; divided by
+    # the overlap weight (1 - cosine_weight), as overlap counts predict less of
+    # the ranking the more cosine similarity counts
+    TWO_STAGE_CANDIDATES = 20
+    # (vectorizer it was built from, encoder or None); not pickled, see query_encoder()
+    _query_encoder = (None, None)
+    # add_recipes() refreshes the IDF once the rows added since the last refresh
+    # exceed this fraction of the matrix
+    IDF_REFRESH_FRACTION = 0.05
+    # Incremental ingestion state (see add_recipes); class defaults so older pickles load
+    document_frequency: Optional[np.ndarray] = None
+    stale_rows = 0
+
     def __init__(self, name: str, cuisine: Optional[str] = None):
         self.name = name
         self.cuisine = cuisine
+        # Imported here, not at module level: loading trained chefs imports it anyway, but
+        # modules that only import Chef (tests, tooling) don't pay for it
+        from sklearn.feature_extraction.text import TfidfVectorizer
         self.vectorizer = TfidfVectorizer(
             stop_words="english",
             ngram_range=(1, 2),  # Consider both single words and bigrams
             min_df=1,  # Ignore terms that appear in fewer than 2 documents
             max_df=0.8,  # Ignore terms that appear in more than 80% of documents
         )
-        self.recipes: List[Recipe] = []
+        self.recipes: Union[RecipeStore, List[Recipe]] = []
         self.tfidf_matrix = None
 
     def train(self, recipes: List[Recipe]):
         """Train the chef's TF-IDF model on the given recipes"""
-        self.recipes = recipes
-
-        def preprocess_ingredients(ing):
-            if not ing or not isinstance(ing, str):
-                return ""
-            # If it's a JSON string, parse it first
-            if (ing.startswith('[') and ing.endswith(']')) or (ing.startswith('{') and ing.endswith('}')):
-                try:
-                    ings = json.loads(ing)
-                    if isinstance(ings, dict):
-                        ings = list(ings.values())
-                    return ' '.join(str(i).strip() for i in ings if str(i).strip())
-                except json.JSONDecodeError as e:
-                    # For JSON decode errors, log and return the original string
-                    logging.warning(f"Failed to parse JSON ingredients: {ing}. Error: {e}")
-                    return ing
-                except Exception as e:
-                    # For any other unexpected errors, log and return empty string
-                    logging.error(f"Unexpected error processing ingredients: {ing}", exc_info=True)
-                    return ""
-            return ing
-
-        # Preprocess ingredients before vectorization
-        ingredients_list = []
-        for recipe in recipes:
-            if hasattr(recipe, 'ingredients'):
-                processed = preprocess_ingredients(recipe.ingredients)
-                ingredients_list.append(processed)
-            else:
-                ingredients_list.append("")  # Empty string if no ingredients
+        self.recipes = RecipeStore.from_recipes(recipes)
 
         # Fit and transform the ingredients
-        self.tfidf_matrix = self.vectorizer.fit_transform(ingredients_list)
+        self.tfidf_matrix = self.vectorizer.fit_transform(ingredient_documents(recipes))
+        self.document_frequency = None
+        self.stale_rows = 0
+        self.compact_vocabulary()
+        self._query_encoder = (None, None)
+        self.query_encoder()
 
-    def get_recommendations(
-        self, ingredients: List[str], top_n: int = 5, cosine_weight: float = 0.7
-    ) -> List[Dict[str, Any]]:
+    def compact_vocabulary(self) -> "Chef":
+        """Replace the vectorizer's vocabulary dict with a CompactVocabulary (same mapping)."""
+        vocabulary = getattr(self.vectorizer, "vocabulary_", None)
+        if isinstance(vocabulary, dict):
+            self.vectorizer.vocabulary_ = CompactVocabulary.from_dict(vocabulary)
+            self._query_encoder = (None, None)
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Rebuilt (and shared between chefs) after loading
+        state.pop("_query_encoder", None)
+        return state
+
+    def query_encoder(self) -> Optional[QueryEncoder]:
         """
-        Get recipe recommendations based on available ingredients using hybrid scoring.
+        The precompiled encoder for this chef's vectorizer, built on first use
+        and shared with chefs whose vocabulary and IDF are identical; None when
+        the vectorizer can't be precompiled and ``transform`` is used instead.
+        """
+        source, encoder = self._query_encoder
+        if source is not self.vectorizer:
+            encoder = shared_encoder(self.vectorizer)
+            if encoder is not None:
+                # Identical vocabularies are kept once
+                self.vectorizer.vocabulary_ = encoder.vocabulary
+            self._query_encoder = (self.vectorizer, encoder)
+        return encoder
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Report the bytes held by this chef, broken down by component.
         
-        Args:
-            ingredients: List of available ingredients
-            top_n: Number of top recommendations to return
-            cosine_weight: Weight for TF-IDF cosine similarity (1.0 = pure TF-IDF, 0.0 = pure overlap)
-            
         Returns:
-            List of recipe dictionaries with hybrid similarity scores
+            Dictionary of byte counts for the TF-IDF CSR arrays, the vectorizer's
+            vocabulary, IDF and stop word set, the recipes (RecipeStore arrays and
+            text buffer, or Recipe objects and their strings), plus a "total" entry.
         """
-        if self.tfidf_matrix is None or len(self.recipes) == 0:
-            return []
+        seen = set()
+        matrix = self.tfidf_matrix
+        vectorizer = self.vectorizer
+        if isinstance(matrix, QuantizedMatrix):
+            matrix_usage = matrix.memory_usage()
+        else:
+            matrix_usage = {part: memory.sizeof_array(getattr(matrix, part, None))
+                            for part in ("data", "indices", "indptr")}
+        report = {
+            "tfidf_data": matrix_usage["data"],
+            "tfidf_indices": matrix_usage["indices"],
+            "tfidf_indptr": matrix_usage["indptr"],
+            "vocabulary": self._vocabulary_bytes(seen),
+            "idf": memory.sizeof_array(getattr(vectorizer, "idf_", None)),
+            "stop_words": memory.sizeof_collection(getattr(vectorizer, "stop_words_", None), seen),
+            "recipe_objects": 0,
+            "recipe_strings": 0,
+        }
+        if isinstance(self.recipes, RecipeStore):
+            store_usage = self.recipes.memory_usage()
+            report["recipe_objects"] = store_usage["arrays"]
+            report["recipe_strings"] = store_usage["text"]
+            report["total"] = sum(report.values())
+            return report
+        recipes = self.recipes or []
+        report["recipe_objects"] += memory.sizeof_object(recipes, seen)
+        for recipe in recipes:
+            report["recipe_objects"] += memory.sizeof_object(recipe, seen)
+            attributes = getattr(recipe, "__dict__", None)
+            if attributes is not None:
+                report["recipe_objects"] += memory.sizeof_object(attributes, seen)
+                values = list(attributes.values())
+            else:  # __slots__ (Recipe)
+                values = [getattr(recipe, name, None) for name in getattr(type(recipe), "__slots__", ())]
+            report["recipe_strings"] += memory.sizeof_strings(values, seen)
+            report["recipe_objects"] += sum(
+                memory.sizeof_object(v, seen) for v in values if not isinstance(v, str)
+            )
+        report["total"] = sum(report.values())
+        return report
 
-        # Convert query ingredients to a set of normalized strings
-        def normalize_ingredient(ing: str) -> str:
-            # Basic normalization: lowercase and remove extra whitespace
-            return ' '.join(ing.lower().strip().split())
-        
-        query_ingredients = {normalize_ingredient(ing) for ing in ingredients if ing.strip()}
-        
-        # Pre-process recipe ingredients
-        def parse_NER_ingredients(ing_str: str) -> set:
-            if not ing_str or not isinstance(ing_str, str):
-                return set()
-                
-            # Clean the string
-            ing_str = ing_str.strip()
-            
-            # Handle empty string
-            if not ing_str:
-                return set()
-                
-            # Try to handle JSON format if it looks like JSON
-            if (ing_str.startswith('[') and ing_str.endswith(']')) or \
-               (ing_str.startswith('{') and ing_str.endswith('}')):
-                try:
-                    # First try with json.loads
-                    try:
-                        ings = json.loads(ing_str)
-                    except json.JSONDecodeError:
-                        # If that fails, try with ast.literal_eval which is more lenient
-                        ings = ast.literal_eval(ing_str)
-                    
-                    # Handle different JSON structures
-                    if isinstance(ings, dict):
-                        ings = list(ings.values())
-                    elif not isinstance(ings, list):
-                        ings = [ings]
-                        
-                    return {normalize_ingredient(str(ing)) for ing in ings if str(ing).strip()}
-                except Exception as e:
-                    print(f"Error parsing ingredients: {e}")
-                    # If JSON parsing fails, fall through to string processing
-                    pass
-            
-            # Handle string that might be a list representation
-            if ing_str.startswith('[') and ing_str.endswith(']'):
-                # Remove brackets and split by comma that's not inside quotes
-                content = ing_str[1:-1]
-                # Split by comma but ignore those inside quotes
-                ings = []
-                current = ""
-                in_quotes = False
-                for char in content:
-                    if char == '"' or char == "'":
-                        in_quotes = not in_quotes
-                        current += char
-                    elif char == ',' and not in_quotes:
-                        ings.append(current.strip())
-                        current = ""
-                    else:
-                        current += char
-                if current:
-                    ings.append(current.strip())
-                return {normalize_ingredient(ing.strip(" \"'")) for ing in ings if ing.strip()}
-            
-            # Fall back to simple comma separation (handle cases with quotes)
-            ings = []
-            current = ""
-            in_quotes = False
-            for char in ing_str:
-                if char == '"' or char == "'":
-                    in_quotes = not in_quotes
-                    current += char
-                elif char == ',' and not in_quotes:
-                    ings.append(current.strip())
-                    current = ""
-                else:
-                    current += char
-            if current:
-                ings.append(current.strip())
-                
-            return {normalize_ingredient(ing.strip(" \"'")) for ing in ings if ing.strip()}
-        
-        # Get recipe ingredients as sets for overlap calculation
-        recipe_ingredients_list = [parse_NER_ingredients(recipe.NER_ingredients) for recipe in self.recipes]
-        
-        # Calculate overlap scores
-        overlap_scores = np.array([
-            len(query_ingredients & ing_set) / len(ing_set) if ing_set else 0
-            for ing_set in recipe_ingredients_list
-        ])
-        
-        # Debug: Print some overlap scores for inspection
-        if len(overlap_scores) > 0:
-            print(f"Overlap scores - Min: {overlap_scores.min():.2f}, Max: {overlap_scores.max():.2f}, Mean: {overlap_scores.mean():.2f}")
+    def _vocabulary_bytes(self, seen: set) -> int:
+        vocabulary = getattr(self.vectorizer, "vocabulary_", None)
+        if isinstance(vocabulary, CompactVocabulary):
+            return vocabulary.memory_usage()
+        return memory.sizeof_dict(vocabulary, seen)
 
-        # Preprocess query ingredients the same way as training data
-        def preprocess_query_ingredients(ingredients):
-            return ' '.join(str(ing).strip() for ing in ingredients if str(ing).strip())
+    def column_major(self) -> "Chef":
+        """
+        Keep the TF-IDF matrix column-major (CSC), so the "fused" engine reads
+        only the query terms' postings; the other engines accept CSC as well,
+        though "sparse" is fastest on the row-major (CSR) matrix training produces.
+        Convert at load time, not while serving: queries never change the matrix.
+        """
+        matrix = self.tfidf_matrix
+        if matrix is not None and not isinstance(matrix, QuantizedMatrix) and matrix.format != "csc":
+            self.tfidf_matrix = matrix.tocsc()
+        return self
+
+    def to_float32(self) -> "Chef":
+        """
+        Keep the TF-IDF matrix and IDF weights in float32, halving their memory.
+
+        Queries are then encoded in float32 as well, and the "sparse" engine
+        scores them with a single float32 mat-vec. Scores stay within ~1e-6 of
+        the float64 model.
+        """
+        if hasattr(self.tfidf_matrix, "astype"):
+            self.tfidf_matrix = self.tfidf_matrix.astype(np.float32).tocsr()
+        idf = getattr(self.vectorizer, "idf_", None)
+        if idf is not None:
+            self.vectorizer.idf_ = np.asarray(idf, dtype=np.float32)
+        self.vectorizer.dtype = np.float32
+        self._query_encoder = (None, None)
+        return self
+
+    def quantize(self, dtype: str = "uint8", scale: str = "term") -> "Chef":
+        """
+        Replace the TF-IDF matrix with a :class:`QuantizedMatrix` of ``dtype``
+        ("uint8" with a float32 scale per ``scale`` = "term" or "row", or "float16").
+
+        uint8 weights take a quarter of the float32 bytes (plus 4 bytes per
+        term or row); scores are computed from the quantized postings of the
+        query terms, whatever the requested engine. Rankings drift slightly
+        from the exact model; measure it with ``benchmarks/eval_modes.py``.
+        """
+        if self.tfidf_matrix is not None and not isinstance(self.tfidf_matrix, QuantizedMatrix):
+            self.tfidf_matrix = QuantizedMatrix.from_sparse(self.tfidf_matrix, dtype=dtype, scale=scale)
+        # Queries only need float32 to match the quantized weights
+        idf = getattr(self.vectorizer, "idf_", None)
+        if idf is not None:
+            self.vectorizer.idf_ = np.asarray(idf, dtype=np.float32)
+        self.vectorizer.dtype = np.float32
+        self._query_encoder = (None, None)
+        return self
+
+    def _counts(self, documents: List[str]):
+        """Term counts of ``documents`` over the fitted features (CSR)."""
+        from sklearn.feature_extraction.text import CountVectorizer
+        # The vocabulary is fixed, so terms the chef wasn't trained on are ignored
+        return CountVectorizer.transform(self.vectorizer, documents)
+
+    def _document_frequencies(self) -> np.ndarray:
+        """Documents containing each feature, from the matrix the first time."""
+        if self.document_frequency is None:
+            matrix = self.tfidf_matrix
+            if matrix.format == "csc":
+                self.document_frequency = np.diff(matrix.indptr).astype(np.int64)
+            else:
+                self.document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1]).astype(np.int64)
+        return self.document_frequency
+
+    def _fresh_idf(self, document_frequency: np.ndarray, n_documents: int) -> np.ndarray:
+        # TfidfTransformer's smoothed IDF
+        return np.log((1 + n_documents) / (1 + document_frequency)) + 1
+
+    def add_recipes(self, recipes: List[Recipe], refresh_idf: Optional[bool] = None) -> "Chef":
+        """
+        Append ``recipes`` without refitting: only the new recipes are tokenized,
+        weighted with the current IDF and added as rows of the matrix and the
+        recipe store, and the document frequencies are updated with them.
+
+        The vocabulary stays as trained (new terms are ignored until the next
+        ``train``). The IDF is refreshed when ``refresh_idf`` is True, or when
+        None once the rows added since the last refresh exceed
+        ``IDF_REFRESH_FRACTION`` of the matrix; see :meth:`refresh_idf`.
+
+        The chef's arrays are replaced rather than modified, so a copy
+        (``copy.copy(chef)``) can be updated while the original keeps serving.
+        """
+        recipes = list(recipes)
+        if isinstance(self.tfidf_matrix, QuantizedMatrix):
+            raise ValueError("A quantized chef can't be extended; add recipes before Chef.quantize()")
+        if self.tfidf_matrix is None:
+            self.train(recipes)
+            return self
+        if not recipes:
+            return self
+        from scipy import sparse
+
+        counts = self._counts(ingredient_documents(recipes))
+        previous = self._document_frequencies()
+        self.document_frequency = previous + np.bincount(counts.indices, minlength=counts.shape[1])
+        # Features first seen now (hashed buckets; a fixed vocabulary has none)
+        # have no IDF yet; give them one so the new rows keep those terms
+        unseen = np.flatnonzero((previous == 0) & (self.document_frequency > 0))
+        if len(unseen):
+            idf = np.array(self.vectorizer.idf_)
+            fresh = self._fresh_idf(self.document_frequency, self.tfidf_matrix.shape[0] + len(recipes))
+            idf[unseen] = fresh[unseen]
+            self.vectorizer = copy.deepcopy(self.vectorizer)
+            self.vectorizer.idf_ = idf
+            self._query_encoder = (None, None)
+        rows = self._weigh(counts)
+        matrix = self.tfidf_matrix
+        self.tfidf_matrix = sparse.vstack([matrix, rows.astype(matrix.dtype)], format=matrix.format)
+        self.recipes = self._recipe_store().append(recipes)
+        self.stale_rows += len(recipes)
+
+        if refresh_idf is None:
+            refresh_idf = self.stale_rows > self.IDF_REFRESH_FRACTION * self.tfidf_matrix.shape[0]
+        if refresh_idf:
+            self.refresh_idf()
+        return self
+
+    def _weigh(self, counts):
+        from sklearn.preprocessing import normalize
+        counts = counts.astype(np.float64)
+        counts.data *= np.asarray(self.vectorizer.idf_, dtype=np.float64)[counts.indices]
+        counts.eliminate_zeros()
+        return normalize(counts, norm="l2", copy=False)
+
+    def refresh_idf(self) -> "Chef":
+        """
+        Recompute the IDF from the current document frequencies and reweight
+        the matrix to it: each column is scaled by its new/old IDF ratio and
+        each row renormalized, which equals weighting the counts with the new
+        IDF, without tokenizing any recipe again.
+        """
+        matrix = self.tfidf_matrix
+        if matrix is None or isinstance(matrix, QuantizedMatrix):
+            return self
+        idf = np.asarray(self.vectorizer.idf_)
+        new_idf = self._fresh_idf(self._document_frequencies(), matrix.shape[0])
+        ratio = np.zeros_like(new_idf)
+        np.divide(new_idf, idf, out=ratio, where=idf > 0)
+
+        matrix = matrix.copy()
+        lengths = np.diff(matrix.indptr)
+        if matrix.format == "csc":
+            rows, columns = matrix.indices, np.repeat(np.arange(matrix.shape[1]), lengths)
+        else:
+            rows, columns = np.repeat(np.arange(matrix.shape[0]), lengths), matrix.indices
+        data = matrix.data.astype(np.float64) * ratio[columns]
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=matrix.shape[0]))
+        data /= np.where(norms > 0, norms, 1)[rows]
+        matrix.data = data.astype(matrix.dtype)
+        matrix.eliminate_zeros()
+
+        # A new vectorizer: the old one (and its encoder) may still be serving
+        vectorizer = copy.deepcopy(self.vectorizer)
+        vectorizer.idf_ = new_idf.astype(idf.dtype)
+        self.vectorizer = vectorizer
+        self.tfidf_matrix = matrix
+        self._query_encoder = (None, None)
+        self.stale_rows = 0
+        return self
+
+    def _recipe_store(self) -> RecipeStore:
+        """The recipes as a RecipeStore; plain lists (e.g. older pickles) are converted once."""
+        if not isinstance(self.recipes, RecipeStore):
+            self.recipes = RecipeStore.from_recipes(self.recipes)
+        return self.recipes
+
+    def _cosine_scores(self, query_vector, engine: str) -> np.ndarray:
+        """Cosine similarity between the query and every recipe using ``engine``."""
+        if isinstance(self.tfidf_matrix, QuantizedMatrix):
+            return self.tfidf_matrix.dot(query_vector.indices, query_vector.data)
+        if engine == "sparse":
+            # TfidfVectorizer L2-normalizes rows, so cosine similarity is one CSR
+            # mat-vec against the dense query, in the matrix's dtype, without
+            # cosine_similarity's validation and re-normalization passes
+            query = np.zeros(self.tfidf_matrix.shape[1], dtype=self.tfidf_matrix.dtype)
+            query[query_vector.indices] = query_vector.data
+            return self.tfidf_matrix @ query
+        # sklearn.metrics pulls in a large part of scipy; only load it when used
+        from sklearn.metrics.pairwise import cosine_similarity
+        return cosine_similarity(query_vector, self.tfidf_matrix).flatten()
+
+    def _encode_query(self, query_text: str):
+        encoder = self.query_encoder()
+        if encoder is not None:
+            return encoder.encode(query_text)
+        return self.vectorizer.transform([query_text])
+
+    def _dense_top_k(self, recipes: RecipeStore, query_ingredients, query_text: str,
+                     cosine_weight: float, top_n: int, engine: str, timer):
+        """Score every recipe with ``engine``; (row, hybrid, cosine, overlap) of the top ``top_n``."""
+        # Overlap with each recipe's pre-parsed NER ingredients
+        overlap_scores = recipes.overlap_scores(query_ingredients)
         
+        # Debug: log overlap score statistics (only computed when DEBUG is enabled)
+        if len(overlap_scores) > 0 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Overlap scores - Min: %.2f, Max: %.2f, Mean: %.2f",
+                overlap_scores.min(), overlap_scores.max(), overlap_scores.mean(),
+                extra={"chef": self.name}
+            )
+        timer.mark("overlap")
+
         # Calculate TF-IDF cosine similarity
-        query_text = preprocess_query_ingredients(query_ingredients)
         try:
-            query_vector = self.vectorizer.transform([query_text])
-            cosine_scores = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
+            query_vector = self._encode_query(query_text)
+            timer.mark("transform")
+            cosine_scores = self._cosine_scores(query_vector, engine)
+            timer.mark("cosine")
             
             # Don't normalize cosine scores as they're already in 0-1 range
             # This prevents all scores from being 100% when there's only one result
             # or when all results have the same score
             
         except Exception as e:
-            print(f"Error in TF-IDF transformation: {e}")
-            cosine_scores = np.zeros(len(self.recipes))
+            logger.warning("Error in TF-IDF transformation: %s", e, extra={"chef": self.name})
+            cosine_scores = np.zeros(len(recipes))
+            timer.mark("cosine")
         
         # Calculate hybrid scores
         hybrid_scores = (cosine_weight * cosine_scores) + ((1 - cosine_weight) * overlap_scores)
         
         # Get top N recommendations based on hybrid scores
         top_indices = np.argsort(hybrid_scores)[::-1][:top_n]
+        timer.mark("topk")
+        return [(idx, hybrid_scores[idx], cosine_scores[idx], overlap_scores[idx]) for idx in top_indices]
+
+    def _term_postings(self, query_vector):
+        """Rows and query-weighted TF-IDF values of the query terms' postings."""
+        matrix = self.tfidf_matrix
+        if isinstance(matrix, QuantizedMatrix):
+            return matrix.postings(query_vector.indices, query_vector.data)
+        if matrix.format != "csc":
+            # Row-major model (see column_major()): extract just the query's
+            # columns, a pass over the matrix, without changing the model
+            columns = matrix[:, query_vector.indices].tocsc()
+            return csc_postings(columns, np.arange(len(query_vector.indices)), query_vector.data)
+        return csc_postings(matrix, query_vector.indices, query_vector.data)
+
+    def _fused_top_k(self, recipes: RecipeStore, query_ingredients, query_text: str,
+                     cosine_weight: float, top_n: int, timer):
+        """Like _dense_top_k, from the query's term and ingredient postings only."""
+        ner_offsets, ner_rows = recipes.ner_postings()
+        positions, _ = gather_postings(ner_offsets, recipes.query_ingredient_ids(query_ingredients))
+        overlap_rows = ner_rows[positions]
+        timer.mark("overlap")
+        try:
+            query_vector = self._encode_query(query_text)
+            timer.mark("transform")
+            cosine_rows, cosine_values = self._term_postings(query_vector)
+        except Exception as e:
+            logger.warning("Error in TF-IDF transformation: %s", e, extra={"chef": self.name})
+            cosine_rows, cosine_values = np.empty(0, dtype=np.int32), np.empty(0)
+        timer.mark("cosine")
+        top = fused_top_k(cosine_rows, cosine_values, overlap_rows, recipes.ner_offsets, cosine_weight, top_n)
+        timer.mark("topk")
+        return zip(*top)
+
+    def candidate_count(self, top_n: int, cosine_weight: float) -> int:
+        """Adaptive number of two-stage candidates for ``top_n`` results."""
+        return int(np.ceil(top_n * self.TWO_STAGE_CANDIDATES / max(1 - cosine_weight, 0.05)))
+
+    def _candidate_budget(self, candidates: Optional[int], top_n: int, cosine_weight: float) -> int:
+        if candidates is None:
+            return self.candidate_count(top_n, cosine_weight)
+        if candidates < 1:
+            raise ValueError(f"candidates must be at least 1, got {candidates}")
+        return candidates
+
+    def _stage_one(self, recipes: RecipeStore, query_ingredients, candidates: int):
+        """
+        Up to ``candidates`` rows with the highest share of their NER
+        ingredients in the query (ties: more matched, then higher rows), in
+        row order, with their matched counts. Only the query's postings are read.
+        """
+        ner_offsets, ner_rows = recipes.ner_postings()
+        positions, _ = gather_postings(ner_offsets, recipes.query_ingredient_ids(query_ingredients))
+        rows, counts = np.unique(ner_rows[positions], return_counts=True)
+        if len(rows) > candidates:
+            sizes = recipes.ner_offsets[rows + 1] - recipes.ner_offsets[rows]
+            keep = np.sort(np.lexsort((-rows, -counts, -(counts / sizes)))[:candidates])
+            rows, counts = rows[keep], counts[keep]
+        return rows, counts
+
+    def stage_one(self, ingredients: List[str], top_n: int = 5, cosine_weight: float = 0.7,
+                  candidates: Optional[int] = None) -> np.ndarray:
+        """Rows the "two_stage" engine would re-rank for this request."""
+        candidates = self._candidate_budget(candidates, top_n, cosine_weight)
+        query_ingredients = {normalize_ingredient(ing) for ing in ingredients if ing.strip()}
+        return self._stage_one(self._recipe_store(), query_ingredients, candidates)[0]
+
+    def _candidate_cosine(self, query_vector, rows: np.ndarray) -> np.ndarray:
+        """Exact cosine similarity of the query with the given (sorted) rows only."""
+        matrix = self.tfidf_matrix
+        if isinstance(matrix, QuantizedMatrix) or matrix.format == "csc":
+            # Column-major: sum the query terms' postings that fall on the candidates
+            posting_rows, values = self._term_postings(query_vector)
+            slots = np.searchsorted(rows, posting_rows)
+            hit = slots < len(rows)
+            hit[hit] = rows[slots[hit]] == posting_rows[hit]
+            return np.bincount(slots[hit], weights=values[hit], minlength=len(rows))
+        return np.asarray((matrix[rows] @ query_vector.T).todense(), dtype=np.float64).ravel()
+
+    def _two_stage_top_k(self, recipes: RecipeStore, query_ingredients, query_text: str,
+                         cosine_weight: float, top_n: int, candidates: int, timer):
+        """Like _dense_top_k, scoring only the stage-one candidates."""
+        rows, counts = self._stage_one(recipes, query_ingredients, candidates)
+        sizes = recipes.ner_offsets[rows + 1] - recipes.ner_offsets[rows]
+        overlap_scores = counts / sizes
+        timer.mark("overlap")
+        try:
+            query_vector = self._encode_query(query_text)
+            timer.mark("transform")
+            cosine_scores = self._candidate_cosine(query_vector, rows)
+        except Exception as e:
+            logger.warning("Error in TF-IDF transformation: %s", e, extra={"chef": self.name})
+            cosine_scores = np.zeros(len(rows))
+        timer.mark("cosine")
+        hybrid_scores = (cosine_weight * cosine_scores) + ((1 - cosine_weight) * overlap_scores)
+        # Highest score first, then highest row (as the dense path's reversed argsort)
+        top = np.lexsort((-rows, -hybrid_scores))[:top_n]
+        timer.mark("topk")
+        return zip(rows[top], hybrid_scores[top], cosine_scores[top], overlap_scores[top])
+
+    def get_recommendations(
+        self, ingredients: List[str], top_n: int = 5, cosine_weight: float = 0.7,
+        engine: str = "exact", candidates: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get recipe recommendations based on available ingredients using hybrid scoring.
+        
+        Args:
+            ingredients: List of available ingredients
+            top_n: Number of top recommendations to return
+            cosine_weight: Weight for TF-IDF cosine similarity (1.0 = pure TF-IDF, 0.0 = pure overlap)
+            engine: Cosine scoring implementation, one of ``Chef.ENGINES``
+            candidates: Rows the "two_stage" engine re-ranks (default: adaptive,
+                see ``candidate_count``); recipes sharing no ingredient with the
+                query are never candidates
+            
+        Returns:
+            List of recipe dictionaries with hybrid similarity scores
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown scoring engine: {engine}")
+        if engine == "quantized" and not isinstance(self.tfidf_matrix, QuantizedMatrix):
+            raise ValueError("The quantized engine needs a chef converted with Chef.quantize()")
+        if engine == "two_stage":
+            candidates = self._candidate_budget(candidates, top_n, cosine_weight)
+        if self.tfidf_matrix is None or len(self.recipes) == 0:
+            return []
+
+        timer = timing.start()
+
+        # Convert query ingredients to a set of normalized strings
+        query_ingredients = {normalize_ingredient(ing) for ing in ingredients if ing.strip()}
+        timer.mark("normalize")
         
-        # Prepare results
+        recipes = self._recipe_store()
+        # Preprocess query ingredients the same way as training data
+        query_text = ' '.join(str(ing).strip() for ing in query_ingredients if str(ing).strip())
+        if engine == "fused":
+            top = self._fused_top_k(recipes, query_ingredients, query_text, cosine_weight, top_n, timer)
+        elif engine == "two_stage":
+            top = self._two_stage_top_k(recipes, query_ingredients, query_text, cosine_weight, top_n,
+                                        candidates, timer)
+        else:
+            top = self._dense_top_k(recipes, query_ingredients, query_text, cosine_weight, top_n, engine, timer)
+
+        # Prepare results; only these rows are decoded from the store
         results = []
-        for idx in top_indices:
-            if hybrid_scores[idx] > 0:  # Only include recipes with some similarity
-                recipe = self.recipes[idx]
+        for idx, hybrid_score, cosine_score, overlap_score in top:
+            if hybrid_score > 0:  # Only include recipes with some similarity
+                recipe = recipes[idx]
                 
                 # Add recipe to results with detailed scoring information
                 recipe_dict = {
@@ -210,10 +561,10 @@ class Chef:
                     "ingredients": recipe.ingredients,
                     "NER_ingredients": recipe.NER_ingredients,
                     "instructions": recipe.instructions,
-                    "similarity_score": float(hybrid_scores[idx]),
+                    "similarity_score": float(hybrid_score),
                     "score_components": {
-                        "cosine_score": float(cosine_scores[idx]),
-                        "overlap_score": float(overlap_scores[idx]),
+                        "cosine_score": float(cosine_score),
+                        "overlap_score": float(overlap_score),
                         "cosine_weight": cosine_weight,
                         "overlap_weight": 1 - cosine_weight
                     },
@@ -224,5 +575,6 @@ class Chef:
                     
                 results.append(recipe_dict)
 
+        timer.mark("results")
         return results
 
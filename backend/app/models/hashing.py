@@ -0,0 +1,134 @@
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from .chef import Chef
+
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF over a fixed-size hashed feature space: no vocabulary is stored.
+
+    Terms (unigrams and bigrams, English stop words removed, like Chef's
+    TfidfVectorizer) are hashed into ``n_features`` buckets by sklearn's
+    HashingVectorizer; the only fitted state is the document frequency of each
+    bucket, from which the IDF is derived with TfidfTransformer's smoothed
+    formula. Buckets in no document or in more than ``max_df`` of them get no
+    weight, as TfidfVectorizer ignores unknown terms and drops frequent ones.
+
+    Hashing is stateless, so documents can be fitted in chunks
+    (:meth:`partial_fit`) without holding the corpus or a vocabulary in memory.
+    Distinct terms can share a bucket; ``benchmarks/eval_modes.py`` measures
+    the effect on rankings.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, max_df: float = 0.8, dtype=np.float64):
+        # Imported here, like Chef's vectorizer, so importing the module stays cheap
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self.n_features = n_features
+        self.max_df = max_df
+        self.dtype = dtype
+        self.hasher = HashingVectorizer(
+            n_features=n_features, stop_words="english", ngram_range=(1, 2),
+            alternate_sign=False, norm=None, dtype=np.float64,
+        )
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+        self.idf_: Optional[np.ndarray] = None
+
+    def _counts(self, documents: List[str]):
+        return self.hasher.transform(documents).tocsr()
+
+    def partial_fit(self, documents: Iterable[str]) -> "HashingTfidfVectorizer":
+        """Add ``documents`` to the document frequencies and refresh the IDF."""
+        documents = list(documents)
+        counts = self._counts(documents)
+        self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_documents += len(documents)
+        self._refresh_idf()
+        return self
+
+    def _refresh_idf(self) -> None:
+        df = self.document_frequency
+        idf = np.log((1 + self.n_documents) / (1 + df)) + 1
+        # Unseen buckets get no weight, as TfidfVectorizer ignores out-of-vocabulary terms
+        idf[(df == 0) | (df > self.max_df * self.n_documents)] = 0
+        self.idf_ = idf.astype(self.dtype)
+
+    def _weight(self, counts):
+        from sklearn.preprocessing import normalize
+        counts = counts.astype(self.dtype)
+        counts.data *= self.idf_[counts.indices]
+        counts.eliminate_zeros()
+        return normalize(counts, norm="l2", copy=False)
+
+    def fit_transform(self, documents: Iterable[str], chunk_size: int = 10_000):
+        """Fit on ``documents`` (hashed ``chunk_size`` at a time) and return their TF-IDF rows."""
+        from scipy import sparse
+        self.document_frequency[:] = 0
+        self.n_documents = 0
+        chunks, batch = [], []
+        for document in documents:
+            batch.append(document)
+            if len(batch) == chunk_size:
+                chunks.append(self._counts(batch))
+                batch = []
+        if batch or not chunks:
+            chunks.append(self._counts(batch))
+        for counts in chunks:
+            self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+            self.n_documents += counts.shape[0]
+        self._refresh_idf()
+        return self._weight(sparse.vstack(chunks, format="csr"))
+
+    def transform(self, documents: List[str]):
+        return self._weight(self._counts(list(documents)))
+
+    def collision_rate(self, terms: Iterable[str]) -> float:
+        """Fraction of ``terms`` (e.g. a TfidfVectorizer vocabulary) sharing a bucket with another term."""
+        from sklearn.utils import murmurhash3_32
+        buckets = np.fromiter((abs(murmurhash3_32(term, seed=0)) % self.n_features for term in terms),
+                              dtype=np.int64)
+        if not len(buckets):
+            return 0.0
+        _, inverse, counts = np.unique(buckets, return_inverse=True, return_counts=True)
+        return float((counts[inverse] > 1).mean())
+
+
+class HashingChef(Chef):
+    """
+    A Chef whose TF-IDF features are hashed (see HashingTfidfVectorizer).
+
+    Its model has no vocabulary to pickle or load, only an IDF vector of
+    ``n_features`` entries; everything else (scoring engines, quantization,
+    recipe storage, incremental ingestion) is the same as Chef. Recipes added
+    with ``add_recipes`` are hashed, so unlike Chef their new terms are kept;
+    a term whose bucket was above ``max_df`` stays dropped from the existing
+    rows until the chef is retrained.
+    """
+
+    def __init__(self, name: str, cuisine: Optional[str] = None, n_features: int = 2 ** 18):
+        super().__init__(name, cuisine)
+        self.vectorizer = HashingTfidfVectorizer(n_features=n_features)
+
+    def _counts(self, documents: List[str]):
+        return self.vectorizer._counts(documents)
+
+    def _document_frequencies(self) -> np.ndarray:
+        # Buckets above max_df have no entries in the matrix; the vectorizer counted them
+        if self.document_frequency is None:
+            self.document_frequency = self.vectorizer.document_frequency.copy()
+        return self.document_frequency
+
+    def _fresh_idf(self, document_frequency: np.ndarray, n_documents: int) -> np.ndarray:
+        idf = super()._fresh_idf(document_frequency, n_documents)
+        idf[(document_frequency == 0) | (document_frequency > self.vectorizer.max_df * n_documents)] = 0
+        return idf
+
+    def refresh_idf(self) -> "HashingChef":
+        vectorizer = self.vectorizer
+        super().refresh_idf()
+        if self.vectorizer is not vectorizer:  # Keep partial_fit() consistent with the new rows
+            self.vectorizer.document_frequency = self.document_frequency.copy()
+            self.vectorizer.n_documents = self.tfidf_matrix.shape[0]
+        return self
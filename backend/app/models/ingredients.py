@@ -0,0 +1,80 @@
+import ast
+import json
+import logging
+from typing import Any, Set
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_ingredient(ing: str) -> str:
+    """Basic normalization: lowercase and remove extra whitespace."""
+    return ' '.join(ing.lower().strip().split())
+
+
+def _split_outside_quotes(text: str) -> list:
+    """Split by commas that are not inside quotes."""
+    ings = []
+    current = ""
+    in_quotes = False
+    for char in text:
+        if char == '"' or char == "'":
+            in_quotes = not in_quotes
+            current += char
+        elif char == ',' and not in_quotes:
+            ings.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current:
+        ings.append(current.strip())
+    return ings
+
+
+def parse_ner_ingredients(ing_str: Any) -> Set[str]:
+    """
+    Parse a NER ingredient field into a set of normalized ingredient names.
+
+    Accepts JSON or Python list/dict literals and comma-separated strings
+    (commas inside quotes are kept); anything else yields an empty set.
+    """
+    if not ing_str or not isinstance(ing_str, str):
+        return set()
+
+    # Clean the string
+    ing_str = ing_str.strip()
+
+    # Handle empty string
+    if not ing_str:
+        return set()
+
+    # Try to handle JSON format if it looks like JSON
+    if (ing_str.startswith('[') and ing_str.endswith(']')) or \
+       (ing_str.startswith('{') and ing_str.endswith('}')):
+        try:
+            # First try with json.loads
+            try:
+                ings = json.loads(ing_str)
+            except json.JSONDecodeError:
+                # If that fails, try with ast.literal_eval which is more lenient
+                ings = ast.literal_eval(ing_str)
+
+            # Handle different JSON structures
+            if isinstance(ings, dict):
+                ings = list(ings.values())
+            elif not isinstance(ings, list):
+                ings = [ings]
+
+            return {normalize_ingredient(str(ing)) for ing in ings if str(ing).strip()}
+        except Exception as e:
+            logger.debug("Error parsing ingredients: %s", e)
+            # If JSON parsing fails, fall through to string processing
+
+    # Handle string that might be a list representation
+    if ing_str.startswith('[') and ing_str.endswith(']'):
+        # Remove brackets and split by comma that's not inside quotes
+        ings = _split_outside_quotes(ing_str[1:-1])
+        return {normalize_ingredient(ing.strip(" \"'")) for ing in ings if ing.strip()}
+
+    # Fall back to simple comma separation (handle cases with quotes)
+    ings = _split_outside_quotes(ing_str)
+    return {normalize_ingredient(ing.strip(" \"'")) for ing in ings if ing.strip()}
@@ -0,0 +1,158 @@
+"""
+Fused hybrid scoring over posting lists.
+
+The dense path builds three full-length arrays per query (cosine, overlap and
+their weighted sum) and sorts all of them. Here both score components are
+gathered from the posting lists of the query's terms and ingredients only, and
+reduced to the top-k rows, so every temporary is proportional to the postings
+touched rather than to the number of recipes.
+
+The reduction has a NumPy implementation and, when numba is installed, a JIT
+compiled one that does it in a single pass with a bounded heap.
+"""
+import heapq
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+_jit_lock = threading.Lock()
+_jit_kernel = None  # None = not loaded yet, False = numba unavailable
+
+
+def gather_postings(indptr: np.ndarray, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positions of every entry in the posting lists of ``keys`` (column-major
+    ``indptr``), and the length of each list, without a Python loop.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    starts = indptr[keys].astype(np.int64)
+    lengths = indptr[keys + 1].astype(np.int64) - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), lengths
+    # Position = start of its list + offset within it
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return np.arange(total, dtype=np.int64) + offsets, lengths
+
+
+def csc_postings(matrix, terms: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows and weighted values of the query ``terms`` in a CSC matrix."""
+    positions, lengths = gather_postings(matrix.indptr, terms)
+    values = matrix.data[positions] * np.repeat(np.asarray(weights, dtype=matrix.dtype), lengths)
+    return matrix.indices[positions], values
+
+
+def _reduce_top_k_numpy(rows: np.ndarray, cosine_values: np.ndarray, overlap_rows: np.ndarray,
+                        ner_offsets: np.ndarray, cosine_weight: float, k: int):
+    all_rows = np.concatenate((rows, overlap_rows))
+    # Each posting list is sorted by row, so a stable sort (timsort) only merges runs
+    order = np.argsort(all_rows, kind="stable")
+    sorted_rows = all_rows[order]
+    first = np.empty(len(sorted_rows), dtype=bool)
+    first[:1] = True
+    np.not_equal(sorted_rows[1:], sorted_rows[:-1], out=first[1:])
+    candidates = sorted_rows[first]
+    inverse = np.empty(len(all_rows), dtype=np.int64)
+    inverse[order] = np.cumsum(first) - 1
+    cosine = np.bincount(inverse[:len(rows)], weights=cosine_values, minlength=len(candidates))
+    matched = np.bincount(inverse[len(rows):], minlength=len(candidates))
+    sizes = ner_offsets[candidates + 1] - ner_offsets[candidates]
+    overlap = np.zeros(len(candidates), dtype=np.float64)
+    np.divide(matched, sizes, out=overlap, where=sizes > 0)
+    hybrid = cosine_weight * cosine + (1 - cosine_weight) * overlap
+
+    positive = np.flatnonzero(hybrid > 0)
+    if len(positive) > k:
+        kth = np.partition(hybrid[positive], len(positive) - k)[len(positive) - k]
+        above = positive[hybrid[positive] > kth]
+        # Candidates are in row order, so the last tied ones have the highest rows
+        tied = positive[hybrid[positive] == kth][len(above) - k:]
+        positive = np.concatenate((above, tied))
+    # Highest score first, then highest row (as the dense path's reversed argsort)
+    order = positive[np.lexsort((-candidates[positive], -hybrid[positive]))]
+    return candidates[order], hybrid[order], cosine[order], overlap[order]
+
+
+def _reduce_top_k_loop(rows, cosine_values, overlap_rows, ner_offsets, cosine_weight, k):
+    """Single-pass sort/accumulate/heap reduction; plain Python that numba compiles."""
+    n_cosine = len(rows)
+    all_rows = np.concatenate((rows.astype(np.int64), overlap_rows.astype(np.int64)))
+    order = np.argsort(all_rows, kind="mergesort")
+    heap = [(0.0, np.int64(0), 0.0, 0.0)]
+    heap.pop()
+    i = 0
+    while i < len(order):
+        row = all_rows[order[i]]
+        cosine = 0.0
+        matched = 0
+        while i < len(order) and all_rows[order[i]] == row:
+            position = order[i]
+            if position < n_cosine:
+                cosine += cosine_values[position]
+            else:
+                matched += 1
+            i += 1
+        size = ner_offsets[row + 1] - ner_offsets[row]
+        overlap = matched / size if size > 0 else 0.0
+        score = cosine_weight * cosine + (1 - cosine_weight) * overlap
+        if score <= 0:
+            continue
+        if len(heap) < k:
+            heapq.heappush(heap, (score, row, cosine, overlap))
+        elif (score, row) > (heap[0][0], heap[0][1]):
+            heapq.heapreplace(heap, (score, row, cosine, overlap))
+
+    top = sorted(heap, reverse=True)
+    result_rows = np.empty(len(top), dtype=np.int64)
+    hybrid = np.empty(len(top), dtype=np.float64)
+    cosine_scores = np.empty(len(top), dtype=np.float64)
+    overlap_scores = np.empty(len(top), dtype=np.float64)
+    for j in range(len(top)):
+        hybrid[j], result_rows[j], cosine_scores[j], overlap_scores[j] = top[j]
+    return result_rows, hybrid, cosine_scores, overlap_scores
+
+
+def jit_kernel():
+    """The numba-compiled reduction, or None when numba isn't installed."""
+    global _jit_kernel
+    if _jit_kernel is None:
+        with _jit_lock:
+            if _jit_kernel is None:
+                try:
+                    import numba
+                    _jit_kernel = numba.njit(cache=True, nogil=True)(_reduce_top_k_loop)
+                except ImportError:
+                    _jit_kernel = False
+    return _jit_kernel or None
+
+
+def fused_top_k(cosine_rows: np.ndarray, cosine_values: np.ndarray, overlap_rows: np.ndarray,
+                ner_offsets: np.ndarray, cosine_weight: float, k: int, jit: Optional[bool] = None):
+    """
+    Top-``k`` rows by hybrid score from posting-list contributions.
+
+    Args:
+        cosine_rows, cosine_values: Rows and (query-weighted) TF-IDF values of
+            the query terms' postings; a row's cosine score is the sum of its values
+        overlap_rows: Rows of the query ingredients' postings; a row's overlap is
+            the count of its entries over its number of NER ingredients
+        ner_offsets: Per-row offsets of the NER ingredient ids (sizes by difference)
+        cosine_weight: Weight of the cosine component
+        k: Rows to return
+        jit: Use the numba kernel (None = when installed)
+
+    Returns:
+        (rows, hybrid, cosine, overlap) arrays for up to ``k`` rows with a positive
+        score, best first (ties broken by the higher row).
+    """
+    if k <= 0:
+        empty = np.empty(0, dtype=np.float64)
+        return np.empty(0, dtype=np.int64), empty, empty, empty
+    kernel = jit_kernel() if jit is not False else None
+    if jit and kernel is None:
+        raise ImportError("The JIT fused kernel needs numba (pip install numba)")
+    if kernel is not None:
+        return kernel(cosine_rows, np.asarray(cosine_values, dtype=np.float64), overlap_rows,
+                      ner_offsets, float(cosine_weight), k)
+    return _reduce_top_k_numpy(cosine_rows, cosine_values, overlap_rows, ner_offsets, cosine_weight, k)
@@ -0,0 +1,116 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+DTYPES = ("uint8", "float16")
+SCALES = ("term", "row")
+
+
+def parse_quantization(spec: str) -> Tuple[str, str]:
+    """Split a setting like "uint8", "uint8-row" or "float16" into (dtype, scale)."""
+    dtype, _, scale = spec.partition("-")
+    scale = scale or "term"
+    if dtype not in DTYPES or scale not in SCALES:
+        raise ValueError(f"Unknown quantization: {spec}")
+    return dtype, scale
+
+
+class QuantizedMatrix:
+    """
+    Compressed, read-only TF-IDF weights scored without dequantizing the matrix.
+
+    Weights are stored column-major (one posting list of rows per term), as
+    ``uint8`` with a float32 scale per term or per row, or as ``float16``. A
+    query only touches the posting lists of its own terms: each list is
+    dequantized on the fly into the score accumulator, so the cost per query is
+    proportional to the postings of the query terms, not to the matrix size.
+
+    uint8 codes are ``round(weight / scale)`` clipped to [1, 255] where the
+    scale is the term's (or row's) largest weight / 255; weights must be
+    non-negative, as TF-IDF weights are.
+    """
+
+    def __init__(self, shape, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray,
+                 scales: Optional[np.ndarray] = None, scale: Optional[str] = None):
+        self.shape = shape
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.scales = scales
+        self.scale = scale
+
+    @classmethod
+    def from_sparse(cls, matrix, dtype: str = "uint8", scale: str = "term") -> "QuantizedMatrix":
+        """Quantize a scipy sparse matrix (rows = recipes, columns = terms)."""
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown quantization dtype: {dtype}")
+        csc = matrix.tocsc(copy=True)
+        csc.sum_duplicates()
+        csc.sort_indices()
+        weights = csc.data.astype(np.float32)
+        indptr = csc.indptr.astype(np.int32 if csc.nnz < 2 ** 31 else np.int64)
+        indices = csc.indices.astype(np.int32)
+        if dtype == "float16":
+            return cls(matrix.shape, indptr, indices, weights.astype(np.float16))
+
+        if scale not in SCALES:
+            raise ValueError(f"Unknown quantization scale: {scale}")
+        if weights.size and weights.min() < 0:
+            raise ValueError("uint8 quantization needs non-negative weights")
+        if scale == "term":
+            maxima = np.zeros(matrix.shape[1], dtype=np.float32)
+            nonempty = np.diff(indptr) > 0
+            if nonempty.any():
+                maxima[nonempty] = np.maximum.reduceat(weights, indptr[:-1][nonempty])
+            scales = maxima / 255
+            entry_scales = np.repeat(scales, np.diff(indptr))
+        else:
+            maxima = np.zeros(matrix.shape[0], dtype=np.float32)
+            np.maximum.at(maxima, indices, weights)
+            scales = maxima / 255
+            entry_scales = scales[indices]
+        codes = np.clip(np.rint(weights / np.where(entry_scales > 0, entry_scales, 1)), 1, 255)
+        return cls(matrix.shape, indptr, indices, codes.astype(np.uint8), scales.astype(np.float32), scale)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.data.dtype
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    def dot(self, query_indices: Sequence[int], query_values: Sequence[float]) -> np.ndarray:
+        """Scores of every row for a sparse query given as term indices and weights."""
+        scores = np.zeros(self.shape[0], dtype=np.float32)
+        for term, weight in zip(query_indices, query_values):
+            start, end = self.indptr[term], self.indptr[term + 1]
+            if start == end:
+                continue
+            if self.scale == "term":
+                weight = weight * self.scales[term]
+            scores[self.indices[start:end]] += self.data[start:end].astype(np.float32) * np.float32(weight)
+        if self.scale == "row":
+            scores *= self.scales
+        return scores
+
+    def postings(self, query_indices: Sequence[int], query_values: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and dequantized, query-weighted values of the query terms' postings."""
+        from .kernels import gather_postings
+        terms = np.asarray(query_indices, dtype=np.int64)
+        positions, lengths = gather_postings(self.indptr, terms)
+        rows = self.indices[positions]
+        weights = np.asarray(query_values, dtype=np.float32)
+        if self.scale == "term":
+            weights = weights * self.scales[terms]
+        values = self.data[positions].astype(np.float32) * np.repeat(weights, lengths)
+        if self.scale == "row":
+            values *= self.scales[rows]
+        return rows, values
+
+    def memory_usage(self) -> Dict[str, int]:
+        return {
+            "data": self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0),
+            "indices": self.indices.nbytes,
+            "indptr": self.indptr.nbytes,
+        }
@@ -0,0 +1,162 @@
+import hashlib
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+import numpy as np
+
+from app.core.metrics import record_cache
+
+# Encoders shared by chefs whose vectorizers have the same vocabulary, IDF and settings
+_shared: "weakref.WeakValueDictionary[Tuple, QueryEncoder]" = weakref.WeakValueDictionary()
+_shared_lock = threading.Lock()
+
+
+class QueryEncoder:
+    """
+    Precompiled equivalent of ``TfidfVectorizer.transform`` for one query string.
+
+    Built once from a fitted word-analyzer vectorizer: the token regex is
+    compiled, the stop words are a frozenset and the vocabulary/IDF are used
+    as is, so encoding is a findall, a few dict lookups and one small
+    normalization, without sklearn's per-call validation. The result is the
+    same 1 x n_features CSR row (sorted indices, the vectorizer's dtype).
+
+    Recently encoded queries are memoized, so chefs sharing an encoder (see
+    :func:`shared_encoder`) encode each request's query once. Returned
+    matrices are shared and must not be modified.
+    """
+
+    def __init__(self, vocabulary: Mapping, idf: Optional[np.ndarray], token_pattern: str,
+                 stop_words: Optional[FrozenSet[str]] = None, ngram_range: Tuple[int, int] = (1, 1),
+                 lowercase: bool = True, binary: bool = False, sublinear_tf: bool = False,
+                 norm: Optional[str] = "l2", dtype: Any = np.float64, cache_size: int = 64):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.n_features = len(idf) if idf is not None else max(vocabulary.values(), default=-1) + 1
+        self.token_pattern = re.compile(token_pattern)
+        self.stop_words = stop_words or frozenset()
+        self.ngram_range = ngram_range
+        self.lowercase = lowercase
+        self.binary = binary
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+        self.dtype = np.dtype(dtype)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Deferred so importing the app doesn't load scipy.sparse before a model does
+        from scipy.sparse import csr_matrix
+        self._csr_matrix = csr_matrix
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer: Any) -> Optional["QueryEncoder"]:
+        """
+        Encoder for a fitted ``TfidfVectorizer``, or None when it uses a feature
+        the encoder doesn't reproduce (custom analyzer/tokenizer/preprocessor,
+        accent stripping, char n-grams) and ``transform`` must be used instead.
+        """
+        vocabulary = getattr(vectorizer, "vocabulary_", None)
+        if not isinstance(vocabulary, Mapping) or not vocabulary:
+            return None
+        params = getattr(vectorizer, "__dict__", {})
+        if (params.get("analyzer") != "word" or params.get("tokenizer") is not None
+                or params.get("preprocessor") is not None or params.get("strip_accents") is not None
+                or not isinstance(params.get("token_pattern"), str)):
+            return None
+        use_idf = params.get("use_idf", True)
+        idf = getattr(vectorizer, "idf_", None) if use_idf else None
+        if use_idf and not isinstance(idf, np.ndarray):
+            return None
+        stop_words = vectorizer.get_stop_words()
+        return cls(
+            vocabulary, idf, params["token_pattern"],
+            stop_words=frozenset(stop_words) if stop_words else None,
+            ngram_range=tuple(params.get("ngram_range", (1, 1))),
+            lowercase=params.get("lowercase", True),
+            binary=params.get("binary", False),
+            sublinear_tf=params.get("sublinear_tf", False),
+            norm=params.get("norm", "l2"),
+            dtype=params.get("dtype", np.float64),
+        )
+
+    def key(self) -> Tuple:
+        """Cheap identity of the encoding (vocabulary size, IDF digest, settings)."""
+        idf_digest = hashlib.blake2b(self.idf.tobytes(), digest_size=16).hexdigest() if self.idf is not None else None
+        return (len(self.vocabulary), self.n_features, idf_digest, self.token_pattern.pattern, self.stop_words,
+                self.ngram_range, self.lowercase, self.binary, self.sublinear_tf, self.norm, self.dtype.str)
+
+    def _terms(self, text: str):
+        tokens = self.token_pattern.findall(text.lower() if self.lowercase else text)
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        terms = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def encode(self, text: str):
+        """The vectorizer's ``transform([text])`` row."""
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+        record_cache("query_encoder", cached is not None)
+        if cached is not None:
+            return cached
+
+        counts: Dict[int, int] = {}
+        lookup = self.vocabulary.get
+        for term in self._terms(text):
+            index = lookup(term)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+        indices = np.array(sorted(counts), dtype=np.int32)
+        data = np.array([counts[i] for i in indices.tolist()], dtype=self.dtype)
+        if self.binary:
+            data[:] = 1
+        if self.sublinear_tf:
+            np.log(data, out=data)
+            data += 1
+        if self.idf is not None:
+            data *= self.idf[indices]
+        if self.norm == "l2":
+            length = np.sqrt(np.dot(data, data))
+        elif self.norm == "l1":
+            length = np.abs(data).sum()
+        else:
+            length = 0
+        if length > 0:
+            data /= length
+        vector = self._csr_matrix((data, indices, np.array([0, len(indices)], dtype=np.int32)),
+                                  shape=(1, self.n_features))
+
+        with self._lock:
+            self._cache[text] = vector
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vector
+
+
+def shared_encoder(vectorizer: Any) -> Optional[QueryEncoder]:
+    """
+    Encoder for ``vectorizer``, reusing a live encoder built from an identical
+    vocabulary, IDF and settings (e.g. chefs loaded from the same model).
+    """
+    encoder = QueryEncoder.from_vectorizer(vectorizer)
+    if encoder is None:
+        return None
+    key = encoder.key()
+    with _shared_lock:
+        existing = _shared.get(key)
+        if existing is not None and existing.vocabulary == encoder.vocabulary:
+            return existing
+        if existing is None:
+            _shared[key] = encoder
+    return encoder
@@ -3,6 +3,9 @@ from .base import BaseModel
 class Recipe(BaseModel):
     """Recipe model to store recipe information in memory"""
     
+    # No per-instance __dict__; trained chefs keep their recipes in a RecipeStore
+    __slots__ = ("id", "title", "ingredients", "instructions", "NER_ingredients", "cuisine", "_similarity_score")
+    
     def __init__(self, id: int, title: str, ingredients: str, instructions: str, NER_ingredients: str, cuisine: str = None):
         self.id = id
         self.title = title
@@ -19,3 +22,10 @@ class Recipe(BaseModel):
     @similarity_score.setter
     def similarity_score(self, value: float):
         self._similarity_score = value
+    
+    def __setstate__(self, state):
+        # Recipes pickled before __slots__ carry a plain __dict__
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        for name, value in state.items():
+            setattr(self, name, value)
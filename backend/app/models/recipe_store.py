@@ -0,0 +1,286 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from app.core import memory
+from .ingredients import parse_ner_ingredients
+from .recipe import Recipe
+from .text_store import BlockTextStore
+
+
+class RecipeStore:
+    """
+    Column-oriented, read-only storage for a chef's recipes.
+
+    Ids are kept in an int64 array and every text field as an offset array
+    into one shared UTF-8 buffer, so N recipes cost a handful of arrays instead
+    of N objects and 5N strings, and pickle/load as a few large buffers. Text is
+    only decoded for the rows that are read (the top-k results).
+
+    NER ingredients are also stored pre-parsed, as ids into a vocabulary of
+    normalized ingredient names with per-row offsets, so overlap scoring works
+    on integer arrays without decoding or parsing any text.
+
+    :meth:`externalize` moves the bulky text fields to a compressed
+    :class:`~app.models.text_store.BlockTextStore` on disk; scoring never reads
+    them, so only the returned rows are fetched from it.
+    """
+
+    TEXT_FIELDS = ("title", "ingredients", "instructions", "NER_ingredients", "cuisine")
+    # Only read for returned rows, and most of the text by size
+    EXTERNAL_FIELDS = ("ingredients", "instructions", "NER_ingredients")
+    # Text fields kept on disk (set by externalize); a class default so older pickles load
+    external: Optional[BlockTextStore] = None
+    # Inverted NER index (see ner_postings), built on first use
+    _ner_postings: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __init__(self, ids: np.ndarray, text: bytes, offsets: Dict[str, np.ndarray],
+                 nulls: Dict[str, np.ndarray], ner_ids: np.ndarray, ner_offsets: np.ndarray,
+                 ner_vocabulary: Dict[str, int]):
+        self.ids = ids
+        self.text = text
+        self.offsets = offsets  # field -> start of each row in ``text`` (n + 1 entries, uint32 if it fits)
+        self.nulls = nulls  # field -> rows whose value is None (only fields that have any)
+        self.ner_ids = ner_ids
+        self.ner_offsets = ner_offsets
+        self.ner_vocabulary = ner_vocabulary
+
+    @classmethod
+    def from_recipes(cls, recipes: Iterable[Any]) -> "RecipeStore":
+        """Build a store from Recipe-like objects; non-string text values are stored as None."""
+        recipes = list(recipes)
+        count = len(recipes)
+        ids = np.fromiter((int(recipe.id) for recipe in recipes), dtype=np.int64, count=count)
+
+        chunks: List[bytes] = []
+        offsets: Dict[str, np.ndarray] = {}
+        nulls: Dict[str, np.ndarray] = {}
+        position = 0
+        for field in cls.TEXT_FIELDS:
+            starts = np.empty(count + 1, dtype=np.int64)
+            starts[0] = position
+            missing = np.zeros(count, dtype=bool)
+            for row, recipe in enumerate(recipes):
+                value = getattr(recipe, field, None)
+                if isinstance(value, str):
+                    data = value.encode("utf-8")
+                    chunks.append(data)
+                    position += len(data)
+                else:
+                    missing[row] = True
+                starts[row + 1] = position
+            offsets[field] = starts
+            if missing.any():
+                nulls[field] = missing
+
+        if position < 2 ** 32:
+            offsets = {field: starts.astype(np.uint32) for field, starts in offsets.items()}
+
+        vocabulary: Dict[str, int] = {}
+        ner_ids: List[int] = []
+        ner_offsets = [0]
+        for recipe in recipes:
+            for name in parse_ner_ingredients(getattr(recipe, "NER_ingredients", None)):
+                ner_ids.append(vocabulary.setdefault(name, len(vocabulary)))
+            ner_offsets.append(len(ner_ids))
+
+        return cls(
+            ids, b"".join(chunks), offsets, nulls,
+            np.asarray(ner_ids, dtype=np.int32), np.asarray(ner_offsets, dtype=np.int64), vocabulary
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _on_disk(self, field: str, row: int) -> bool:
+        # Rows appended after externalize() keep their text in memory
+        return self.external is not None and field in self.external.fields and row < len(self.external)
+
+    def value(self, field: str, row: int) -> Optional[str]:
+        """Decode a single text value."""
+        missing = self.nulls.get(field)
+        if missing is not None and missing[row]:
+            return None
+        if self._on_disk(field, row):
+            return self.external.row(row)[self.external.fields.index(field)]
+        starts = self.offsets[field]
+        return self.text[starts[row]:starts[row + 1]].decode("utf-8")
+
+    def get(self, row: int) -> Recipe:
+        """Materialize one row as a Recipe."""
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("recipe index out of range")
+        # One block read for all the fields kept on disk
+        on_disk = self.external is not None and row < len(self.external)
+        values = dict(zip(self.external.fields, self.external.row(row))) if on_disk else {}
+        fields = {}
+        for field in self.TEXT_FIELDS:
+            missing = self.nulls.get(field)
+            if missing is not None and missing[row]:
+                fields[field] = None
+            elif field in values:
+                fields[field] = values[field]
+            else:
+                fields[field] = self.value(field, row)
+        return Recipe(id=int(self.ids[row]), **fields)
+
+    def __getitem__(self, row: Union[int, slice]) -> Union[Recipe, List[Recipe]]:
+        if isinstance(row, slice):
+            return [self.get(i) for i in range(*row.indices(len(self)))]
+        return self.get(int(row))
+
+    def __iter__(self) -> Iterator[Recipe]:
+        return (self.get(row) for row in range(len(self)))
+
+    def append(self, recipes: Iterable[Any]) -> "RecipeStore":
+        """
+        A new store with ``recipes`` added after the existing rows; this one is
+        left unchanged, so it can keep serving until the new one replaces it.
+
+        Only the new recipes are parsed: their NER ingredients are mapped into
+        the existing vocabulary (new names get new ids) and appended to the
+        per-row ids and, when built, to the inverted index. The arrays and text
+        buffer are copied, not rebuilt. Text fields kept on disk stay there for
+        the existing rows; the new rows keep theirs in memory.
+        """
+        delta = RecipeStore.from_recipes(recipes)
+        count = len(self)
+
+        chunks, offsets, position = [], {}, 0
+        for field in self.TEXT_FIELDS:
+            new_starts = delta.offsets[field].astype(np.int64)
+            starts = self.offsets.get(field)
+            if starts is None:  # On disk: zero-length spans for the existing rows
+                old_starts, old_text = np.zeros(count + 1, dtype=np.int64), b""
+            else:
+                old_starts = starts.astype(np.int64)
+                old_text = self.text[old_starts[0]:old_starts[-1]]
+            chunks += [old_text, delta.text[new_starts[0]:new_starts[-1]]]
+            offsets[field] = np.concatenate((
+                old_starts - old_starts[0] + position,
+                new_starts[1:] - new_starts[0] + position + len(old_text),
+            ))
+            position = int(offsets[field][-1])
+        if position < 2 ** 32:
+            offsets = {field: starts.astype(np.uint32) for field, starts in offsets.items()}
+
+        nulls = {}
+        for field in set(self.nulls) | set(delta.nulls):
+            nulls[field] = np.concatenate((self.nulls.get(field, np.zeros(count, dtype=bool)),
+                                           delta.nulls.get(field, np.zeros(len(delta), dtype=bool))))
+
+        vocabulary = dict(self.ner_vocabulary)
+        remap = np.array([vocabulary.setdefault(name, len(vocabulary)) for name in delta.ner_vocabulary],
+                         dtype=np.int32)
+        new_ids = remap[delta.ner_ids] if len(delta.ner_ids) else delta.ner_ids
+        store = RecipeStore(
+            np.concatenate((self.ids, delta.ids)), b"".join(chunks), offsets, nulls,
+            np.concatenate((self.ner_ids, new_ids)),
+            np.concatenate((self.ner_offsets, delta.ner_offsets[1:] + self.ner_offsets[-1])),
+            vocabulary,
+        )
+        store.external = self.external
+        if self._ner_postings is not None:
+            store._ner_postings = self._append_postings(new_ids, delta.ner_offsets, len(vocabulary))
+        return store
+
+    def _append_postings(self, new_ids: np.ndarray, new_offsets: np.ndarray,
+                         vocabulary_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The inverted index with the rows of ``new_ids`` (per-row ``new_offsets``) added after ours."""
+        old_offsets, old_rows = self._ner_postings
+        old_counts = np.zeros(vocabulary_size, dtype=np.int64)
+        old_counts[:len(old_offsets) - 1] = np.diff(old_offsets)
+        new_counts = np.bincount(new_ids, minlength=vocabulary_size)
+        offsets = np.concatenate(([0], np.cumsum(old_counts + new_counts))).astype(np.int64)
+
+        rows = np.empty(len(old_rows) + len(new_ids), dtype=np.int32)
+        # Each list keeps its existing rows, followed by the new (higher) rows
+        old_keys = np.repeat(np.arange(vocabulary_size), old_counts)
+        rows[offsets[old_keys] + np.arange(len(old_rows)) - old_offsets[old_keys]] = old_rows
+        order = np.argsort(new_ids, kind="stable")
+        new_keys = new_ids[order]
+        new_starts = np.concatenate(([0], np.cumsum(new_counts)))
+        owners = np.repeat(np.arange(len(new_offsets) - 1, dtype=np.int32) + len(self), np.diff(new_offsets))
+        rows[offsets[new_keys] + old_counts[new_keys] + np.arange(len(new_ids)) - new_starts[new_keys]] = \
+            owners[order]
+        return offsets, rows
+
+    def overlap_scores(self, query_ingredients: Set[str]) -> np.ndarray:
+        """
+        Fraction of each recipe's NER ingredients present in ``query_ingredients``
+        (normalized names), 0 for recipes without ingredients.
+        """
+        scores = np.zeros(len(self), dtype=np.float64)
+        query_ids = [self.ner_vocabulary[name] for name in query_ingredients if name in self.ner_vocabulary]
+        if not query_ids:
+            return scores
+        wanted = np.zeros(len(self.ner_vocabulary), dtype=bool)
+        wanted[query_ids] = True
+        hits = np.concatenate(([0], np.cumsum(wanted[self.ner_ids])))
+        matched = hits[self.ner_offsets[1:]] - hits[self.ner_offsets[:-1]]
+        sizes = np.diff(self.ner_offsets)
+        np.divide(matched, sizes, out=scores, where=sizes > 0)
+        return scores
+
+    def ner_postings(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Inverted NER ingredient index: ``(offsets, rows)`` where the rows
+        containing ingredient id ``i`` are ``rows[offsets[i]:offsets[i + 1]]``,
+        in ascending order.
+        """
+        if self._ner_postings is None:
+            owners = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.ner_offsets))
+            order = np.argsort(self.ner_ids, kind="stable")
+            counts = np.bincount(self.ner_ids, minlength=len(self.ner_vocabulary))
+            offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+            self._ner_postings = (offsets, owners[order])
+        return self._ner_postings
+
+    def query_ingredient_ids(self, query_ingredients: Set[str]) -> np.ndarray:
+        """Vocabulary ids of the (normalized) query ingredients present in the store."""
+        return np.array(sorted(self.ner_vocabulary[name] for name in query_ingredients
+                               if name in self.ner_vocabulary), dtype=np.int64)
+
+    def externalize(self, path: Union[str, Path], fields: Sequence[str] = EXTERNAL_FIELDS,
+                    block_rows: int = 32, codec: Optional[str] = None) -> BlockTextStore:
+        """
+        Move ``fields`` to a compressed block store at ``path`` and drop them from memory.
+
+        The store pickles as its path; after loading a pickled chef from another
+        directory, call :meth:`locate_text`.
+        """
+        fields = [field for field in fields if field in self.offsets]
+        rows = ([self.value(field, row) or "" for field in fields] for row in range(len(self)))
+        external = BlockTextStore.write(path, fields, rows, block_rows=block_rows, codec=codec)
+
+        chunks, offsets, position = [], {}, 0
+        for field, starts in self.offsets.items():
+            if field in fields:
+                continue
+            chunks.append(self.text[starts[0]:starts[-1]])
+            offsets[field] = (starts.astype(np.int64) - int(starts[0]) + position).astype(starts.dtype)
+            position += int(starts[-1] - starts[0])
+        self.text = b"".join(chunks)
+        self.offsets = offsets
+        self.external = external
+        return external
+
+    def locate_text(self, directory: Union[str, Path], cache_blocks: Optional[int] = None) -> None:
+        """Read the on-disk text fields from ``directory``, optionally resizing the block cache."""
+        if self.external is not None:
+            self.external.relocate(directory)
+            if cache_blocks is not None:
+                self.external.cache_blocks = cache_blocks
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes held by the arrays/vocabulary and by the text (buffer and cached blocks)."""
+        arrays = [self.ids, self.ner_ids, self.ner_offsets, *self.offsets.values(), *self.nulls.values(),
+                  *(self._ner_postings or ())]
+        return {
+            "arrays": sum(memory.sizeof_array(array) for array in arrays)
+            + memory.sizeof_dict(self.ner_vocabulary, set()),
+            "text": len(self.text) + (self.external.cached_bytes() if self.external else 0),
+        }
@@ -0,0 +1,188 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.metrics import record_cache
+
+MAGIC = b"FPRTXT01"
+_TRAILER = struct.Struct("<QQ")  # meta length, index offset
+
+
+def _codec(name: str) -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    """(compress, decompress) for a codec name; lz4 is optional."""
+    if name == "lz4":
+        try:
+            import lz4.block
+        except ImportError as e:
+            raise ImportError("This recipe text store was written with lz4 (pip install lz4)") from e
+        return lz4.block.compress, lz4.block.decompress
+    if name == "zlib":
+        return (lambda data: zlib.compress(data, 1)), zlib.decompress
+    raise ValueError(f"Unknown codec: {name}")
+
+
+def default_codec() -> str:
+    """lz4 when installed (fastest to decompress), zlib otherwise."""
+    try:
+        import lz4.block  # noqa: F401
+        return "lz4"
+    except ImportError:
+        return "zlib"
+
+
+class BlockTextStore:
+    """
+    Read-only recipe text on disk, in compressed blocks of ``block_rows`` rows.
+
+    Each block holds every field of its rows: a uint32 offset table followed by
+    the UTF-8 values. Block boundaries are in an index at the end of the file,
+    which is memory-mapped, so opening a store costs no reads beyond the index
+    and only the blocks of rows that are actually read are decompressed. The
+    most recently used decompressed blocks are kept in a small LRU.
+
+    Pickles as its path only; the file is (re)opened on first access.
+    """
+
+    def __init__(self, path: Union[str, Path], cache_blocks: int = 64):
+        self.path = str(path)
+        self.cache_blocks = cache_blocks
+        self._lock = threading.Lock()
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._cache: "OrderedDict[int, Tuple[np.ndarray, bytes]]" = OrderedDict()
+
+    @classmethod
+    def write(cls, path: Union[str, Path], fields: Sequence[str], rows: Iterable[Sequence[str]],
+              block_rows: int = 32, codec: Optional[str] = None) -> "BlockTextStore":
+        """Write ``rows`` (one string per field) to ``path`` and return a store reading it."""
+        codec = codec or default_codec()
+        compress, _ = _codec(codec)
+        block_offsets = [len(MAGIC)]
+        count = 0
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            block: List[bytes] = []
+            for row in rows:
+                block.extend(value.encode("utf-8") for value in row)
+                count += 1
+                if count % block_rows == 0:
+                    f.write(compress(cls._pack(block)))
+                    block_offsets.append(f.tell())
+                    block = []
+            if block:
+                f.write(compress(cls._pack(block)))
+                block_offsets.append(f.tell())
+            index_offset = f.tell()
+            f.write(np.asarray(block_offsets, dtype=np.uint64).tobytes())
+            meta = json.dumps({"fields": list(fields), "rows": count, "block_rows": block_rows,
+                               "codec": codec}).encode("utf-8")
+            f.write(meta)
+            f.write(_TRAILER.pack(len(meta), index_offset))
+            f.write(MAGIC)
+        return cls(path)
+
+    @staticmethod
+    def _pack(values: List[bytes]) -> bytes:
+        lengths = np.fromiter((len(v) for v in values), dtype=np.uint32, count=len(values))
+        offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.uint32)))
+        return offsets.astype(np.uint32).tobytes() + b"".join(values)
+
+    def _open(self) -> None:
+        with self._lock:
+            if self._mmap is not None:
+                return
+            f = open(self.path, "rb")
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            size = len(data)
+            if data[:len(MAGIC)] != MAGIC or data[size - len(MAGIC):] != MAGIC:
+                data.close()
+                f.close()
+                raise ValueError(f"Not a recipe text store: {self.path}")
+            trailer_at = size - len(MAGIC) - _TRAILER.size
+            meta_length, index_offset = _TRAILER.unpack(data[trailer_at:trailer_at + _TRAILER.size])
+            meta = json.loads(data[trailer_at - meta_length:trailer_at])
+            self._fields: List[str] = meta["fields"]
+            self.rows: int = meta["rows"]
+            self.block_rows: int = meta["block_rows"]
+            self.codec: str = meta["codec"]
+            self._decompress = _codec(self.codec)[1]
+            blocks = -(-self.rows // self.block_rows)
+            # Copied so the mmap can be closed while the index is alive
+            self._block_offsets = np.frombuffer(
+                data[index_offset:index_offset + (blocks + 1) * 8], dtype=np.uint64
+            ).copy()
+            self._file, self._mmap = f, data
+
+    def _block(self, block: int) -> Tuple[np.ndarray, bytes]:
+        with self._lock:
+            cached = self._cache.get(block)
+            if cached is not None:
+                self._cache.move_to_end(block)
+        record_cache("recipe_text", cached is not None)
+        if cached is not None:
+            return cached
+        start, end = int(self._block_offsets[block]), int(self._block_offsets[block + 1])
+        raw = self._decompress(self._mmap[start:end])
+        rows = min(self.block_rows, self.rows - block * self.block_rows)
+        table_size = (rows * len(self._fields) + 1) * 4
+        entry = (np.frombuffer(raw, dtype=np.uint32, count=rows * len(self._fields) + 1), raw[table_size:])
+        with self._lock:
+            self._cache[block] = entry
+            while len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        return entry
+
+    @property
+    def fields(self) -> List[str]:
+        """Field names, in the order :meth:`row` returns them."""
+        if self._mmap is None:
+            self._open()
+        return self._fields
+
+    def row(self, row: int) -> List[str]:
+        """All fields of ``row``, in ``fields`` order."""
+        if self._mmap is None:
+            self._open()
+        if not 0 <= row < self.rows:
+            raise IndexError("recipe text row out of range")
+        offsets, data = self._block(row // self.block_rows)
+        width = len(self._fields)
+        first = (row % self.block_rows) * width
+        return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(first, first + width)]
+
+    def __len__(self) -> int:
+        if self._mmap is None:
+            self._open()
+        return self.rows
+
+    def cached_bytes(self) -> int:
+        """Bytes held by decompressed blocks in the LRU."""
+        with self._lock:
+            return sum(offsets.nbytes + len(data) for offsets, data in self._cache.values())
+
+    def relocate(self, directory: Union[str, Path]) -> None:
+        """Read the file of the same name from ``directory`` (e.g. where its model was loaded from)."""
+        self.close()
+        self.path = os.path.join(str(directory), os.path.basename(self.path))
+
+    def close(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            if self._mmap is not None:
+                self._mmap.close()
+                self._file.close()
+            self._mmap = self._file = None
+
+    def __getstate__(self):
+        return {"path": self.path, "cache_blocks": self.cache_blocks}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["cache_blocks"])
@@ -0,0 +1,135 @@
+from bisect import bisect_right
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+
+class CompactVocabulary(Mapping):
+    """
+    Read-only ``term -> feature index`` mapping stored as a sorted string buffer.
+
+    Terms are concatenated in sorted (UTF-8 byte = code point) order with an
+    offset array, i.e. ~4 bytes per term plus the text instead of a dict slot,
+    a str and an int object each, and they pickle/load as two buffers. A term
+    is found by bisecting a small index of every ``BLOCK``-th term, then
+    binary searching its block of the buffer.
+
+    TfidfVectorizer numbers features in sorted term order, so the index of a
+    term is usually its sorted position; other numberings keep an explicit
+    index array. It is a Mapping, so it can replace ``vocabulary_`` as is.
+    """
+
+    BLOCK = 64
+
+    def __init__(self, text: bytes, offsets: np.ndarray, indices: Optional[np.ndarray] = None):
+        self.text = text
+        self.offsets = offsets  # start of each sorted term in ``text`` (n + 1 entries)
+        self.indices = indices  # feature index of each sorted term; None when it is the position
+        self._block_index: Optional[List[bytes]] = None
+        self._offsets_view = None
+
+    @classmethod
+    def from_dict(cls, vocabulary: Dict[str, int]) -> "CompactVocabulary":
+        """Build from a ``term -> index`` mapping."""
+        terms = sorted(vocabulary)
+        encoded = [term.encode("utf-8") for term in terms]
+        lengths = np.fromiter((len(term) for term in encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        if offsets[-1] < 2 ** 32:
+            offsets = offsets.astype(np.uint32)
+        indices = np.fromiter((vocabulary[term] for term in terms), dtype=np.int64, count=len(terms))
+        if np.array_equal(indices, np.arange(len(terms))):
+            indices = None
+        else:
+            indices = indices.astype(np.int32)
+        return cls(b"".join(encoded), offsets, indices)
+
+    def _encoded(self, position: int) -> bytes:
+        offsets = self._offsets_view
+        return self.text[offsets[position]:offsets[position + 1]]
+
+    def _prepare(self) -> None:
+        # memoryview indexing yields Python ints without numpy scalar overhead
+        self._offsets_view = memoryview(self.offsets)
+        self._block_index = [self._encoded(start) for start in range(0, len(self), self.BLOCK)]
+
+    def position(self, term: bytes) -> int:
+        """Sorted position of the UTF-8 ``term``, or -1."""
+        if self._block_index is None:
+            self._prepare()
+        block = bisect_right(self._block_index, term) - 1
+        if block < 0:
+            return -1
+        text, offsets = self.text, self._offsets_view
+        lo = block * self.BLOCK
+        hi = min(lo + self.BLOCK, len(self))
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if text[offsets[mid]:offsets[mid + 1]] < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and text[offsets[lo]:offsets[lo + 1]] == term:
+            return lo
+        return -1
+
+    def _index_of(self, position: int) -> int:
+        if position < 0 or self.indices is None:
+            return position
+        return int(self.indices[position])
+
+    def lookup(self, terms: Sequence[str]) -> np.ndarray:
+        """Feature index of each term, -1 for terms not in the vocabulary."""
+        return np.fromiter((self._index_of(self.position(term.encode("utf-8"))) for term in terms),
+                           dtype=np.int64, count=len(terms))
+
+    def get(self, term: str, default=None):
+        if not isinstance(term, str):
+            return default
+        index = self._index_of(self.position(term.encode("utf-8")))
+        return index if index >= 0 else default
+
+    def __getitem__(self, term: str) -> int:
+        index = self.get(term)
+        if index is None:
+            raise KeyError(term)
+        return index
+
+    def __contains__(self, term) -> bool:
+        return self.get(term) is not None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[str]:
+        if self._offsets_view is None:
+            self._prepare()
+        return (self._encoded(position).decode("utf-8") for position in range(len(self)))
+
+    def items(self):
+        return zip(self, (self._index_of(position) for position in range(len(self))))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CompactVocabulary):
+            same_indices = (self.indices is None and other.indices is None) or (
+                self.indices is not None and other.indices is not None
+                and np.array_equal(self.indices, other.indices))
+            return same_indices and self.text == other.text and np.array_equal(self.offsets, other.offsets)
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def memory_usage(self) -> int:
+        """Bytes held by the buffers and the block index."""
+        total = len(self.text) + self.offsets.nbytes + (self.indices.nbytes if self.indices is not None else 0)
+        if self._block_index is not None:
+            total += sum(len(term) + 33 for term in self._block_index) + 8 * len(self._block_index)
+        return total
+
+    def __getstate__(self):
+        # The block index and offset view are rebuilt on first lookup
+        return {"text": self.text, "offsets": self.offsets, "indices": self.indices}
+
+    def __setstate__(self, state):
+        self.__init__(state["text"], state["offsets"], state["indices"])
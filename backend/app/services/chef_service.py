@@ -1,10 +1,31 @@
+import copy
 import logging
 import os
-import psutil
 import gc
+import random
+import threading
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from app.models.chef import Chef
+from app.models.quantized import parse_quantization
+from app.models.recipe_store import RecipeStore
+from app.core import log, timing
+from app.core.concurrency import current_plan
+from app.core.config import settings
+from app.core.metrics import (
+    registry as metrics_registry,
+    CHEF_LATENCY,
+    CHEF_ERRORS,
+    CHEF_QUEUE_DEPTH,
+    CHEF_RESULTS,
+    RECOMMENDATION_RESULTS,
+    SHADOW_COMPARISONS,
+    SHADOW_LATENCY,
+    SHADOW_LATENCY_RATIO,
+    SHADOW_RANK_OVERLAP,
+    SHADOW_SCORE_DELTA,
+    SHADOW_SKIPPED,
+)
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import partial
 import time
@@ -12,6 +33,7 @@ import joblib
 
 def get_memory_usage() -> dict:
     """Get current process memory usage in MB"""
+    import psutil  # Only needed when memory is actually sampled
     process = psutil.Process(os.getpid())
     mem_info = process.memory_info()
     return {
@@ -23,26 +45,44 @@ def get_memory_usage() -> dict:
 def log_memory_usage(prefix: str = ""):
     """Log current memory usage with optional prefix"""
     mem = get_memory_usage()
-    logger.info(f"{prefix} Memory: {mem['rss']:.2f}MB RSS, {mem['vms']:.2f}MB VMS ({mem['percent']:.1f}%)")
+    logger.info(
+        "%s Memory: %.2fMB RSS, %.2fMB VMS (%.1f%%)", prefix, mem['rss'], mem['vms'], mem['percent'],
+        extra={"rss_mb": round(mem['rss'], 2)}
+    )
     return mem
 
-# Get logger for this module
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)  # Ensure this logger's level is set
+def engine_options(engine: str) -> Dict[str, Any]:
+    """Extra Chef.get_recommendations arguments configured for ``engine``."""
+    if engine == "two_stage" and settings.TWO_STAGE_CANDIDATES is not None:
+        return {"candidates": settings.TWO_STAGE_CANDIDATES}
+    return {}
+
+def check_engines() -> None:
+    """Reject unknown SCORING_ENGINE/SHADOW_ENGINE at startup rather than failing every request."""
+    for name in ("SCORING_ENGINE", "SHADOW_ENGINE"):
+        engine = getattr(settings, name)
+        if engine is not None and engine not in Chef.ENGINES:
+            raise ValueError(f"{name}={engine!r} is not one of {', '.join(Chef.ENGINES)}")
 
-# Add a stream handler if no handlers are configured
-if not logger.handlers:
-    handler = logging.StreamHandler()
-    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    logger.addHandler(handler)
-    logger.propagate = False  # Prevent duplicate logs
+# Get logger for this module; output goes through the queued root handler (app.core.log)
+logger = logging.getLogger(__name__)
 
 class ChefService:
     _instance = None
     _chefs: List[Chef] = []
+    _model_sources: Dict[str, Dict[str, Any]] = {}
+    # Chef scoring pool shared by all requests, sized by the concurrency plan
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+    # Shadow comparisons run one at a time on their own thread, off the response path
+    _shadow_executor: Optional[ThreadPoolExecutor] = None
+    _shadow_lock = threading.Lock()
+    # Serializes add_recipes() so concurrent updates of a chef aren't lost
+    _update_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
+            check_engines()
             cls._instance = super(ChefService, cls).__new__(cls)
             cls._instance._load_chefs()
         return cls._instance
@@ -50,50 +90,195 @@ class ChefService:
     def _load_chefs(self):
         """Load all chef models from the models directory"""
         log_memory_usage("Before loading models:")
-        models_dir = Path(__file__).parent.parent / "models" / "trained_models"
-        logger.info(f"Loading models from {models_dir.absolute()}")
+        models_dir = Path(settings.MODELS_DIR) if settings.MODELS_DIR else Path(__file__).parent.parent / "models" / "trained_models"
+        logger.info("Loading models from %s", models_dir.absolute())
         model_files = list(models_dir.glob("*.joblib"))
-        logger.info(f"Found {len(model_files)} model files")
+        logger.info("Found %d model files", len(model_files))
         
         if not model_files:
-            logger.warning(f"No model files found in {models_dir.absolute()}")
+            logger.warning("No model files found in %s", models_dir.absolute())
             return
         
         for model_file in model_files:
             try:
-                logger.info(f"Loading model: {model_file.name}")
+                logger.info("Loading model: %s", model_file.name)
                 chef = joblib.load(model_file)
+                if settings.MODEL_QUANTIZATION:
+                    dtype, scale = parse_quantization(settings.MODEL_QUANTIZATION)
+                    chef.quantize(dtype=dtype, scale=scale)
+                elif settings.MODEL_FLOAT32:
+                    chef.to_float32()
+                if "fused" in (settings.SCORING_ENGINE, settings.SHADOW_ENGINE):
+                    # Column-major once here rather than by a request
+                    chef.column_major()
+                # Models trained before CompactVocabulary still carry a dict
+                chef.compact_vocabulary()
+                # Precompile the query encoder now rather than on the first request
+                chef.query_encoder()
+                if isinstance(getattr(chef, "recipes", None), RecipeStore):
+                    # Recipe text kept on disk sits next to the model file
+                    chef.recipes.locate_text(model_file.parent, cache_blocks=settings.RECIPE_TEXT_CACHE_BLOCKS)
                 self._chefs.append(chef)
-                logger.info(f"Successfully loaded {chef.name}")
+                self._model_sources[chef.name] = {
+                    "file": model_file.name,
+                    "loaded_at": time.time(),
+                }
+                logger.info("Successfully loaded %s", chef.name)
             except Exception as e:
-                logger.error(f"Error loading {model_file}: {str(e)}")
+                logger.error("Error loading %s: %s", model_file, e)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """The shared scoring pool, created on first use."""
+        if ChefService._executor is None:
+            with ChefService._executor_lock:
+                if ChefService._executor is None:
+                    plan = current_plan()
+                    ChefService._executor = ThreadPoolExecutor(
+                        max_workers=plan.chef_threads, thread_name_prefix="chef"
+                    )
+                    logger.info("Chef executor started with %d threads", plan.chef_threads)
+        return ChefService._executor
     
     def get_chefs(self) -> List[Chef]:
         """Get all loaded chefs"""
         return self._chefs
+
+    def add_recipes(self, chef_name: str, recipes: List[Any], refresh_idf: Optional[bool] = None) -> Chef:
+        """
+        Add ``recipes`` to a loaded chef without retraining it (see Chef.add_recipes).
+
+        The update is applied to a copy of the chef, which then replaces it, so
+        requests in flight finish on the old one.
+        """
+        with self._update_lock:
+            for position, chef in enumerate(self._chefs):
+                if chef.name == chef_name:
+                    break
+            else:
+                raise ValueError(f"Unknown chef: {chef_name}")
+            started = time.perf_counter()
+            updated = copy.copy(chef).add_recipes(recipes, refresh_idf=refresh_idf)
+            self._chefs[position] = updated
+            source = self._model_sources.setdefault(chef_name, {"file": "", "loaded_at": time.time()})
+            source["added_recipes"] = source.get("added_recipes", 0) + len(recipes)
+        logger.info(
+            "Added %d recipes to %s in %.1fms (%d stale rows)", len(recipes), chef_name,
+            (time.perf_counter() - started) * 1e3, updated.stale_rows, extra={"chef": chef_name}
+        )
+        return updated
     
     def _get_chef_recommendations(
         self,
         chef: Chef,
         ingredients: List[str],
         top_n: int,
-        cosine_weight: float
+        cosine_weight: float,
+        request_timings: Optional[timing.StageTimings] = None,
+        verbose: bool = False
     ) -> List[Dict[str, Any]]:
         """Helper method to get recommendations from a single chef."""
-        start_time = time.time()
+        CHEF_QUEUE_DEPTH.dec()
+        start_time = time.perf_counter()
+        token = None
+        if request_timings is not None:
+            # Worker threads don't inherit the request context; collect per chef
+            chef_timings = timing.StageTimings()
+            request_timings.add_chef(chef.name, chef_timings)
+            token = timing.activate(chef_timings)
         try:
-            logger.debug(f"Starting recommendations from {chef.name}...")
-            result = chef.get_recommendations(ingredients, top_n=top_n, cosine_weight=cosine_weight)
-            duration = time.time() - start_time
-            logger.debug(f"Completed {chef.name} in {duration:.2f}s - {len(result)} recommendations")
+            result = chef.get_recommendations(
+                ingredients, top_n=top_n, cosine_weight=cosine_weight, engine=settings.SCORING_ENGINE,
+                **engine_options(settings.SCORING_ENGINE)
+            )
+            duration = time.perf_counter() - start_time
+            CHEF_LATENCY.observe(duration, chef.name)
+            CHEF_RESULTS.observe(len(result), chef.name)
+            if verbose:
+                logger.info(
+                    "Completed %s in %.2fs - %d recommendations", chef.name, duration, len(result),
+                    extra={"chef": chef.name, "duration_ms": round(duration * 1000, 2), "results": len(result)}
+                )
             return result
         except Exception as e:
-            logger.error(f"Error from {chef.name}: {str(e)}")
+            CHEF_LATENCY.observe(time.perf_counter() - start_time, chef.name)
+            CHEF_ERRORS.inc(chef.name)
+            logger.error("Error from %s: %s", chef.name, e, extra={"chef": chef.name})
             return []
+        finally:
+            if token is not None:
+                timing.deactivate(token)
+
+    def _compare_engines(
+        self,
+        ingredients: List[str],
+        top_n: int,
+        cosine_weight: float,
+        primary: str,
+        shadow: str
+    ) -> None:
+        """Score a request with both engines in every chef and record how they differ."""
+        try:
+            for chef in self._chefs:
+                try:
+                    start_time = time.perf_counter()
+                    expected = chef.get_recommendations(
+                        ingredients, top_n=top_n, cosine_weight=cosine_weight, engine=primary,
+                        **engine_options(primary)
+                    )
+                    primary_duration = time.perf_counter() - start_time
+                    start_time = time.perf_counter()
+                    actual = chef.get_recommendations(
+                        ingredients, top_n=top_n, cosine_weight=cosine_weight, engine=shadow,
+                        **engine_options(shadow)
+                    )
+                    shadow_duration = time.perf_counter() - start_time
+                except Exception as e:
+                    SHADOW_COMPARISONS.inc(chef.name, "error")
+                    logger.warning("Shadow comparison failed for %s: %s", chef.name, e, extra={"chef": chef.name})
+                    continue
+
+                SHADOW_LATENCY.observe(primary_duration, primary, chef.name)
+                SHADOW_LATENCY.observe(shadow_duration, shadow, chef.name)
+                if primary_duration > 0:
+                    SHADOW_LATENCY_RATIO.observe(shadow_duration / primary_duration, chef.name)
+
+                expected_scores = {r["id"]: r["similarity_score"] for r in expected}
+                actual_scores = {r["id"]: r["similarity_score"] for r in actual}
+                common = expected_scores.keys() & actual_scores.keys()
+                overlap = len(common) / len(expected_scores) if expected_scores else float(not actual_scores)
+                SHADOW_RANK_OVERLAP.observe(overlap, chef.name)
+                if common:
+                    SHADOW_SCORE_DELTA.observe(
+                        max(abs(expected_scores[i] - actual_scores[i]) for i in common), chef.name
+                    )
+                SHADOW_COMPARISONS.inc(chef.name, "compared")
+        finally:
+            self._shadow_lock.release()
+
+    def _maybe_shadow(self, ingredients: List[str], top_n: int, cosine_weight: float) -> bool:
+        """Submit a shadow comparison for a sampled fraction of requests; never blocks."""
+        shadow = settings.SHADOW_ENGINE
+        if not shadow or shadow == settings.SCORING_ENGINE or random.random() >= settings.SHADOW_SAMPLE_RATE:
+            return False
+        # Skip rather than queue when the previous comparison is still running
+        if not self._shadow_lock.acquire(blocking=False):
+            SHADOW_SKIPPED.inc()
+            return False
+        try:
+            if ChefService._shadow_executor is None:
+                ChefService._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+            ChefService._shadow_executor.submit(
+                self._compare_engines, list(ingredients), top_n, cosine_weight,
+                settings.SCORING_ENGINE, shadow
+            )
+        except Exception:
+            self._shadow_lock.release()
+            raise
+        return True
 
     def _reset_models(self):
         """Reset any model-internal caches without deleting trained models"""
-        logger.info("Resetting model caches...")
+        logger.debug("Resetting model caches...")
         for chef in self._chefs:
             try:
                 # Clear TF-IDF vectorizer's internal cache if it exists
@@ -105,10 +290,9 @@ class ChefService:
                     if hasattr(chef.vectorizer, '_clear_state'):
                         chef.vectorizer._clear_state()
                 
-                logger.debug(f"Reset caches for {chef.name}")
             except Exception as e:
-                logger.warning(f"Error resetting caches for {chef.name}: {str(e)}")
-        logger.info("Model caches reset completed")
+                logger.warning("Error resetting caches for %s: %s", chef.name, e, extra={"chef": chef.name})
+        logger.debug("Model caches reset completed")
 
     def get_recommendations(
         self,
@@ -124,39 +308,50 @@ class ChefService:
             ingredients: List of available ingredients
             top_n: Number of recommendations to return per chef
             cosine_weight: Weight for cosine similarity in scoring (0-1)
-            max_workers: Maximum number of worker threads (default: min(32, os.cpu_count() + 4))
+            max_workers: Run on a dedicated pool of this many threads instead of the
+                shared one sized by the concurrency plan (``CHEF_THREADS``)
             
         Returns:
             List of recipe recommendations sorted by score (highest first)
         """
         all_recommendations = []
+        request_timings = timing.current()
+        timer = timing.start()
+        # Per-request detail (memory snapshots, per-chef completions) is only
+        # logged for a sampled fraction of requests
+        verbose = log.sample_request()
         
         # Create a partial function with the fixed parameters
         get_recs = partial(
             self._get_chef_recommendations,
             ingredients=ingredients,
             top_n=top_n,
-            cosine_weight=cosine_weight
+            cosine_weight=cosine_weight,
+            request_timings=request_timings,
+            verbose=verbose
         )
         
         # Memory check before parallel processing
-        log_memory_usage("Before parallel processing:")
+        if verbose:
+            log_memory_usage("Before parallel processing:")
+        timer.mark("memory")
         
-        # Use ThreadPoolExecutor to process chefs in parallel
+        # Process chefs in parallel on the shared pool
         start_time = time.time()
-        logger.info(f"Starting parallel processing with {len(self._chefs)} chefs")
-        
-        # Log thread information
-        import threading
-        logger.debug(f"Active threads: {threading.active_count()}")
+        if verbose:
+            logger.info(
+                "Starting parallel processing with %d chefs (%d active threads)",
+                len(self._chefs), threading.active_count()
+            )
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        executor = self._get_executor() if max_workers is None else ThreadPoolExecutor(max_workers=max_workers)
+        try:
             # Submit all tasks with timing
             future_to_chef = {}
             for chef in self._chefs:
+                CHEF_QUEUE_DEPTH.inc()
                 future = executor.submit(get_recs, chef)
                 future_to_chef[future] = chef.name
-                logger.debug(f"Submitted task for {chef.name}")
             
             # Process results as they complete
             completed = 0
@@ -166,27 +361,85 @@ class ChefService:
                     recommendations = future.result()
                     all_recommendations.extend(recommendations)
                     completed += 1
-                    logger.info(f"✅ Completed {chef_name} ({completed}/{len(future_to_chef)}) - {len(recommendations)} recipes")
+                    if verbose:
+                        logger.info(
+                            "✅ Completed %s (%d/%d) - %d recipes",
+                            chef_name, completed, len(future_to_chef), len(recommendations)
+                        )
                 except Exception as e:
-                    logger.error(f"❌ Error processing {chef_name}: {str(e)}")
+                    logger.error("❌ Error processing %s: %s", chef_name, e, extra={"chef": chef_name})
         
-        total_duration = time.time() - start_time
-        logger.info(f"✨ Processed all chefs in {total_duration:.2f} seconds")
+        finally:
+            if executor is not ChefService._executor:
+                executor.shutdown(wait=False)
         
-        # Memory check after processing
-        log_memory_usage("After processing:")
+        total_duration = time.time() - start_time
+        timer.mark("chefs")
+        if verbose:
+            logger.info(
+                "✨ Processed all chefs in %.2f seconds", total_duration,
+                extra={"chefs": len(future_to_chef), "duration_ms": round(total_duration * 1000, 2)}
+            )
+            # Memory check after processing
+            log_memory_usage("After processing:")
         
         # Sort all recommendations by similarity score (descending)
         all_recommendations.sort(key=lambda x: x.get("similarity_score", 0), reverse=True)
+        RECOMMENDATION_RESULTS.observe(len(all_recommendations))
+        timer.mark("merge")
+        
+        # Compare against the shadow engine (if configured) after the response is ready
+        self._maybe_shadow(ingredients, top_n, cosine_weight)
         
         # Reset model caches
         self._reset_models()
         
         # Force garbage collection and log final memory
         gc.collect()
-        log_memory_usage("After GC and reset:")
+        if verbose:
+            log_memory_usage("After GC and reset:")
+        timer.mark("cleanup")
         
         return all_recommendations
 
+def _collect_model_info():
+    """Expose which model generation each loaded chef comes from."""
+    service = ChefService._instance
+    if service is None:
+        return
+    for chef in service.get_chefs():
+        source = service._model_sources.get(chef.name, {})
+        tfidf_matrix = getattr(chef, "tfidf_matrix", None)
+        vocabulary = getattr(getattr(chef, "vectorizer", None), "vocabulary_", None)
+        yield (
+            "fridgepal_model_info",
+            {
+                "chef": chef.name,
+                "file": source.get("file", ""),
+                "recipes": str(len(chef.recipes or [])),
+                "features": str(tfidf_matrix.shape[1]) if hasattr(tfidf_matrix, "shape") else "0",
+                "vocabulary": str(len(vocabulary)) if vocabulary is not None else "0",
+            },
+            1,
+        )
+
+
+def _collect_model_loaded_at():
+    """Expose when each chef model was loaded into this worker."""
+    service = ChefService._instance
+    if service is None:
+        return
+    for name, source in sorted(service._model_sources.items()):
+        yield ("fridgepal_model_loaded_timestamp_seconds", {"chef": name}, source["loaded_at"])
+
+
+metrics_registry.register_collector(
+    "fridgepal_model_info", "gauge", "Loaded chef models and their generation", _collect_model_info
+)
+metrics_registry.register_collector(
+    "fridgepal_model_loaded_timestamp_seconds", "gauge", "Unix time each chef model was loaded",
+    _collect_model_loaded_at
+)
+
 # Create a singleton instance
 chef_service = ChefService()
@@ -12,7 +12,8 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
     )
     return JSONResponse(
         status_code=exc.status_code,
-        content=error_response.model_dump(exclude_none=True)
+        content=error_response.model_dump(exclude_none=True),
+        headers=getattr(exc, "headers", None)
     )
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
@@ -63,6 +63,10 @@ def get_error_responses(*status_codes: int) -> Dict[int, Dict[str, Any]]:
             responses[code] = {"model": ErrorResponse, "description": "Conflict"}
         elif code == 422:
             responses[code] = {"model": ValidationErrorResponse, "description": "Validation Error"}
+        elif code == 429:
+            responses[code] = {"model": ErrorResponse, "description": "Too Many Requests"}
         elif code == 500:
             responses[code] = {"model": ErrorResponse, "description": "Internal Server Error"}
+        elif code == 503:
+            responses[code] = {"model": ErrorResponse, "description": "Service Unavailable"}
     return responses
@@ -0,0 +1,2 @@
+# Benchmarks for FridgePal; run from the backend directory, e.g.
+# python -m benchmarks.bench_chef --sizes 10000 100000
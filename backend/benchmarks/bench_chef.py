@@ -0,0 +1,147 @@
+"""
+Micro-benchmarks for Chef training and scoring on synthetic corpora.
+
+Each corpus size runs in a fresh process so peak RSS is attributable to it.
+
+    python -m benchmarks.bench_chef --sizes 10000 100000 1000000 --output bench_results/chef.json
+    python -m benchmarks.bench_chef --sizes 10000 --baseline bench_results/chef_baseline.json
+    python -m benchmarks.bench_chef --sizes 100000 --text-store   # recipe text in a compressed file
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List, Sequence
+
+import joblib
+import psutil
+
+from app.models.chef import Chef
+from benchmarks.common import (
+    compare,
+    environment,
+    percentiles,
+    print_comparison,
+    query_sets,
+    read_json,
+    synthetic_recipes,
+    write_json,
+)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_QUERY_SIZES = [1, 5, 10, 20]
+DEFAULT_WEIGHTS = [0.0, 0.7, 1.0]
+# Metrics checked against the baseline by default
+DEFAULT_COMPARE_KEYS = ["train_s", "load_s", "save_s", "peak_rss_mb", "p50_ms", "p95_ms"]
+
+
+def _rss_mb() -> float:
+    return psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def time_queries(chef: Chef, queries: List[List[str]], top_n: int, cosine_weight: float,
+                 warmup: int = 2) -> Dict[str, float]:
+    """Latency percentiles of get_recommendations over ``queries``."""
+    for query in queries[:warmup]:
+        chef.get_recommendations(query, top_n=top_n, cosine_weight=cosine_weight)
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        chef.get_recommendations(query, top_n=top_n, cosine_weight=cosine_weight)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def run_size(size: int, query_sizes: Sequence[int], weights: Sequence[float],
+             queries: int, top_n: int, seed: int, text_store: bool = False) -> Dict[str, Any]:
+    """Benchmark one corpus size; meant to run in a fresh process."""
+    result: Dict[str, Any] = {"recipes": size}
+    recipes = list(synthetic_recipes(size, seed=seed))
+    result["rss_corpus_mb"] = _rss_mb()
+
+    chef = Chef(f"Bench Chef {size}")
+    start = time.perf_counter()
+    chef.train(recipes)
+    result["train_s"] = time.perf_counter() - start
+    result["rss_trained_mb"] = _rss_mb()
+    result["model_bytes_in_memory"] = chef.memory_usage()["total"]
+
+    # The text store file is read while querying, so keep the directory until the end
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chef.joblib")
+        start = time.perf_counter()
+        if text_store:
+            chef.recipes.externalize(os.path.join(tmp, "chef.rtext"))
+            result["text_file_bytes"] = os.path.getsize(os.path.join(tmp, "chef.rtext"))
+        joblib.dump(chef, path)
+        result["save_s"] = time.perf_counter() - start
+        result["model_file_bytes"] = os.path.getsize(path)
+        del chef, recipes
+        start = time.perf_counter()
+        chef = joblib.load(path)
+        result["load_s"] = time.perf_counter() - start
+        result["rss_loaded_mb"] = _rss_mb()
+        result["model_bytes_loaded"] = chef.memory_usage()["total"]
+
+        latency: Dict[str, Any] = {}
+        for query_size in query_sizes:
+            query_list = query_sets(queries, query_size, seed=seed + query_size)
+            for weight in weights:
+                latency[f"q{query_size}_w{weight}"] = time_queries(chef, query_list, top_n, weight)
+        result["latency"] = latency
+        result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--query-sizes", type=int, nargs="+", default=DEFAULT_QUERY_SIZES)
+    parser.add_argument("--weights", type=float, nargs="+", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--queries", type=int, default=30, help="Timed queries per (query size, weight)")
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--text-store", action="store_true",
+                        help="Move recipe text to a compressed on-disk store before saving")
+    parser.add_argument("--output", default="bench_results/chef.json")
+    parser.add_argument("--baseline", help="Compare against this result file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown flagged as regression")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {}
+    for size in args.sizes:
+        print(f"Benchmarking {size} recipes...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            results[str(size)] = pool.submit(
+                run_size, size, args.query_sizes, args.weights, args.queries, args.top_n, args.seed,
+                args.text_store
+            ).result()
+        summary = results[str(size)]
+        print(f"  train {summary['train_s']:.2f}s, save {summary['save_s']:.2f}s, "
+              f"load {summary['load_s']:.2f}s, peak RSS {summary['peak_rss_mb']:.0f}MB")
+
+    report = {"meta": environment(), "results": results}
+    write_json(args.output, report)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        rows = compare(results, read_json(args.baseline)["results"], args.threshold, DEFAULT_COMPARE_KEYS)
+        print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            print("Performance regressions detected")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Per-request overhead of the HTTP middleware stack.
+
+Requests are driven straight through the ASGI interface (no sockets), against
+a trivial JSON endpoint and a streaming endpoint, for several stacks:
+
+- ``bare``: no middleware
+- ``legacy``: the previous stack, with the ``@app.middleware("http")`` CORS
+  preflight handler (a ``BaseHTTPMiddleware``) in front of CORSMiddleware
+- ``current``: the pure ASGI stack installed by ``app.main.get_application``
+
+    python -m benchmarks.bench_middleware --requests 20000 --output bench_results/middleware.json
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from app.core.middleware import MetricsMiddleware, ServerTimingMiddleware
+from benchmarks.common import environment, percentiles, write_json
+
+ORIGIN = "http://localhost:3000"
+STREAM_CHUNKS = 100
+
+
+async def ping(request: Request) -> JSONResponse:
+    return JSONResponse({"ok": True})
+
+
+async def stream(request: Request) -> StreamingResponse:
+    async def chunks():
+        for _ in range(STREAM_CHUNKS):
+            yield b"x" * 64
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+async def legacy_cors_preflight(request: Request, call_next):
+    """The handler app.main used to register with ``@app.middleware("http")``."""
+    if request.method == "OPTIONS":
+        response = Response()
+        response.headers["Access-Control-Allow-Origin"] = ORIGIN
+        response.headers["Access-Control-Allow-Methods"] = "*"
+        response.headers["Access-Control-Allow-Headers"] = "*"
+        response.headers["Access-Control-Allow-Credentials"] = "true"
+        return response
+    return await call_next(request)
+
+
+def _cors() -> Middleware:
+    return Middleware(CORSMiddleware, allow_origins=[ORIGIN], allow_credentials=True,
+                      allow_methods=["*"], allow_headers=["*"], expose_headers=["*"], max_age=600)
+
+
+# Middleware listed outermost first, as Starlette(middleware=...) expects
+STACKS: Dict[str, Callable[[], List[Middleware]]] = {
+    "bare": lambda: [],
+    "legacy": lambda: [
+        Middleware(BaseHTTPMiddleware, dispatch=legacy_cors_preflight),
+        Middleware(MetricsMiddleware),
+        Middleware(ServerTimingMiddleware),
+        _cors(),
+    ],
+    "current": lambda: [
+        Middleware(MetricsMiddleware),
+        Middleware(ServerTimingMiddleware),
+        _cors(),
+    ],
+}
+
+
+def build_app(stack: str) -> Starlette:
+    return Starlette(
+        routes=[Route("/ping", ping, methods=["GET"]), Route("/stream", stream, methods=["GET"])],
+        middleware=STACKS[stack](),
+    )
+
+
+def _scope(path: str) -> Dict[str, Any]:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench"), (b"origin", ORIGIN.encode())],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+
+async def _call(app, path: str) -> int:
+    """Send one request; returns the number of body messages received."""
+    messages = 0
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Like a server, block until the client disconnects (cancelled when the response ends)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal messages
+        if message["type"] == "http.response.body":
+            messages += 1
+
+    await app(_scope(path), receive, send)
+    return messages
+
+
+async def measure(app, path: str, requests: int, warmup: int = 200) -> Dict[str, float]:
+    for _ in range(warmup):
+        await _call(app, path)
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await _call(app, path)
+        samples.append(time.perf_counter() - start)
+    result = percentiles(samples)
+    result["us_per_request"] = sum(samples) / len(samples) * 1e6
+    return result
+
+
+async def run(stacks: Sequence[str], requests: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for stack in stacks:
+        app = build_app(stack)
+        results[stack] = {
+            "json": await measure(app, "/ping", requests),
+            "stream": await measure(app, "/stream", max(1, requests // 10)),
+        }
+    bare = results.get("bare")
+    if bare:
+        for stack, result in results.items():
+            for endpoint in ("json", "stream"):
+                result[endpoint]["overhead_us"] = (
+                    result[endpoint]["us_per_request"] - bare[endpoint]["us_per_request"]
+                )
+    return results
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Timed requests per stack")
+    parser.add_argument("--stacks", nargs="+", choices=sorted(STACKS), default=list(STACKS))
+    parser.add_argument("--output", default="bench_results/middleware.json")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args.stacks, args.requests))
+    print(f"{'stack':<10} {'json us/req':>12} {'overhead':>10} {'stream us/req':>14} {'overhead':>10}")
+    for stack, result in results.items():
+        json_result, stream_result = result["json"], result["stream"]
+        print(f"{stack:<10} {json_result['us_per_request']:>12.1f} {json_result.get('overhead_us', 0):>10.1f} "
+              f"{stream_result['us_per_request']:>14.1f} {stream_result.get('overhead_us', 0):>10.1f}")
+    write_json(args.output, {"meta": environment(), "config": {"requests": args.requests}, "results": results})
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
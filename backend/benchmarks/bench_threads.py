@@ -0,0 +1,136 @@
+"""
+Scoring throughput under different thread budgets.
+
+Trains ``--chefs`` chefs on synthetic corpora, then drives ``--clients``
+concurrent requests (each fanning out to every chef, like ChefService) for
+``--duration`` seconds per configuration. A configuration is
+``CHEF_THREADS:NATIVE_THREADS``; ``0`` native threads leaves the BLAS/OpenMP
+pools at their defaults. ``legacy`` is the previous behaviour: a fresh
+``ThreadPoolExecutor()`` (``cpu_count + 4`` threads) per request and no native
+limits. ``plan`` is what app.core.concurrency picks for ``--workers``.
+
+    python -m benchmarks.bench_threads --clients 8 --configs legacy plan 1:1 2:1 4:1 4:0
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.concurrency import available_cpus, plan_concurrency
+from app.models.chef import Chef
+from benchmarks.common import environment, percentiles, query_sets, synthetic_recipes, write_json
+
+
+def native_limits(native_threads: int):
+    """Context capping the BLAS/OpenMP pools at ``native_threads`` (0 = leave them alone)."""
+    if not native_threads:
+        return nullcontext()
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError as e:
+        raise ImportError("Native thread limits need threadpoolctl (pip install threadpoolctl)") from e
+    return threadpool_limits(limits=native_threads)
+
+
+def parse_config(name: str, workers: int = 1) -> Tuple[Optional[int], int]:
+    """``(chef_threads, native_threads)`` for a config name; None chef threads means a pool per request."""
+    if name == "legacy":
+        return None, 0
+    if name == "plan":
+        plan = plan_concurrency(workers=workers)
+        return plan.chef_threads, plan.native_threads
+    chef_threads, native_threads = name.split(":")
+    return int(chef_threads), int(native_threads)
+
+
+def _fan_out(executor: ThreadPoolExecutor, chefs: List[Chef], query: List[str], top_n: int) -> None:
+    futures = [executor.submit(chef.get_recommendations, query, top_n=top_n) for chef in chefs]
+    for future in futures:
+        future.result()
+
+
+def drive(chefs: List[Chef], queries: List[List[str]], chef_threads: Optional[int], native_threads: int,
+          clients: int, duration: float, top_n: int = 5) -> Dict[str, Any]:
+    """Run ``clients`` closed-loop request threads for ``duration`` seconds."""
+    shared = ThreadPoolExecutor(max_workers=chef_threads) if chef_threads else None
+    samples: List[float] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset: int) -> None:
+        local, i = [], offset
+        while time.perf_counter() < deadline:
+            query = queries[i % len(queries)]
+            i += clients
+            start = time.perf_counter()
+            if shared is None:
+                with ThreadPoolExecutor() as executor:
+                    _fan_out(executor, chefs, query, top_n)
+            else:
+                _fan_out(shared, chefs, query, top_n)
+            local.append(time.perf_counter() - start)
+        with lock:
+            samples.extend(local)
+
+    with native_limits(native_threads):
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    if shared is not None:
+        shared.shutdown()
+
+    result = percentiles(samples) if samples else {}
+    result["requests"] = len(samples)
+    result["requests_per_s"] = len(samples) / elapsed
+    return result
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chefs", type=int, default=4)
+    parser.add_argument("--recipes", type=int, default=20_000, help="Synthetic recipes per chef")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per configuration")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes assumed by the 'plan' config")
+    parser.add_argument("--configs", nargs="+", default=["legacy", "plan", "1:1", "2:1", "4:1", "4:0"],
+                        help="'legacy', 'plan' or CHEF_THREADS:NATIVE_THREADS (0 = library default)")
+    parser.add_argument("--output", default="bench_results/threads.json")
+    args = parser.parse_args(argv)
+
+    print(f"Training {args.chefs} chefs on {args.recipes} synthetic recipes each...")
+    chefs = []
+    for n in range(args.chefs):
+        chef = Chef(f"Bench Chef {n}")
+        chef.train(list(synthetic_recipes(args.recipes, seed=n)))
+        chefs.append(chef)
+    queries = query_sets(200, 5)
+
+    results: Dict[str, Any] = {}
+    print(f"{'config':<10} {'chef thr':>9} {'native':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name in args.configs:
+        chef_threads, native_threads = parse_config(name, args.workers)
+        result = drive(chefs, queries, chef_threads, native_threads, args.clients, args.duration)
+        result.update({"chef_threads": chef_threads, "native_threads": native_threads})
+        results[name] = result
+        print(f"{name:<10} {str(chef_threads or 'per-req'):>9} {native_threads or 'default':>7} "
+              f"{result['requests_per_s']:>9.1f} {result.get('p50_ms', 0):>9.2f} {result.get('p95_ms', 0):>9.2f}")
+
+    write_json(args.output, {
+        "meta": environment(),
+        "config": {"chefs": args.chefs, "recipes": args.recipes, "clients": args.clients,
+                   "duration": args.duration, "workers": args.workers, "available_cpus": available_cpus()},
+        "results": results,
+    })
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
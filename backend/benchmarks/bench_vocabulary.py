@@ -0,0 +1,116 @@
+"""
+Vocabulary dict vs CompactVocabulary: memory, pickle size, load time and lookup latency.
+
+Uses the vocabulary of a trained chef file (``--model``) or of a chef trained
+on a synthetic corpus, and times lookups of terms in the vocabulary (hits),
+of unknown terms (misses) and full query encodings with each representation.
+
+    python -m benchmarks.bench_vocabulary --recipes 50000 --vocab-size 50000
+    python -m benchmarks.bench_vocabulary --model app/models/trained_models/chef_1.joblib
+"""
+import argparse
+import pickle
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Mapping, Sequence
+
+import joblib
+
+from app.core import memory
+from app.models.chef import Chef
+from app.models.query_encoder import QueryEncoder
+from app.models.vocabulary import CompactVocabulary
+from benchmarks.common import environment, query_sets, synthetic_recipes, write_json
+
+
+def _per_call_us(function: Callable[[Any], Any], items: Sequence[Any], repeat: int = 3) -> float:
+    """Best-of-``repeat`` mean microseconds per call over ``items``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        best = min(best, time.perf_counter() - start)
+    return best / max(len(items), 1) * 1e6
+
+
+def _load_ms(payload: bytes, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pickle.loads(payload)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def measure(vocabulary: Mapping[str, int], queries: List[str], vectorizer: Any, lookups: int = 20_000,
+            seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """Figures for the dict and the compact form of ``vocabulary``."""
+    as_dict = dict(vocabulary.items())
+    start = time.perf_counter()
+    compact = CompactVocabulary.from_dict(as_dict)
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    rng = random.Random(seed)
+    terms = list(as_dict)
+    hits = [rng.choice(terms) for _ in range(lookups)]
+    misses = [term + " zz" for term in hits]
+
+    results = {}
+    for name, mapping in (("dict", as_dict), ("compact", compact)):
+        payload = pickle.dumps(mapping, protocol=pickle.HIGHEST_PROTOCOL)
+        mapping.get(hits[0])  # Builds the compact block index
+        vectorizer.vocabulary_ = mapping
+        encoder = QueryEncoder.from_vectorizer(vectorizer)
+        encoder.cache_size = 0
+        results[name] = {
+            "memory_bytes": (mapping.memory_usage() if isinstance(mapping, CompactVocabulary)
+                             else memory.sizeof_dict(mapping, set())),
+            "pickle_bytes": len(payload),
+            "load_ms": _load_ms(payload),
+            "hit_us": _per_call_us(mapping.get, hits),
+            "miss_us": _per_call_us(mapping.get, misses),
+            "encode_us": _per_call_us(encoder.encode, queries) if encoder else 0.0,
+        }
+    results["compact"]["build_ms"] = build_ms
+    vectorizer.vocabulary_ = compact
+    return results
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Trained chef (.joblib) whose vocabulary to use")
+    parser.add_argument("--recipes", type=int, default=20_000, help="Synthetic corpus size (without --model)")
+    parser.add_argument("--vocab-size", type=int, default=20_000, help="Synthetic ingredient vocabulary")
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--output", default="bench_results/vocabulary.json")
+    args = parser.parse_args(argv)
+
+    if args.model:
+        chef = joblib.load(args.model)
+    else:
+        print(f"Training on {args.recipes} synthetic recipes...")
+        chef = Chef("Vocabulary Bench Chef")
+        chef.train(list(synthetic_recipes(args.recipes, vocab_size=args.vocab_size)))
+    queries = [" ".join(query) for query in query_sets(200, 5, vocab_size=args.vocab_size)]
+    results = measure(chef.vectorizer.vocabulary_, queries, chef.vectorizer, lookups=args.lookups)
+
+    print(f"{len(chef.vectorizer.vocabulary_)} terms")
+    print(f"{'':<8} {'memory MB':>10} {'pickle MB':>10} {'load ms':>9} {'hit us':>8} {'miss us':>8} {'encode us':>10}")
+    for name, row in results.items():
+        print(f"{name:<8} {row['memory_bytes'] / 1e6:>10.2f} {row['pickle_bytes'] / 1e6:>10.2f} "
+              f"{row['load_ms']:>9.2f} {row['hit_us']:>8.2f} {row['miss_us']:>8.2f} {row['encode_us']:>10.1f}")
+
+    write_json(args.output, {
+        "meta": environment(),
+        "config": {"model": args.model, "recipes": args.recipes, "vocab_size": args.vocab_size,
+                   "terms": len(chef.vectorizer.vocabulary_), "lookups": args.lookups},
+        "results": results,
+    })
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
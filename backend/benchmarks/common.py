@@ -0,0 +1,120 @@
+"""Shared helpers for the benchmark scripts: synthetic data, stats and baselines."""
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.models.recipe import Recipe
+from app.models.Training.generate_corpus import CorpusGenerator, ingredient_vocabulary, zipf_sampler
+
+
+def synthetic_recipes(n: int, seed: int = 0, vocab_size: int = 20000) -> Iterator[Recipe]:
+    """Yield ``n`` Recipe objects shaped like the RecipeNLG rows used in training."""
+    return CorpusGenerator(seed=seed, vocab_size=vocab_size).recipes(n)
+
+
+def query_sets(count: int, size: int, seed: int = 1, vocab_size: int = 20000) -> List[List[str]]:
+    """Draw ``count`` ingredient queries of ``size`` items each."""
+    sample = zipf_sampler(ingredient_vocabulary(vocab_size), seed=seed)
+    return [sample(size) for _ in range(count)]
+
+
+def percentiles(samples_s: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    values = np.asarray(samples_s, dtype=float) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+        "mean_ms": float(values.mean()),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Metadata stored alongside benchmark results."""
+    import scipy
+    import sklearn
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested result dicts into ``a.b.c`` -> number."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.2,
+            keys: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Compare flattened metrics against a baseline (lower is better for all).
+
+    Args:
+        current: Result dict of this run
+        baseline: Result dict of the stored baseline
+        threshold: Relative increase treated as a regression (0.2 = 20%)
+        keys: Metric name suffixes to compare (default: all shared metrics)
+
+    Returns:
+        One row per compared metric with ``regression`` set where it got worse.
+    """
+    cur, base = flatten(current), flatten(baseline)
+    rows = []
+    for name in sorted(set(cur) & set(base)):
+        if keys and not any(name.endswith(k) for k in keys):
+            continue
+        old, new = base[name], cur[name]
+        change = (new - old) / old if old else 0.0
+        rows.append({
+            "metric": name,
+            "baseline": old,
+            "current": new,
+            "change": change,
+            "regression": change > threshold,
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['metric']:<60} {row['baseline']:>12.3f} -> {row['current']:>12.3f} "
+              f"({row['change'] * 100:+6.1f}%) {flag}")
+
+
+def write_json(path: str, data: Dict[str, Any]) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def read_json(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
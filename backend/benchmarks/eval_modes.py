@@ -0,0 +1,278 @@
+"""
+Accuracy-vs-speed evaluation of Chef retrieval modes.
+
+Trains a chef on a synthetic corpus, runs a query set through the exact
+reference (``engine="exact"``) and through every other mode in ``MODES``, and
+reports per mode:
+
+- ``recall@k``: fraction of the exact top-k the mode also returned
+- ``ndcg@k``: NDCG of the mode's ranking, using the exact hybrid scores as gains
+- ``max_score_delta``: largest absolute score difference on recipes both returned
+- latency percentiles and the model bytes / peak per-query allocation
+- ``features``: terms (or hash buckets) in use, and for hashed modes the
+  ``collision_rate`` of the reference vocabulary in the hashed space. It
+  describes the hashed space only; recall@k and NDCG@k measure the drift
+- for two-stage modes, ``stage_one_recall``: fraction of the exact top-k among
+  the stage-one candidates (an upper bound on the mode's recall@k)
+
+    python -m benchmarks.eval_modes --recipes 100000 --queries 200 --k 10
+    python -m benchmarks.eval_modes --capture capture.jsonl --min-recall 0.95
+
+With ``--min-recall``/``--min-ndcg`` the exit status is non-zero when any mode
+falls below the gate.
+"""
+import argparse
+import copy
+import math
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.capture import load_capture
+from app.models.chef import Chef
+from app.models.hashing import HashingChef
+from app.models.quantized import QuantizedMatrix
+from benchmarks.common import environment, percentiles, query_sets, synthetic_recipes, write_json
+
+REFERENCE_MODE = "exact"
+
+
+def _copy_chef(chef: Chef) -> Chef:
+    """Shallow copy of ``chef`` with its own vectorizer, which conversions modify in place."""
+    compact = copy.copy(chef)
+    # Deep: TfidfVectorizer.idf_ lives on an inner transformer a shallow copy would share
+    compact.vectorizer = copy.deepcopy(chef.vectorizer)
+    return compact
+
+
+def float32_chef(chef: Chef) -> Chef:
+    """Copy of ``chef`` with float32 TF-IDF weights (the original is left untouched)."""
+    return _copy_chef(chef).to_float32()
+
+
+def column_major_chef(chef: Chef) -> Chef:
+    """Copy of ``chef`` with its TF-IDF matrix in CSC form, as the fused engine keeps it."""
+    return copy.copy(chef).column_major()
+
+
+def quantized_chef(dtype: str, scale: str = "term") -> Callable[[Chef], Chef]:
+    """Prepare function for a copy of the chef with quantized TF-IDF weights."""
+    def prepare(chef: Chef) -> Chef:
+        return _copy_chef(chef).quantize(dtype=dtype, scale=scale)
+    return prepare
+
+
+def hashing_chef(n_features: int) -> Callable[[Chef], Chef]:
+    """Prepare function training a HashingChef with ``n_features`` buckets on the same recipes."""
+    def prepare(chef: Chef) -> Chef:
+        hashed = HashingChef(chef.name, chef.cuisine, n_features=n_features)
+        hashed.train(list(chef.recipes))
+        return hashed
+    return prepare
+
+
+def feature_count(chef: Chef) -> int:
+    """Features (terms or hash buckets) used by at least one recipe."""
+    matrix = chef.tfidf_matrix
+    if isinstance(matrix, QuantizedMatrix) or matrix.format == "csc":
+        return int(np.count_nonzero(np.diff(matrix.indptr)))
+    return int(np.unique(matrix.indices).size)
+
+
+# Retrieval modes: name -> (prepare, kwargs). ``prepare`` derives the chef the
+# mode runs on from the trained reference chef (None = use it as is) and
+# ``kwargs`` are passed to get_recommendations.
+Mode = Tuple[Optional[Callable[[Chef], Chef]], Dict[str, Any]]
+MODES: Dict[str, Mode] = {
+    REFERENCE_MODE: (None, {"engine": "exact"}),
+    "sparse": (None, {"engine": "sparse"}),
+    "float32": (float32_chef, {"engine": "sparse"}),
+    "uint8": (quantized_chef("uint8", "term"), {"engine": "quantized"}),
+    "uint8-row": (quantized_chef("uint8", "row"), {"engine": "quantized"}),
+    "float16": (quantized_chef("float16"), {"engine": "quantized"}),
+    "fused": (column_major_chef, {"engine": "fused"}),
+    "hashing": (hashing_chef(2 ** 18), {"engine": "sparse"}),
+    "hashing-64k": (hashing_chef(2 ** 16), {"engine": "sparse"}),
+    "two-stage": (None, {"engine": "two_stage"}),
+    "two-stage-100": (None, {"engine": "two_stage", "candidates": 100}),
+}
+
+
+def recall_at_k(reference: Sequence[Any], ranked: Sequence[Any], k: int) -> float:
+    """Fraction of the reference top-k present in the ranked top-k."""
+    expected = set(reference[:k])
+    if not expected:
+        return 1.0
+    return len(expected & set(ranked[:k])) / len(expected)
+
+
+def ndcg_at_k(reference: Sequence[Any], gains: Dict[Any, float], ranked: Sequence[Any], k: int) -> float:
+    """NDCG of ``ranked`` where ``gains`` holds the reference relevance of each id."""
+    ideal = sum(gains.get(doc, 0.0) / math.log2(rank + 2) for rank, doc in enumerate(reference[:k]))
+    if ideal <= 0:
+        return 1.0
+    actual = sum(gains.get(doc, 0.0) / math.log2(rank + 2) for rank, doc in enumerate(ranked[:k]))
+    return actual / ideal
+
+
+def max_score_delta(reference: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> float:
+    """Largest absolute similarity difference over recipes present in both result lists."""
+    scores = {r["id"]: r["similarity_score"] for r in reference}
+    return max((abs(r["similarity_score"] - scores[r["id"]]) for r in results if r["id"] in scores), default=0.0)
+
+
+def _run_queries(chef: Chef, queries: List[List[str]], k: int, cosine_weight: float,
+                 kwargs: Dict[str, Any]) -> Tuple[List[List[Dict[str, Any]]], List[float]]:
+    results, samples = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(chef.get_recommendations(query, top_n=k, cosine_weight=cosine_weight, **kwargs))
+        samples.append(time.perf_counter() - start)
+    return results, samples
+
+
+def stage_one_recall(chef: Chef, queries: List[List[str]], reference_ids: List[List[Any]], k: int,
+                     cosine_weight: float, candidates: Optional[int] = None) -> float:
+    """Mean fraction of the reference top-k ids among the two-stage candidates."""
+    recalls = []
+    for query, reference in zip(queries, reference_ids):
+        expected = set(reference[:k])
+        if not expected:
+            recalls.append(1.0)
+            continue
+        rows = chef.stage_one(query, top_n=k, cosine_weight=cosine_weight, candidates=candidates)
+        recalls.append(len(expected & set(chef.recipes.ids[rows].tolist())) / len(expected))
+    return sum(recalls) / len(recalls) if recalls else 1.0
+
+
+def _query_peak_bytes(chef: Chef, queries: List[List[str]], k: int, cosine_weight: float,
+                      kwargs: Dict[str, Any]) -> int:
+    """Median tracemalloc peak of a single query (tracing is too slow to leave on for timing)."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for query in queries:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            chef.get_recommendations(query, top_n=k, cosine_weight=cosine_weight, **kwargs)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+    return peaks[len(peaks) // 2] if peaks else 0
+
+
+def evaluate(chef: Chef, queries: List[List[str]], k: int = 10, cosine_weight: float = 0.7,
+             modes: Optional[Dict[str, Mode]] = None, memory_queries: int = 10,
+             warmup: int = 2) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare every mode against the exact reference on ``queries``.
+
+    Returns:
+        Dictionary keyed by mode name with recall/NDCG, latency and memory figures.
+    """
+    modes = modes if modes is not None else MODES
+    reference_results, _ = _run_queries(chef, queries, k, cosine_weight, MODES[REFERENCE_MODE][1])
+    reference_ids = [[r["id"] for r in result] for result in reference_results]
+    reference_gains = [{r["id"]: r["similarity_score"] for r in result} for result in reference_results]
+
+    report: Dict[str, Dict[str, Any]] = {}
+    for name, (prepare, kwargs) in modes.items():
+        start = time.perf_counter()
+        mode_chef = prepare(chef) if prepare else chef
+        prepare_s = time.perf_counter() - start
+        _run_queries(mode_chef, queries[:warmup], k, cosine_weight, kwargs)
+        results, samples = _run_queries(mode_chef, queries, k, cosine_weight, kwargs)
+        ranked = [[r["id"] for r in result] for result in results]
+        recalls = [recall_at_k(ref, ids, k) for ref, ids in zip(reference_ids, ranked)]
+        ndcgs = [ndcg_at_k(ref, gains, ids, k)
+                 for ref, gains, ids in zip(reference_ids, reference_gains, ranked)]
+        deltas = [max_score_delta(ref, result) for ref, result in zip(reference_results, results)]
+        collision_rate = getattr(mode_chef.vectorizer, "collision_rate", None)
+        report[name] = {
+            "recall_at_k": sum(recalls) / len(recalls) if recalls else 1.0,
+            "min_recall_at_k": min(recalls, default=1.0),
+            "ndcg_at_k": sum(ndcgs) / len(ndcgs) if ndcgs else 1.0,
+            "max_score_delta": max(deltas, default=0.0),
+            "latency": percentiles(samples) if samples else {},
+            "prepare_s": prepare_s,
+            "model_bytes": mode_chef.memory_usage()["total"],
+            "features": feature_count(mode_chef),
+            "query_peak_bytes": _query_peak_bytes(mode_chef, queries[:memory_queries], k, cosine_weight, kwargs),
+        }
+        if collision_rate is not None:
+            # Share of the reference vocabulary's terms sharing a bucket; descriptive
+            # only, the ranking effect is what recall/NDCG measure
+            report[name]["collision_rate"] = collision_rate(list(chef.vectorizer.vocabulary_))
+        if kwargs.get("engine") == "two_stage":
+            report[name]["stage_one_recall"] = stage_one_recall(
+                mode_chef, queries, reference_ids, k, cosine_weight, kwargs.get("candidates"))
+    return report
+
+
+def print_report(report: Dict[str, Dict[str, Any]], k: int) -> None:
+    print(f"{'mode':<16} {'recall@' + str(k):>10} {'ndcg@' + str(k):>10} {'max delta':>10} {'p50 ms':>9} "
+          f"{'p95 ms':>9} {'model MB':>9} {'query KB':>9} {'features':>9} {'collide':>8} {'stage 1':>8}")
+    for name, row in report.items():
+        latency = row["latency"]
+        print(f"{name:<16} {row['recall_at_k']:>10.4f} {row['ndcg_at_k']:>10.4f} {row['max_score_delta']:>10.2e} "
+              f"{latency.get('p50_ms', 0):>9.2f} {latency.get('p95_ms', 0):>9.2f} "
+              f"{row['model_bytes'] / 1024 / 1024:>9.1f} {row['query_peak_bytes'] / 1024:>9.1f} "
+              f"{row['features']:>9} {row.get('collision_rate', 0):>8.2%} "
+              f"{format(row['stage_one_recall'], '.4f') if 'stage_one_recall' in row else '-':>8}")
+
+
+def load_queries(args: argparse.Namespace) -> List[List[str]]:
+    if args.capture:
+        queries = [r["body"].get("ingredients") for r in load_capture(args.capture)]
+        return [q for q in queries if q][:args.queries]
+    return query_sets(args.queries, args.query_size, seed=args.seed + 1)
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=20_000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--query-size", type=int, default=5, help="Ingredients per synthetic query")
+    parser.add_argument("--capture", help="Use ingredient lists from a traffic capture instead")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--cosine-weight", type=float, default=0.7)
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), help="Modes to evaluate (default: all)")
+    parser.add_argument("--min-recall", type=float, help="Fail if any mode's mean recall@k is lower")
+    parser.add_argument("--min-ndcg", type=float, help="Fail if any mode's mean NDCG@k is lower")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results/eval_modes.json")
+    args = parser.parse_args(argv)
+
+    print(f"Training on {args.recipes} synthetic recipes...")
+    chef = Chef("Eval Chef")
+    chef.train(list(synthetic_recipes(args.recipes, seed=args.seed)))
+    queries = load_queries(args)
+    modes = {name: MODES[name] for name in args.modes} if args.modes else MODES
+
+    report = evaluate(chef, queries, k=args.k, cosine_weight=args.cosine_weight, modes=modes)
+    print_report(report, args.k)
+    write_json(args.output, {
+        "meta": environment(),
+        "config": {"recipes": args.recipes, "queries": len(queries), "k": args.k,
+                   "cosine_weight": args.cosine_weight, "capture": args.capture},
+        "results": report,
+    })
+    print(f"Results written to {args.output}")
+
+    failed = [
+        name for name, row in report.items()
+        if (args.min_recall is not None and row["recall_at_k"] < args.min_recall)
+        or (args.min_ndcg is not None and row["ndcg_at_k"] < args.min_ndcg)
+    ]
+    if failed:
+        print(f"Below quality gate: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
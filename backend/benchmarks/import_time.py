@@ -0,0 +1,146 @@
+"""
+Cold-start import cost of the serving app.
+
+Runs ``python -X importtime -c "import app.main"`` in fresh interpreters (after
+one warm-up run so bytecode caches exist), parses the ``-X importtime`` output
+of the fastest run and reports:
+
+- the total import time of the target module
+- the modules with the largest cumulative import time
+- self time summed per top-level package
+
+    python -m benchmarks.import_time --models-dir app/models/trained_models --budget-ms 3000
+    python -m benchmarks.import_time --models-dir app/models/trained_models --forbid sklearn.metrics
+
+Importing the app loads the chef models (``ChefService`` is created at import
+time), so measure it against a ``--models-dir`` of trained chefs; without one
+the figures leave out model loading. Unpickling a chef imports sklearn (its
+TfidfVectorizer); the exact engine's ``sklearn.metrics`` is only imported by
+the first query that uses it.
+
+The exit status is non-zero when the total exceeds ``--budget-ms`` or when a
+module listed in ``--forbid`` is imported.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks.common import environment, write_json
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# "import time:       259 |      34728 |     certifi.core"
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` stderr into entries in the order they were printed."""
+    entries = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                # One leading space, then two per nesting level
+                "depth": max(0, (len(indent) - 1) // 2),
+            })
+    return entries
+
+
+def summarize(entries: List[Dict[str, Any]], target: str, top: int = 20) -> Dict[str, Any]:
+    """Total, slowest modules by cumulative time and per-package self time (all in ms)."""
+    target_entry = next((e for e in entries if e["module"] == target), None)
+    total_us = target_entry["cumulative_us"] if target_entry else sum(
+        e["cumulative_us"] for e in entries if e["depth"] == 0
+    )
+    packages: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        packages[entry["module"].split(".")[0]] += entry["self_us"]
+    slowest = sorted(entries, key=lambda e: e["cumulative_us"], reverse=True)[:top]
+    return {
+        "total_ms": total_us / 1000,
+        "modules": len(entries),
+        "slowest": [{"module": e["module"], "cumulative_ms": e["cumulative_us"] / 1000,
+                     "self_ms": e["self_us"] / 1000} for e in slowest],
+        "packages": {name: us / 1000 for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]},
+    }
+
+
+def imported(entries: List[Dict[str, Any]], names: Sequence[str]) -> List[str]:
+    """Which of ``names`` (or their submodules) appear in ``entries``."""
+    modules = {e["module"] for e in entries}
+    return [name for name in names if any(m == name or m.startswith(name + ".") for m in modules)]
+
+
+def measure(target: str = "app.main", runs: int = 5, models_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Import ``target`` in ``runs`` fresh interpreters (loading the chefs in
+    ``models_dir``, if given); returns the entries of the fastest run.
+    """
+    command = [sys.executable, "-X", "importtime", "-c", f"import {target}"]
+    env = os.environ.copy()
+    if models_dir:
+        env["MODELS_DIR"] = str(Path(models_dir).resolve())
+    subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True)  # warm .pyc caches
+    best: List[Dict[str, Any]] = []
+    best_total = float("inf")
+    for _ in range(runs):
+        completed = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"import {target} failed:\n{completed.stderr[-2000:]}")
+        entries = parse_importtime(completed.stderr)
+        total = summarize(entries, target)["total_ms"]
+        if total < best_total:
+            best, best_total = entries, total
+    return best
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to try; the fastest is reported")
+    parser.add_argument("--top", type=int, default=20, help="Rows in the slowest module/package tables")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the total import time is higher")
+    parser.add_argument("--models-dir", help="Trained chefs to load on import (sets MODELS_DIR)")
+    parser.add_argument("--forbid", nargs="*", default=[], help="Fail if any of these modules is imported")
+    parser.add_argument("--output", default="bench_results/import_time.json")
+    args = parser.parse_args(argv)
+
+    if not args.models_dir:
+        print("No --models-dir: the figures leave out loading the chef models")
+    entries = measure(args.target, args.runs, args.models_dir)
+    summary = summarize(entries, args.target, args.top)
+    print(f"import {args.target}: {summary['total_ms']:.1f} ms ({summary['modules']} modules)\n")
+    print(f"{'module':<48} {'cumulative ms':>14} {'self ms':>9}")
+    for row in summary["slowest"]:
+        print(f"{row['module']:<48} {row['cumulative_ms']:>14.1f} {row['self_ms']:>9.1f}")
+    print(f"\n{'package':<48} {'self ms':>9}")
+    for name, ms in summary["packages"].items():
+        print(f"{name:<48} {ms:>9.1f}")
+
+    forbidden = imported(entries, args.forbid)
+    over_budget = args.budget_ms is not None and summary["total_ms"] > args.budget_ms
+    write_json(args.output, {
+        "meta": environment(),
+        "config": {"target": args.target, "runs": args.runs, "models_dir": args.models_dir, "budget_ms": args.budget_ms, "forbid": args.forbid},
+        "results": {**summary, "forbidden_imported": forbidden},
+    })
+    print(f"\nResults written to {args.output}")
+
+    if forbidden:
+        print(f"Forbidden modules imported: {', '.join(forbidden)}")
+    if over_budget:
+        print(f"Import time {summary['total_ms']:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    return 1 if forbidden or over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""
+End-to-end load generator for ``POST /api/v1/recipes``.
+
+Starts uvicorn locally (optionally on freshly trained synthetic chefs), drives
+it with either a closed loop of ``--concurrency`` clients or an open-loop
+Poisson arrival process at ``--rate`` requests/s, and reports throughput,
+latency percentiles, error rates and the RSS of every server process over time.
+
+    python -m benchmarks.loadtest --synthetic-chefs 5 --recipes-per-chef 10000 --workers 4 --rate 20 --duration 60
+    python -m benchmarks.loadtest --url http://localhost:8000 --concurrency 16 --duration 30
+
+In open-loop mode latency is measured from the scheduled send time, so a
+saturated server shows up as growing latency instead of a lower request rate.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+import joblib
+import psutil
+
+from benchmarks.common import (
+    environment,
+    ingredient_vocabulary,
+    percentiles,
+    synthetic_recipes,
+    write_json,
+    zipf_sampler,
+)
+
+RECIPES_PATH = "/api/v1/recipes"
+HEALTH_PATH = "/api/v1/recipes/health"
+
+
+class RequestFactory:
+    """Builds request bodies with Zipf-distributed ingredients and realistic list lengths."""
+
+    def __init__(self, seed: int = 0, min_items: int = 1, max_items: int = 15):
+        self._rng = random.Random(seed)
+        self._sample = zipf_sampler(ingredient_vocabulary(), seed=seed)
+        self.min_items = min_items
+        self.max_items = max_items
+
+    def __call__(self) -> Dict[str, Any]:
+        # Most users type a handful of ingredients; a few paste long lists
+        size = int(round(self._rng.lognormvariate(1.5, 0.5)))
+        size = max(self.min_items, min(self.max_items, size))
+        return {
+            "ingredients": self._sample(size),
+            "max_results": self._rng.choice([5, 5, 5, 10, 20]),
+            "variety": round(self._rng.random(), 2),
+        }
+
+
+class Recorder:
+    """Collects per-request outcomes."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def record(self, latency: float, status: Optional[int], error: Optional[str] = None):
+        if status is not None:
+            self.statuses[status] += 1
+            if status < 400:
+                self.latencies.append(latency)
+        if error:
+            self.errors[error] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.statuses.values()) + sum(self.errors.values())
+
+
+async def _send(client: httpx.AsyncClient, body: Dict[str, Any], recorder: Recorder,
+                scheduled: float) -> None:
+    try:
+        response = await client.post(RECIPES_PATH, json=body)
+        recorder.record(time.perf_counter() - scheduled, response.status_code)
+    except httpx.HTTPError as e:
+        recorder.record(time.perf_counter() - scheduled, None, type(e).__name__)
+
+
+async def closed_loop(client: httpx.AsyncClient, factory: RequestFactory, recorder: Recorder,
+                      concurrency: int, duration: float) -> None:
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            await _send(client, factory(), recorder, time.perf_counter())
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def open_loop(client: httpx.AsyncClient, factory: RequestFactory, recorder: Recorder,
+                    rate: float, duration: float, max_inflight: int, seed: int = 0) -> int:
+    """Poisson arrivals at ``rate``/s; returns the number of arrivals dropped at the in-flight cap."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    next_arrival = start
+    tasks = set()
+    dropped = 0
+    while next_arrival < start + duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_inflight:
+            dropped += 1
+        else:
+            task = asyncio.create_task(_send(client, factory(), recorder, next_arrival))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_arrival += rng.expovariate(rate)
+    if tasks:
+        await asyncio.gather(*tasks)
+    return dropped
+
+
+async def sample_rss(pid: Optional[int], interval: float, samples: List[Dict[str, Any]],
+                     stop: asyncio.Event, start: float) -> None:
+    """Record RSS (MB) of the server process and its workers until ``stop`` is set."""
+    if pid is None:
+        return
+    while not stop.is_set():
+        try:
+            parent = psutil.Process(pid)
+            procs = [parent] + parent.children(recursive=True)
+            per_pid = {}
+            for proc in procs:
+                try:
+                    per_pid[str(proc.pid)] = proc.memory_info().rss / 1024 / 1024
+                except psutil.Error:
+                    continue
+            samples.append({
+                "t": round(time.perf_counter() - start, 2),
+                "total_mb": round(sum(per_pid.values()), 1),
+                "per_pid_mb": {k: round(v, 1) for k, v in per_pid.items()},
+            })
+        except psutil.Error:
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def train_synthetic_chefs(models_dir: str, chefs: int, recipes_per_chef: int, seed: int) -> None:
+    """Train and save synthetic chefs so the server has realistic models to load."""
+    from app.models.chef import Chef
+
+    for i in range(chefs):
+        chef = Chef(name=f"Synthetic Chef {i + 1}")
+        chef.train(list(synthetic_recipes(recipes_per_chef, seed=seed + i)))
+        chef.recipes.externalize(os.path.join(models_dir, f"synthetic_chef_{i + 1}.rtext"))
+        joblib.dump(chef, os.path.join(models_dir, f"synthetic_chef_{i + 1}.joblib"))
+        print(f"Trained {chef.name} on {recipes_per_chef} recipes")
+
+
+def start_server(port: int, workers: int, models_dir: Optional[str]) -> subprocess.Popen:
+    env = dict(os.environ)
+    if models_dir:
+        env["MODELS_DIR"] = models_dir
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+
+
+async def wait_until_healthy(url: str, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get(HEALTH_PATH)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not become healthy within {timeout}s")
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Any]:
+    total = recorder.total
+    failed = sum(n for status, n in recorder.statuses.items() if status >= 400) + sum(recorder.errors.values())
+    summary: Dict[str, Any] = {
+        "requests": total,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "error_rate": failed / total if total else 0.0,
+        "statuses": {str(k): v for k, v in sorted(recorder.statuses.items())},
+        "errors": dict(recorder.errors),
+    }
+    if recorder.latencies:
+        summary["latency"] = percentiles(recorder.latencies)
+    return summary
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    server = None
+    temp_dir = None
+    url = args.url
+    try:
+        if not url:
+            models_dir = args.models_dir
+            if args.synthetic_chefs:
+                temp_dir = tempfile.TemporaryDirectory()
+                models_dir = temp_dir.name
+                train_synthetic_chefs(models_dir, args.synthetic_chefs, args.recipes_per_chef, args.seed)
+            server = start_server(args.port, args.workers, models_dir)
+            url = f"http://127.0.0.1:{args.port}"
+        await wait_until_healthy(url, args.startup_timeout)
+
+        factory = RequestFactory(seed=args.seed)
+        recorder = Recorder()
+        rss_samples: List[Dict[str, Any]] = []
+        stop = asyncio.Event()
+        limits = httpx.Limits(max_connections=max(args.concurrency, args.max_inflight))
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+            start = time.perf_counter()
+            sampler = asyncio.create_task(
+                sample_rss(server.pid if server else args.server_pid, args.rss_interval, rss_samples, stop, start)
+            )
+            dropped = 0
+            if args.rate:
+                dropped = await open_loop(client, factory, recorder, args.rate, args.duration,
+                                          args.max_inflight, args.seed)
+            else:
+                await closed_loop(client, factory, recorder, args.concurrency, args.duration)
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await sampler
+
+        summary = summarize(recorder, elapsed)
+        summary["dropped_arrivals"] = dropped
+        return {
+            "meta": environment(),
+            "config": {
+                "mode": "open" if args.rate else "closed",
+                "rate": args.rate,
+                "concurrency": args.concurrency,
+                "workers": args.workers,
+                "duration_s": args.duration,
+                "synthetic_chefs": args.synthetic_chefs,
+                "recipes_per_chef": args.recipes_per_chef,
+            },
+            "summary": summary,
+            "rss": rss_samples,
+        }
+    finally:
+        if server:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        if temp_dir:
+            temp_dir.cleanup()
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    summary = report["summary"]
+    print(f"\nRequests: {summary['requests']} in {summary['elapsed_s']:.1f}s "
+          f"({summary['throughput_rps']:.1f} req/s), error rate {summary['error_rate'] * 100:.2f}%")
+    if "latency" in summary:
+        latency = summary["latency"]
+        print(f"Latency: p50 {latency['p50_ms']:.1f}ms, p95 {latency['p95_ms']:.1f}ms, "
+              f"p99 {latency['p99_ms']:.1f}ms, max {latency['max_ms']:.1f}ms")
+    if summary["dropped_arrivals"]:
+        print(f"Dropped arrivals (in-flight cap): {summary['dropped_arrivals']}")
+    if report["rss"]:
+        peak = max(sample["total_mb"] for sample in report["rss"])
+        print(f"Server RSS: {report['rss'][-1]['total_mb']:.0f}MB at end, {peak:.0f}MB peak")
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_argument_group("target")
+    target.add_argument("--url", help="Use an already running server instead of starting uvicorn")
+    target.add_argument("--server-pid", type=int, help="PID to sample RSS from when using --url")
+    target.add_argument("--port", type=int, default=8765)
+    target.add_argument("--workers", type=int, default=1)
+    target.add_argument("--models-dir", help="Directory of trained *.joblib chefs for the server")
+    target.add_argument("--synthetic-chefs", type=int, default=0, help="Train this many synthetic chefs first")
+    target.add_argument("--recipes-per-chef", type=int, default=10_000)
+    target.add_argument("--startup-timeout", type=float, default=120.0)
+    load = parser.add_argument_group("load")
+    load.add_argument("--rate", type=float, help="Open-loop arrival rate (req/s); default is closed loop")
+    load.add_argument("--concurrency", type=int, default=8, help="Closed-loop clients")
+    load.add_argument("--max-inflight", type=int, default=256, help="Open-loop cap on outstanding requests")
+    load.add_argument("--duration", type=float, default=30.0)
+    load.add_argument("--timeout", type=float, default=30.0)
+    load.add_argument("--rss-interval", type=float, default=1.0)
+    load.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results/loadtest.json")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print_summary(report)
+    write_json(args.output, report)
+    print(f"Report written to {args.output}")
+    return 0 if report["summary"]["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Replay captured ``POST /api/v1/recipes`` traffic against any build.
+
+Reads a capture file written by ``CAPTURE_PATH`` (see ``app.core.capture``) and
+sends the same request bodies in the same order. With ``--speed 1`` requests
+keep their original inter-arrival spacing, ``--speed 10`` plays ten times
+faster and ``--speed 0`` sends them back-to-back with ``--concurrency`` clients.
+Each replayed request records its latency and the ids of the returned recipes,
+so two replays (e.g. old and new engine) can be compared request by request:
+
+    python -m benchmarks.replay capture.jsonl --url http://localhost:8000 --output bench_results/replay_old.json
+    python -m benchmarks.replay capture.jsonl --url http://localhost:8001 --output bench_results/replay_new.json
+    python -m benchmarks.replay --compare bench_results/replay_old.json bench_results/replay_new.json
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from app.core.capture import load_capture
+from benchmarks.common import environment, percentiles, read_json, write_json
+from benchmarks.loadtest import RECIPES_PATH
+
+
+def load_requests(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Load captured records ordered by capture time."""
+    records = sorted(load_capture(path), key=lambda record: record.get("ts", 0.0))
+    return records[:limit] if limit else records
+
+
+async def _replay_one(client: httpx.AsyncClient, index: int, record: Dict[str, Any],
+                      scheduled: float) -> Dict[str, Any]:
+    result: Dict[str, Any] = {
+        "index": index,
+        "captured_status": record.get("status"),
+        "captured_latency_ms": record.get("latency_ms"),
+    }
+    try:
+        response = await client.post(RECIPES_PATH, json=record["body"])
+        result["latency_ms"] = (time.perf_counter() - scheduled) * 1000
+        result["status"] = response.status_code
+        if response.status_code == 200:
+            result["ids"] = [recipe.get("id") for recipe in response.json().get("recipes", [])]
+    except httpx.HTTPError as e:
+        result["latency_ms"] = (time.perf_counter() - scheduled) * 1000
+        result["status"] = None
+        result["error"] = type(e).__name__
+    return result
+
+
+async def replay(client: httpx.AsyncClient, records: Sequence[Dict[str, Any]], speed: float = 1.0,
+                 concurrency: int = 8) -> List[Dict[str, Any]]:
+    """
+    Replay ``records`` and return one result per request, in capture order.
+
+    With ``speed > 0`` each request is scheduled at its original offset divided
+    by ``speed`` (open loop; latency is measured from the scheduled time). With
+    ``speed == 0`` requests are sent as fast as ``concurrency`` clients allow.
+    """
+    if not records:
+        return []
+    if speed > 0:
+        first_ts = records[0].get("ts", 0.0)
+        start = time.perf_counter()
+        tasks = []
+        for index, record in enumerate(records):
+            scheduled = start + (record.get("ts", first_ts) - first_ts) / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(_replay_one(client, index, record, scheduled)))
+        return list(await asyncio.gather(*tasks))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(index: int, record: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await _replay_one(client, index, record, time.perf_counter())
+
+    return list(await asyncio.gather(*(bounded(i, r) for i, r in enumerate(records))))
+
+
+def summarize(results: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [r for r in results if r.get("status") == 200]
+    captured = [r["captured_latency_ms"] / 1000 for r in ok if r.get("captured_latency_ms") is not None]
+    summary: Dict[str, Any] = {
+        "requests": len(results),
+        "ok": len(ok),
+        "error_rate": 1 - len(ok) / len(results) if results else 0.0,
+        "status_mismatches": sum(
+            1 for r in results
+            if r.get("captured_status") is not None and r.get("status") != r["captured_status"]
+        ),
+    }
+    if ok:
+        summary["latency"] = percentiles([r["latency_ms"] / 1000 for r in ok])
+    if captured:
+        summary["captured_latency"] = percentiles(captured)
+    return summary
+
+
+def _overlap(a: Sequence[Any], b: Sequence[Any]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(set(a) & set(b)) / max(len(a), len(b))
+
+
+def compare_runs(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare two replay reports of the same capture request by request."""
+    base = {r["index"]: r for r in baseline["results"]}
+    pairs = [(base[r["index"]], r) for r in candidate["results"] if r["index"] in base]
+    both_ok = [(a, b) for a, b in pairs if a.get("status") == 200 and b.get("status") == 200]
+    overlaps = [_overlap(a.get("ids", []), b.get("ids", [])) for a, b in both_ok]
+    comparison: Dict[str, Any] = {
+        "requests": len(pairs),
+        "compared": len(both_ok),
+        "status_mismatches": sum(1 for a, b in pairs if a.get("status") != b.get("status")),
+        "identical_results": sum(1 for a, b in both_ok if a.get("ids") == b.get("ids")),
+        "mean_overlap": sum(overlaps) / len(overlaps) if overlaps else None,
+    }
+    if both_ok:
+        comparison["baseline_latency"] = percentiles([a["latency_ms"] / 1000 for a, _ in both_ok])
+        comparison["candidate_latency"] = percentiles([b["latency_ms"] / 1000 for _, b in both_ok])
+    return comparison
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    records = load_requests(args.capture, args.limit)
+    limits = httpx.Limits(max_connections=max(args.concurrency, 100))
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        results = await replay(client, records, speed=args.speed, concurrency=args.concurrency)
+        elapsed = time.perf_counter() - start
+    summary = summarize(results)
+    summary["elapsed_s"] = round(elapsed, 3)
+    return {
+        "meta": environment(),
+        "config": {"capture": args.capture, "url": args.url, "speed": args.speed,
+                   "concurrency": args.concurrency},
+        "summary": summary,
+        "results": results,
+    }
+
+
+def _print_latency(label: str, latency: Optional[Dict[str, float]]) -> None:
+    if latency:
+        print(f"{label}: p50 {latency['p50_ms']:.1f}ms, p95 {latency['p95_ms']:.1f}ms, "
+              f"p99 {latency['p99_ms']:.1f}ms, max {latency['max_ms']:.1f}ms")
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", nargs="?", help="Capture file (JSON lines) to replay")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Playback speed factor; 0 sends requests back-to-back")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients when --speed 0")
+    parser.add_argument("--limit", type=int, help="Replay only the first N captured requests")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", default="bench_results/replay.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"),
+                        help="Compare two replay reports instead of replaying")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        comparison = compare_runs(read_json(args.compare[0]), read_json(args.compare[1]))
+        print(f"Compared {comparison['compared']} of {comparison['requests']} requests; "
+              f"{comparison['status_mismatches']} status mismatches, "
+              f"{comparison['identical_results']} identical result lists")
+        if comparison["mean_overlap"] is not None:
+            print(f"Mean top-k overlap: {comparison['mean_overlap']:.3f}")
+        _print_latency("Baseline", comparison.get("baseline_latency"))
+        _print_latency("Candidate", comparison.get("candidate_latency"))
+        return 0
+    if not args.capture:
+        parser.error("a capture file is required unless --compare is used")
+
+    report = asyncio.run(run(args))
+    summary = report["summary"]
+    print(f"Replayed {summary['requests']} requests in {summary['elapsed_s']:.1f}s, "
+          f"error rate {summary['error_rate'] * 100:.2f}%, {summary['status_mismatches']} status mismatches")
+    _print_latency("Replay latency", summary.get("latency"))
+    _print_latency("Captured latency", summary.get("captured_latency"))
+    write_json(args.output, report)
+    print(f"Report written to {args.output}")
+    return 0 if summary["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
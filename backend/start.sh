@@ -8,5 +8,7 @@ set -e
 # alembic upgrade head
 
 # Start the application
-echo "Starting application..."
-uvicorn app.main:app --host 0.0.0.0 --port $PORT --workers 4
+# Settings (app.core.concurrency) read the same worker count to size thread pools
+export WEB_CONCURRENCY="${WEB_CONCURRENCY:-4}"
+echo "Starting application with $WEB_CONCURRENCY workers..."
+uvicorn app.main:app --host 0.0.0.0 --port $PORT --workers "$WEB_CONCURRENCY"
@@ -0,0 +1,87 @@
+from unittest.mock import patch
+
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+ADMIN_HEADERS = {"X-Admin-Token": "secret"}
+
+
+def test_admin_disabled_without_token():
+    """Test that admin endpoints are forbidden when no token is configured."""
+    with patch('app.api.api_v1.admin.settings.ADMIN_TOKEN', None):
+        response = client.post("/api/v1/admin/profile?seconds=0.01", headers=ADMIN_HEADERS)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_admin_rejects_wrong_token():
+    """Test that a wrong admin token is rejected."""
+    with patch('app.api.api_v1.admin.settings.ADMIN_TOKEN', "secret"):
+        response = client.post("/api/v1/admin/profile?seconds=0.01", headers={"X-Admin-Token": "nope"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["code"] == 401
+
+
+def test_profile_endpoint_returns_collapsed_stacks():
+    """Test that the profile endpoint returns collapsed stacks for this worker."""
+    with patch('app.api.api_v1.admin.settings.ADMIN_TOKEN', "secret"):
+        response = client.post(
+            "/api/v1/admin/profile?seconds=0.1&interval_ms=5&idle=true",
+            headers=ADMIN_HEADERS
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["x-profile-samples"]) > 0
+    assert response.headers["x-profile-pid"].isdigit()
+    for line in response.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack
+        assert int(count) > 0
+
+
+def test_profile_endpoint_conflict():
+    """Test that a second concurrent profile returns 409."""
+    with patch('app.api.api_v1.admin.settings.ADMIN_TOKEN', "secret"):
+        with patch('app.core.profiler._profile_lock') as mock_lock:
+            mock_lock.acquire.return_value = False
+            response = client.post("/api/v1/admin/profile?seconds=0.01", headers=ADMIN_HEADERS)
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+
+def test_memory_report_endpoint():
+    """Test the per-chef memory report."""
+    from app.models.chef import Chef
+    from app.models.recipe import Recipe
+
+    chef = Chef("Report Chef")
+    chef.train([
+        Recipe(id=1, title="A", ingredients="salt, pepper", instructions="Mix", NER_ingredients="salt, pepper"),
+        Recipe(id=2, title="B", ingredients="flour, sugar", instructions="Bake", NER_ingredients="flour, sugar"),
+    ])
+    with patch('app.api.api_v1.admin.settings.ADMIN_TOKEN', "secret"), \
+            patch('app.api.api_v1.recipes.chef_service') as mock_chef_service:
+        mock_chef_service.get_chefs.return_value = [chef]
+        response = client.get("/api/v1/admin/memory", headers=ADMIN_HEADERS)
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["chefs"][0]["name"] == "Report Chef"
+    assert data["chefs"][0]["bytes"]["tfidf_data"] > 0
+    assert data["total_bytes"] == data["chefs"][0]["bytes"]["total"]
+    assert data["process"]["rss"] > 0
+
+
+def test_tracemalloc_endpoint():
+    """Test the tracemalloc diff endpoint."""
+    with patch('app.api.api_v1.admin.settings.ADMIN_TOKEN', "secret"):
+        response = client.post("/api/v1/admin/tracemalloc?seconds=0.05&top=5", headers=ADMIN_HEADERS)
+        invalid = client.post("/api/v1/admin/tracemalloc?group_by=bogus", headers=ADMIN_HEADERS)
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["seconds"] > 0
+    assert len(data["sites"]) <= 5
+    assert invalid.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
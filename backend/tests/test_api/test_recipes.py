@@ -59,6 +59,8 @@ def test_get_recipes_success(test_client, sample_ingredients):
     assert len(data["recipes"]) == 1
     recipe = data["recipes"][0]
     assert recipe["title"] == "Test Recipe"
+    assert recipe["cuisine"] is None  # unset optional recipe fields are still returned
+    assert "debug" not in data
     assert "similarity_score" in recipe
     assert 0 <= recipe["similarity_score"] <= 1.0
     
@@ -335,3 +337,101 @@ def test_get_recipes_none_ingredients(test_client):
         assert response_data == {
             "detail": "At least one ingredient is required"
         }
+
+
+def test_get_recipes_server_timing(test_client, sample_ingredients):
+    """Test that stage timings are returned in the Server-Timing header and debug block."""
+    mock_chef_service = MagicMock()
+    mock_chef_service.get_recommendations.return_value = []
+
+    with patch('app.api.api_v1.recipes.chef_service', mock_chef_service):
+        response = test_client.post(
+            "/api/v1/recipes",
+            json={"ingredients": sample_ingredients}
+        )
+        debug_response = test_client.post(
+            "/api/v1/recipes?debug=true",
+            json={"ingredients": sample_ingredients}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "service;dur=" in response.headers["server-timing"]
+    assert "total;dur=" in response.headers["server-timing"]
+    assert "debug" not in response.json()
+
+    debug = debug_response.json()["debug"]
+    assert "service" in debug["stages_ms"]
+    assert "serialize" in debug["stages_ms"]
+
+
+def test_get_recipes_rate_limited(test_client, sample_ingredients):
+    """Test that a client over its token bucket gets 429 with Retry-After."""
+    from app.core.ratelimit import RateLimiter
+
+    mock_chef_service = MagicMock()
+    mock_chef_service.get_recommendations.return_value = []
+
+    with patch('app.api.api_v1.recipes.chef_service', mock_chef_service), \
+            patch('app.api.api_v1.recipes.rate_limiter', RateLimiter(rate=0.1, burst=1)):
+        first = test_client.post("/api/v1/recipes", json={"ingredients": sample_ingredients})
+        second = test_client.post("/api/v1/recipes", json={"ingredients": sample_ingredients})
+
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(second.headers["retry-after"]) >= 1
+    assert second.json()["error"] == "Rate limit exceeded"
+    assert mock_chef_service.get_recommendations.call_count == 1
+
+
+def test_get_recipes_shed_when_overloaded(test_client, sample_ingredients):
+    """Test that the admission controller sheds requests with 503 and Retry-After."""
+    from app.core.ratelimit import AdmissionController
+
+    mock_chef_service = MagicMock()
+    controller = AdmissionController(concurrency=1, latency_target=0.5, max_queue=10)
+    controller.in_flight = 3  # three requests already running or queued
+    controller.service_time = 1.0
+
+    with patch('app.api.api_v1.recipes.chef_service', mock_chef_service), \
+            patch('app.api.api_v1.recipes.admission', controller):
+        response = test_client.post("/api/v1/recipes", json={"ingredients": sample_ingredients})
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "3"
+    mock_chef_service.get_recommendations.assert_not_called()
+    assert controller.in_flight == 3
+
+
+def test_get_recipes_cancelled_keeps_slot_until_scoring_ends(sample_ingredients):
+    """Test that a cancelled request stays in flight while its worker thread is still scoring."""
+    import asyncio
+    from app.core.ratelimit import AdmissionController
+
+    controller = AdmissionController(concurrency=1, latency_target=10.0, max_queue=10)
+    mock_chef_service = MagicMock()
+    mock_chef_service.get_recommendations.return_value = []
+
+    async def cancel_while_queued():
+        controller._slots.acquire()  # another request is scoring
+        try:
+            task = asyncio.create_task(get_recipes(RecipeRequest(ingredients=sample_ingredients)))
+            while controller.in_flight == 0:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)  # let the worker thread block on the held slot
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            in_flight_after_cancel = controller.in_flight
+        finally:
+            controller._slots.release()
+        for _ in range(500):
+            if controller.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        return in_flight_after_cancel
+
+    with patch('app.api.api_v1.recipes.chef_service', mock_chef_service), \
+            patch('app.api.api_v1.recipes.admission', controller):
+        assert asyncio.run(cancel_while_queued()) == 1
+    mock_chef_service.get_recommendations.assert_called_once()
+    assert controller.in_flight == 0
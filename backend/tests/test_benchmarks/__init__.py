@@ -0,0 +1,3 @@
+# This file makes Python treat the directory as a package
+
+# pytest tests/test_benchmarks/ -v
@@ -0,0 +1,25 @@
+import asyncio
+
+from benchmarks.bench_middleware import STREAM_CHUNKS, _call, build_app, run
+
+
+def test_stacks_serve_json_and_streams():
+    """Test that every benchmarked stack answers both endpoints completely."""
+    async def drive():
+        counts = {}
+        for stack in ("bare", "legacy", "current"):
+            app = build_app(stack)
+            counts[stack] = (await _call(app, "/ping"), await _call(app, "/stream"))
+        return counts
+
+    for stack, (json_messages, stream_messages) in asyncio.run(drive()).items():
+        # BaseHTTPMiddleware re-streams bodies, so it may add a trailing empty message
+        assert json_messages >= 1, stack
+        assert stream_messages >= STREAM_CHUNKS, stack
+
+
+def test_run_reports_overhead_against_bare():
+    """Test that overhead is reported relative to the bare stack."""
+    results = asyncio.run(run(["bare", "current"], requests=20))
+    assert results["bare"]["json"]["overhead_us"] == 0
+    assert "overhead_us" in results["current"]["stream"]
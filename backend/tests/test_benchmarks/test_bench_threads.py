@@ -0,0 +1,22 @@
+from app.models.chef import Chef
+from benchmarks.bench_threads import drive, parse_config
+from benchmarks.common import query_sets, synthetic_recipes
+
+
+def test_parse_config():
+    """Test config names: legacy, the planner's choice and explicit thread counts."""
+    assert parse_config("legacy") == (None, 0)
+    assert parse_config("4:0") == (4, 0)
+    chef_threads, native_threads = parse_config("plan", workers=1)
+    assert chef_threads >= 1 and native_threads >= 1
+
+
+def test_drive_reports_throughput():
+    """Test that both the shared pool and the per-request pool complete requests."""
+    chef = Chef("Thread Bench Chef")
+    chef.train(list(synthetic_recipes(50, vocab_size=200)))
+    queries = query_sets(5, 3, vocab_size=200)
+    for chef_threads, native_threads in ((2, 1), (None, 0)):
+        result = drive([chef, chef], queries, chef_threads, native_threads, clients=2, duration=0.2)
+        assert result["requests"] > 0
+        assert result["requests_per_s"] > 0
@@ -0,0 +1,16 @@
+import json
+
+from benchmarks import bench_vocabulary
+
+
+def test_bench_vocabulary_reports_both_forms(tmp_path):
+    """Test that the benchmark compares the dict and compact vocabulary of a small chef."""
+    output = tmp_path / "vocabulary.json"
+    assert bench_vocabulary.main(["--recipes", "200", "--vocab-size", "300", "--lookups", "200",
+                                  "--output", str(output)]) == 0
+
+    results = json.loads(output.read_text())["results"]
+    assert set(results) == {"dict", "compact"}
+    assert results["compact"]["memory_bytes"] < results["dict"]["memory_bytes"]
+    for row in results.values():
+        assert row["hit_us"] > 0 and row["encode_us"] > 0
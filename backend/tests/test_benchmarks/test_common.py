@@ -0,0 +1,42 @@
+import json
+
+from benchmarks.common import compare, flatten, percentiles, query_sets, synthetic_recipes
+
+
+def test_synthetic_recipes_shape():
+    """Test that synthetic recipes look like training rows and are deterministic."""
+    recipes = list(synthetic_recipes(20, seed=3))
+    again = list(synthetic_recipes(20, seed=3))
+
+    assert len(recipes) == 20
+    assert [r.title for r in recipes] == [r.title for r in again]
+    for recipe in recipes:
+        assert recipe.NER_ingredients
+        assert 1 <= len(json.loads(recipe.ingredients)) <= 40
+        assert recipe.ingredients == recipe.ingredients.lower()
+
+
+def test_query_sets_sizes():
+    """Test that query sets have the requested size."""
+    queries = query_sets(5, 4)
+    assert len(queries) == 5
+    assert all(len(q) == 4 for q in queries)
+
+
+def test_percentiles_in_milliseconds():
+    """Test the latency summary."""
+    summary = percentiles([0.001, 0.002, 0.003])
+    assert summary["p50_ms"] == 2.0
+    assert summary["max_ms"] == 3.0
+
+
+def test_compare_flags_regressions():
+    """Test that only metrics slower than the threshold are regressions."""
+    baseline = {"10": {"train_s": 1.0, "latency": {"q1": {"p50_ms": 10.0}}, "label": "x"}}
+    current = {"10": {"train_s": 1.1, "latency": {"q1": {"p50_ms": 15.0}}, "label": "y"}}
+
+    assert flatten(current) == {"10.train_s": 1.1, "10.latency.q1.p50_ms": 15.0}
+    rows = {row["metric"]: row for row in compare(current, baseline, threshold=0.2)}
+    assert not rows["10.train_s"]["regression"]
+    assert rows["10.latency.q1.p50_ms"]["regression"]
+    assert list(compare(current, baseline, keys=["train_s"]))[0]["metric"] == "10.train_s"
@@ -0,0 +1,57 @@
+import pytest
+
+from app.models.chef import Chef
+from benchmarks.common import query_sets, synthetic_recipes
+from benchmarks.eval_modes import MODES, evaluate, ndcg_at_k, recall_at_k
+
+
+def test_recall_and_ndcg():
+    """Test recall@k and NDCG@k against a reference ranking."""
+    reference = [1, 2, 3, 4]
+    gains = {1: 0.9, 2: 0.5, 3: 0.3, 4: 0.1}
+
+    assert recall_at_k(reference, [1, 2, 3, 4], 4) == 1.0
+    assert recall_at_k(reference, [1, 5, 3, 6], 4) == 0.5
+    assert recall_at_k([], [1], 4) == 1.0
+    assert ndcg_at_k(reference, gains, reference, 4) == pytest.approx(1.0)
+    # Swapping the top two items costs more than swapping the bottom two
+    assert ndcg_at_k(reference, gains, [2, 1, 3, 4], 4) < ndcg_at_k(reference, gains, [1, 2, 4, 3], 4) < 1.0
+    assert ndcg_at_k(reference, gains, [7, 8, 9], 4) == 0.0
+
+
+def test_evaluate_reports_every_mode():
+    """Test that every mode is scored against the exact reference on a small corpus."""
+    chef = Chef("Eval Test Chef")
+    chef.train(list(synthetic_recipes(300, seed=5)))
+    queries = query_sets(5, 4, seed=6)
+
+    report = evaluate(chef, queries, k=5, memory_queries=2)
+
+    assert set(report) == set(MODES)
+    exact = report["exact"]
+    assert exact["recall_at_k"] == 1.0
+    assert exact["ndcg_at_k"] == pytest.approx(1.0)
+    assert exact["max_score_delta"] == 0.0
+    assert report["float32"]["max_score_delta"] < 1e-5
+    assert report["float32"]["model_bytes"] < exact["model_bytes"]
+    assert report["fused"]["recall_at_k"] == 1.0
+    assert report["fused"]["max_score_delta"] < 1e-9
+    assert 0 < report["hashing-64k"]["collision_rate"] < 1
+    assert report["hashing"]["collision_rate"] <= report["hashing-64k"]["collision_rate"]
+    assert report["hashing"]["features"] <= exact["features"]
+    for mode in ("two-stage", "two-stage-100"):
+        # Re-ranking can only keep reference results the first stage found
+        assert report[mode]["recall_at_k"] <= report[mode]["stage_one_recall"] + 1e-9
+        assert report[mode]["max_score_delta"] < 1e-9
+    assert "stage_one_recall" not in exact
+    for mode in ("uint8", "uint8-row", "float16"):
+        assert report[mode]["recall_at_k"] > 0.8
+        assert report[mode]["max_score_delta"] < 0.01
+        assert report[mode]["model_bytes"] < report["float32"]["model_bytes"]
+    # Preparing the float32 and quantized copies leaves the reference chef untouched
+    assert chef.tfidf_matrix.dtype == "float64"
+    assert chef.vectorizer.idf_.dtype == "float64"
+    for row in report.values():
+        assert 0.0 <= row["recall_at_k"] <= 1.0
+        assert row["latency"]["p50_ms"] > 0
+        assert row["model_bytes"] > 0
@@ -0,0 +1,46 @@
+import joblib
+
+from app.models.chef import Chef
+from benchmarks.common import synthetic_recipes
+from benchmarks.import_time import imported, measure, parse_importtime, summarize
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:        80 |         80 |     numpy._core
+import time:       300 |        380 |   numpy
+import time:        50 |        550 | app.main
+some unrelated warning line
+"""
+
+
+def test_parse_importtime():
+    """Test that importtime lines are parsed with their nesting depth and other lines skipped."""
+    entries = parse_importtime(SAMPLE)
+    assert [e["module"] for e in entries] == ["_io", "numpy._core", "numpy", "app.main"]
+    assert [e["depth"] for e in entries] == [1, 2, 1, 0]
+    assert entries[2]["self_us"] == 300 and entries[2]["cumulative_us"] == 380
+
+
+def test_summarize_totals_and_packages():
+    """Test that the total comes from the target and self time is grouped per package."""
+    summary = summarize(parse_importtime(SAMPLE), "app.main", top=2)
+    assert summary["total_ms"] == 0.55
+    assert [row["module"] for row in summary["slowest"]] == ["app.main", "numpy"]
+    assert summary["packages"]["numpy"] == 0.38
+
+
+def test_imported_matches_submodules():
+    """Test that forbidden packages are detected through their submodules."""
+    entries = parse_importtime(SAMPLE)
+    assert imported(entries, ["numpy", "sklearn", "app"]) == ["numpy", "app"]
+
+
+def test_serving_app_with_a_trained_chef_defers_the_exact_scorer(tmp_path):
+    """Test importing the app with a trained chef: unpickling needs sklearn, the exact engine's metrics don't."""
+    chef = Chef("Import Chef")
+    chef.train(list(synthetic_recipes(100, seed=1)))
+    joblib.dump(chef, tmp_path / "chef_1.joblib")
+
+    entries = measure("app.main", runs=1, models_dir=str(tmp_path))
+    assert imported(entries, ["sklearn", "sklearn.metrics"]) == ["sklearn"]
@@ -0,0 +1,53 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+
+from benchmarks.loadtest import Recorder, RequestFactory, closed_loop, open_loop, summarize
+from app.core.config import settings
+from app.main import app
+
+
+def test_request_factory_bodies_are_valid():
+    """Test that generated bodies satisfy the RecipeRequest constraints."""
+    from app.api.api_v1.recipes import RecipeRequest
+
+    factory = RequestFactory(seed=1)
+    for _ in range(50):
+        body = factory()
+        request = RecipeRequest(**body)
+        assert 1 <= len(request.ingredients) <= 15
+
+
+def test_summarize_counts_errors():
+    """Test throughput and error rate computation."""
+    recorder = Recorder()
+    recorder.record(0.010, 200)
+    recorder.record(0.020, 200)
+    recorder.record(0.030, 500)
+    recorder.record(0.040, None, "ConnectError")
+
+    summary = summarize(recorder, elapsed=2.0)
+    assert summary["requests"] == 4
+    assert summary["throughput_rps"] == 2.0
+    assert summary["error_rate"] == 0.5
+    assert summary["latency"]["max_ms"] == 20.0
+
+
+def test_closed_and_open_loop_against_app():
+    """Test both load modes against the in-process app."""
+    async def drive():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            closed = Recorder()
+            await closed_loop(client, RequestFactory(), closed, concurrency=2, duration=0.2)
+            opened = Recorder()
+            dropped = await open_loop(client, RequestFactory(), opened, rate=50, duration=0.2, max_inflight=10)
+        return closed, opened, dropped
+
+    # The load generator hammers the app from one client; measure it without the per-client limit
+    with patch.object(settings, "RATE_LIMIT_ENABLED", False):
+        closed, opened, dropped = asyncio.run(drive())
+    assert closed.total > 0
+    assert opened.total + dropped > 0
+    assert set(closed.statuses) <= {200}
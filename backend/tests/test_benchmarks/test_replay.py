@@ -0,0 +1,46 @@
+import asyncio
+
+import httpx
+
+from app.core.capture import TrafficCapture
+from app.main import app
+from benchmarks.replay import compare_runs, load_requests, replay, summarize
+
+
+def _write_capture(path):
+    capture = TrafficCapture(str(path), sample_rate=1.0)
+    for i, ingredients in enumerate([["chicken", "rice"], ["eggs"], []]):
+        capture.record({"ingredients": ingredients, "max_results": 5, "variety": 0.0},
+                       0.01 * (i + 1), 200 if ingredients else 422, 0)
+    capture.flush()
+    capture.close()
+
+
+def test_replay_against_app(tmp_path):
+    """Test replaying a capture file against the in-process app."""
+    path = tmp_path / "capture.jsonl"
+    _write_capture(path)
+    records = load_requests(str(path))
+    assert len(records) == 3
+
+    async def drive(speed):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await replay(client, records, speed=speed, concurrency=2)
+
+    fast = asyncio.run(drive(0))
+    timed = asyncio.run(drive(1000))
+    assert [r["index"] for r in fast] == [0, 1, 2]
+    assert [r["status"] for r in fast] == [200, 200, 422]
+
+    summary = summarize(fast)
+    assert summary["requests"] == 3
+    assert summary["ok"] == 2
+    assert summary["status_mismatches"] == 0
+    assert "captured_latency" in summary
+
+    comparison = compare_runs({"results": fast}, {"results": timed})
+    assert comparison["requests"] == 3
+    assert comparison["compared"] == 2
+    assert comparison["identical_results"] == 2
+    assert comparison["mean_overlap"] == 1.0
@@ -0,0 +1,5 @@
+# This file makes Python treat the directory as a package
+
+# pytest --cov=app --cov-report=term-missing tests/test_core/ -v
+
+# -s for prints
@@ -0,0 +1,65 @@
+import json
+
+from app.core.capture import CAPTURE_RECORDS, TrafficCapture, load_capture
+from app.core.metrics import registry
+
+
+def test_capture_disabled_without_path():
+    """Test that capture never samples when no path is configured."""
+    capture = TrafficCapture(None, sample_rate=1.0)
+    assert not capture.enabled
+    assert not any(capture.should_sample() for _ in range(100))
+
+
+def test_capture_writes_json_lines(tmp_path):
+    """Test that recorded requests are appended as JSON lines and load back."""
+    path = tmp_path / "capture" / "requests.jsonl"
+    capture = TrafficCapture(str(path), sample_rate=1.0)
+    assert capture.should_sample()
+    try:
+        capture.record({"ingredients": ["egg"], "max_results": 5, "variety": 0.0}, 0.0125, 200, 3)
+        capture.record({"ingredients": ["milk"], "max_results": 5, "variety": 0.0}, 0.02, 400, 0)
+        capture.flush()
+    finally:
+        capture.close()
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"torn": ')  # a partially written line is skipped on load
+    records = list(load_capture(str(path)))
+    assert [r["body"]["ingredients"] for r in records] == [["egg"], ["milk"]]
+    assert records[0]["latency_ms"] == 12.5
+    assert records[0]["results"] == 3
+    assert records[1]["status"] == 400
+    assert json.loads(path.read_text().splitlines()[0])["pid"] > 0
+
+
+def test_capture_drops_when_queue_full(tmp_path):
+    """Test that a full queue drops records instead of blocking."""
+    capture = TrafficCapture(str(tmp_path / "requests.jsonl"), sample_rate=1.0, max_queue=1)
+    capture._thread = object()  # pretend the writer is running but stalled
+    dropped = registry.value(CAPTURE_RECORDS.name, "dropped") or 0
+    capture.record({"ingredients": ["egg"]}, 0.01, 200, 1)
+    capture.record({"ingredients": ["egg"]}, 0.01, 200, 1)
+    assert registry.value(CAPTURE_RECORDS.name, "dropped") == dropped + 1
+
+
+def test_capture_disabled_when_file_cannot_open(tmp_path, caplog):
+    """Test that an unwritable capture path is logged once and stops sampling."""
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    capture = TrafficCapture(str(blocker / "requests.jsonl"), sample_rate=1.0)
+    dropped = registry.value(CAPTURE_RECORDS.name, "dropped") or 0
+    try:
+        capture.record({"ingredients": ["egg"]}, 0.01, 200, 1)
+        capture._thread.join(timeout=5)
+        capture.flush(timeout=1)
+        assert not capture.enabled
+        assert not capture.should_sample()
+        capture.record({"ingredients": ["milk"]}, 0.01, 200, 1)
+    finally:
+        capture.close()
+
+    assert capture._queue.unfinished_tasks == 0
+    assert registry.value(CAPTURE_RECORDS.name, "dropped") == dropped + 1
+    errors = [r for r in caplog.records if "Traffic capture disabled" in r.getMessage()]
+    assert len(errors) == 1
@@ -0,0 +1,101 @@
+import os
+
+from app.core import concurrency
+from app.core.concurrency import available_cpus, cgroup_cpu_quota, parse_cpu_list, plan_concurrency
+
+
+def test_cgroup_cpu_quota_v2_and_v1(tmp_path):
+    """Test that the CPU quota is read from cgroup v2 cpu.max, falling back to v1 CFS files."""
+    assert cgroup_cpu_quota(tmp_path) is None
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cgroup_cpu_quota(tmp_path) is None
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert cgroup_cpu_quota(tmp_path) == 1.5
+
+    v1 = tmp_path / "v1"
+    (v1 / "cpu").mkdir(parents=True)
+    (v1 / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    (v1 / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert cgroup_cpu_quota(v1) == 2.0
+    (v1 / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert cgroup_cpu_quota(v1) is None
+
+
+def test_available_cpus_capped_by_quota(tmp_path):
+    """Test that a fractional quota rounds up and never exceeds the affinity mask."""
+    (tmp_path / "cpu.max").write_text("50000 100000\n")
+    assert available_cpus(tmp_path) == 1
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert available_cpus(tmp_path) == len(concurrency.affinity_cpus())
+
+
+def test_parse_cpu_list():
+    """Test Linux CPU list parsing."""
+    assert parse_cpu_list("0-3,8, 6") == [0, 1, 2, 3, 6, 8]
+    assert parse_cpu_list("") is None
+    assert parse_cpu_list(None) is None
+
+
+def test_plan_splits_cpus_between_workers():
+    """Test that workers share the CPUs and native pools get the cores left per chef thread."""
+    plan = plan_concurrency(cpus=8, workers=4)
+    assert (plan.chef_threads, plan.native_threads) == (2, 1)
+
+    plan = plan_concurrency(cpus=8, workers=2, chef_threads=2)
+    assert (plan.chef_threads, plan.native_threads) == (2, 2)
+
+    plan = plan_concurrency(cpus=2, workers=4)
+    assert (plan.chef_threads, plan.native_threads) == (1, 1)
+
+    plan = plan_concurrency(cpus=16, workers=1, affinity=[3, 1, 2, 3])
+    assert plan.cpus == 3 and plan.affinity == [1, 2, 3]
+
+
+def test_apply_plan_limits_native_threads(monkeypatch):
+    """Test that applying a plan exports thread limits (keeping explicit ones) and makes it current."""
+    from app.core.metrics import registry
+
+    for name in concurrency.NATIVE_THREAD_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("MKL_NUM_THREADS", "3")
+    monkeypatch.setattr(concurrency, "_plan", None)
+    plan = plan_concurrency(cpus=4, workers=2)
+    try:
+        assert concurrency.apply_plan(plan) is concurrency.current_plan()
+    finally:
+        if concurrency._native_limiter is not None:
+            concurrency._native_limiter.restore_original_limits()
+
+    assert os.environ["OMP_NUM_THREADS"] == "1"
+    assert os.environ["MKL_NUM_THREADS"] == "3"
+    assert 'fridgepal_concurrency_plan{setting="chef_threads"} 2' in registry.render()
+
+
+def test_workers_get_their_own_affinity_slice(tmp_path):
+    """Test that pinned workers claim distinct slots and split the affinity set between them."""
+    from app.core.concurrency import claim_worker_slot, worker_cpus
+
+    assert worker_cpus([0, 1, 2, 3, 4, 5, 6, 7], 4, 1) == [2, 3]
+    assert worker_cpus([0, 1, 2, 3, 8], 2, 1) == [2, 3, 8]
+    assert worker_cpus([4, 5], 4, 3) == [5]
+
+    plan = plan_concurrency(cpus=16, workers=2, affinity=[0, 1, 2, 3], worker_index=1)
+    assert plan.affinity == [2, 3] and plan.chef_threads == 2
+    assert plan_concurrency(cpus=16, workers=2, affinity=[0, 1, 2, 3]).affinity == [0, 1, 2, 3]
+
+    held, claimed, slots = concurrency._slot, [], []
+    try:
+        for _ in range(3):  # As three sibling workers would
+            concurrency._slot = None
+            slots.append(claim_worker_slot(2, str(tmp_path)))
+            claimed.append(concurrency._slot)
+        assert claim_worker_slot(2, str(tmp_path)) is None
+        concurrency._slot = claimed[0]
+        assert claim_worker_slot(2, str(tmp_path)) == 0  # Claimed once per worker
+    finally:
+        concurrency._slot = held
+        for slot in claimed:
+            if slot is not None:
+                slot[1].close()
+    assert slots == [0, 1, None]
@@ -0,0 +1,61 @@
+import json
+import logging
+import queue
+
+from app.core import log
+from app.core.metrics import registry
+
+
+def _record(msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_formatters_include_structured_fields():
+    """Test that extra= fields are rendered by both formatters."""
+    record = _record(chef="Italian Chef", duration_ms=12.5)
+
+    text = log.TextFormatter().format(record)
+    assert "hello world" in text
+    assert "chef=Italian Chef" in text
+    assert "duration_ms=12.5" in text
+
+    entry = json.loads(log.JSONFormatter().format(record))
+    assert entry["message"] == "hello world"
+    assert entry["chef"] == "Italian Chef"
+    assert entry["level"] == "INFO"
+
+
+def test_queue_handler_prepares_and_drops_when_full():
+    """Test that records are pre-rendered for the listener and dropped when the queue is full."""
+    log_queue = queue.Queue(maxsize=1)
+    handler = log.DroppingQueueHandler(log_queue)
+    dropped = registry.value(log.LOG_RECORDS_DROPPED.name) or 0
+
+    handler.handle(_record(chef="A"))
+    handler.handle(_record())
+
+    queued = log_queue.get_nowait()
+    assert queued.getMessage() == "hello world"
+    assert queued.args is None
+    assert queued.chef == "A"
+    assert registry.value(log.LOG_RECORDS_DROPPED.name) == dropped + 1
+
+
+def test_configure_logging_routes_through_listener(capsys):
+    """Test that configured logging is written by the listener thread."""
+    root = logging.getLogger()
+    previous = (list(root.handlers), root.level)
+    try:
+        log.configure_logging(level="INFO", fmt="json", sample_rate=0.0)
+        assert sum(isinstance(h, log.DroppingQueueHandler) for h in root.handlers) == 1
+        logging.getLogger("app.test").info("queued %d", 1, extra={"chef": "B"})
+        log.shutdown_logging()
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+        assert {"message": "queued 1", "chef": "B"}.items() <= lines[-1].items()
+        assert log.sample_request() is False
+    finally:
+        root.handlers[:] = previous[0]
+        root.setLevel(previous[1])
+        log.configure_logging()
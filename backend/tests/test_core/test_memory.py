@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+from app.core import memory
+
+
+def test_sizeof_helpers_count_shared_objects_once():
+    """Test that shared strings are only counted once across containers."""
+    shared = "shared ingredient string"
+    seen = set()
+    first = memory.sizeof_strings([shared, shared], seen)
+    assert first > 0
+    assert memory.sizeof_strings([shared], seen) == 0
+    assert memory.sizeof_dict(None, seen) == 0
+    assert memory.sizeof_collection(None, seen) == 0
+    assert memory.sizeof_array(None) == 0
+
+
+def test_allocation_diff_reports_growth():
+    """Test that allocations kept during the window are attributed to their site."""
+    kept = []
+
+    def allocate():
+        for _ in range(200):
+            kept.append(bytearray(10_000))
+
+    timer = threading.Timer(0.02, allocate)
+    timer.start()
+    result = memory.allocation_diff(0.2, top=10)
+    timer.join()
+
+    assert result["total_size_diff"] > 1_000_000
+    assert any("test_memory.py" in site["site"] for site in result["sites"])
+
+
+def test_allocation_diff_is_exclusive():
+    """Test that overlapping tracemalloc windows are rejected."""
+    memory._trace_lock.acquire()
+    try:
+        with pytest.raises(memory.TracingBusyError):
+            memory.allocation_diff(0.01)
+    finally:
+        memory._trace_lock.release()
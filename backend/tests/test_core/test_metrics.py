@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsRegistry
+from app.main import app
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_counter_aggregates_across_threads(registry):
+    """Test that per-thread shards are summed on scrape, including exited threads."""
+    counter = registry.counter("test_total", "Test counter", ("chef",))
+
+    def work():
+        for _ in range(1000):
+            counter.inc("a")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc("b", amount=2)
+
+    assert registry.value("test_total", "a") == 4000
+    assert registry.value("test_total", "b") == 2
+    # Dead thread shards are folded into the retired totals
+    assert len(registry._shards) == 1
+    assert registry.value("test_total", "a") == 4000
+
+
+def test_gauge_inc_and_dec_in_different_threads(registry):
+    """Test that a gauge incremented and decremented in different threads nets out."""
+    gauge = registry.gauge("test_depth", "Test gauge")
+    gauge.inc()
+    gauge.inc()
+    thread = threading.Thread(target=gauge.dec)
+    thread.start()
+    thread.join()
+    assert registry.value("test_depth") == 1
+
+
+def test_histogram_render(registry):
+    """Test histogram rendering with cumulative buckets, sum and count."""
+    histogram = registry.histogram("test_seconds", "Test histogram", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    text = registry.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_seconds_sum{route="/a"} 5.55' in text
+    assert 'test_seconds_count{route="/a"} 3' in text
+
+
+def test_label_validation_and_escaping(registry):
+    """Test that label arity is enforced and values are escaped."""
+    counter = registry.counter("test_labels_total", "Test", ("name",))
+    with pytest.raises(ValueError):
+        counter.inc()
+    counter.inc('Chef "1"\n')
+    assert 'test_labels_total{name="Chef \\"1\\"\\n"} 1' in registry.render()
+
+
+def test_collector_errors_are_skipped(registry):
+    """Test that a failing collector doesn't break the scrape."""
+    def broken():
+        raise RuntimeError("boom")
+
+    registry.register_collector("broken_metric", "gauge", "Broken", broken)
+    registry.register_collector("ok_metric", "gauge", "Ok", lambda: [("ok_metric", {"x": "1"}, 3)])
+    text = registry.render()
+    assert "broken_metric" not in text
+    assert 'ok_metric{x="1"} 3' in text
+
+
+def test_metrics_endpoint():
+    """Test that /metrics serves request, chef and process metrics."""
+    client = TestClient(app)
+    client.get("/api/v1/recipes/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'fridgepal_http_request_duration_seconds_count{method="GET",route="/api/v1/recipes/health"' in text
+    assert "# TYPE fridgepal_chef_scoring_duration_seconds histogram" in text
+    assert "fridgepal_http_requests_in_flight" in text
+    assert "process_resident_memory_bytes" in text
+
+
+def test_request_latency_series_are_bounded_by_routes():
+    """Test that preflights and 404s on arbitrary paths share one route label."""
+    client = TestClient(app)
+    preflight = {"Origin": "http://localhost:3000", "Access-Control-Request-Method": "POST"}
+
+    def series():
+        text = client.get("/metrics").text
+        return {line.split(" ")[0] for line in text.splitlines()
+                if line.startswith("fridgepal_http_request_duration_seconds_count")}
+
+    client.options("/junk-warmup", headers=preflight)
+    client.get("/junk-warmup")
+    before = series()
+    for i in range(20):
+        client.options(f"/junk-{i}", headers=preflight)
+        client.get(f"/junk-{i}")
+    after = series()
+
+    assert after == before
+    assert not any("junk" in line for line in after)
+    assert any('route="<unmatched>"' in line for line in after)
+    client.get("/docs")
+    assert any('route="/docs"' in line for line in series())
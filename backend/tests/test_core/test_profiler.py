@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from app.core import profiler
+
+
+def _busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_collects_collapsed_stacks():
+    """Test that a busy thread shows up in the collapsed stacks."""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy worker")
+    worker.start()
+    try:
+        sampler = profiler.profile(0.2, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert sampler.samples > 0
+    output = sampler.collapsed()
+    busy_lines = [line for line in output.splitlines() if "_busy_loop (test_profiler.py)" in line]
+    assert busy_lines
+    stack, count = busy_lines[0].rsplit(" ", 1)
+    assert stack.startswith("busy_worker;")
+    assert int(count) > 0
+
+
+def test_sampler_skips_idle_threads_by_default():
+    """Test that threads parked in waits are excluded unless requested."""
+    event = threading.Event()
+    waiter = threading.Thread(target=event.wait, name="waiter")
+    waiter.start()
+    try:
+        quiet = profiler.StackSampler()
+        quiet.sample_once()
+        noisy = profiler.StackSampler(include_idle=True)
+        noisy.sample_once()
+    finally:
+        event.set()
+        waiter.join()
+
+    assert not any(stack.startswith("waiter;") for stack in quiet.stacks)
+    assert any(stack.startswith("waiter;") for stack in noisy.stacks)
+
+
+def test_concurrent_profiles_are_rejected():
+    """Test that only one profile can run per worker at a time."""
+    started = threading.Event()
+    result = {}
+
+    def long_profile():
+        started.set()
+        result["sampler"] = profiler.profile(0.3)
+
+    thread = threading.Thread(target=long_profile)
+    thread.start()
+    started.wait()
+    time.sleep(0.05)
+    with pytest.raises(profiler.ProfilerBusyError):
+        profiler.profile(0.01)
+    thread.join()
+    assert result["sampler"].samples > 0
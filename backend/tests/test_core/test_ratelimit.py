@@ -0,0 +1,81 @@
+import pytest
+
+from app.core.ratelimit import (
+    AdmissionController,
+    OverloadedError,
+    RateLimiter,
+    TokenBucket,
+    retry_after_seconds,
+)
+
+
+def test_token_bucket_refills_over_time():
+    """Test that a bucket allows a burst, then refills at its rate."""
+    bucket = TokenBucket(rate=2.0, burst=3, now=0.0)
+    assert [bucket.take(0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0.0
+    assert bucket.take(0.5) > 0
+
+
+def test_rate_limiter_is_per_client_and_bounded():
+    """Test that clients have separate buckets and old clients are evicted."""
+    limiter = RateLimiter(rate=1.0, burst=1, max_clients=2)
+    assert limiter.check("a", now=0.0) == 0.0
+    assert limiter.check("a", now=0.0) == pytest.approx(1.0)
+    assert limiter.check("b", now=0.0) == 0.0
+    assert limiter.check("c", now=0.0) == 0.0
+    # "a" was least recently seen and got evicted, so it starts with a full bucket
+    assert limiter.check("a", now=0.0) == 0.0
+
+
+def test_rate_limits_must_be_positive(monkeypatch):
+    """Test that a zero rate is rejected up front instead of dividing by zero per request."""
+    from app.core.config import Settings
+
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0.0, burst=1)
+    with pytest.raises(ValueError):
+        RateLimiter(rate=1.0, burst=0)
+    monkeypatch.setenv("RATE_LIMIT_PER_SECOND", "0")
+    with pytest.raises(ValueError, match="RATE_LIMIT_ENABLED"):
+        Settings()
+
+
+def test_retry_after_rounds_up():
+    """Test Retry-After is at least one whole second."""
+    assert retry_after_seconds(0.01) == 1
+    assert retry_after_seconds(2.1) == 3
+
+
+def test_admission_sheds_on_queue_and_latency():
+    """Test that admission rejects when the queue is full or the expected wait is too long."""
+    controller = AdmissionController(concurrency=2, latency_target=1.0, max_queue=1)
+    controller.admit()
+    controller.admit()
+    controller.admit()  # queued behind the two running requests
+    with pytest.raises(OverloadedError) as exc:
+        controller.admit()
+    assert exc.value.reason == "queue_full"
+    controller.release()
+
+    controller.service_time = 3.0
+    with pytest.raises(OverloadedError) as exc:
+        controller.admit()
+    assert exc.value.reason == "latency"
+    assert exc.value.retry_after == pytest.approx(1.5)
+
+    controller.release()
+    controller.release()
+    assert controller.estimated_wait() == 0.0
+    controller.admit()
+    controller.release()
+
+
+def test_admission_slot_tracks_service_time():
+    """Test that slot usage updates the smoothed service time."""
+    controller = AdmissionController(concurrency=1, latency_target=1.0, max_queue=4)
+    with controller.slot():
+        pass
+    assert controller.service_time is not None
+    assert controller.service_time < 1.0
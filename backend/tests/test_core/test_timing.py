@@ -0,0 +1,59 @@
+from app.core import timing
+from app.models.chef import Chef
+from app.models.recipe import Recipe
+from app.services.chef_service import ChefService
+from unittest.mock import patch
+
+
+def test_marker_is_noop_without_active_timings():
+    """Test that stage markers do nothing when no timings are active."""
+    assert timing.current() is None
+    timer = timing.start()
+    timer.mark("stage")  # Should not raise
+
+
+def test_stage_timings_header_and_debug_dict():
+    """Test Server-Timing formatting with request stages and per-chef maxima."""
+    timings = timing.StageTimings()
+    timings.add("service", 0.010)
+    timings.add("service", 0.005)
+    for name, seconds in (("Chef A", 0.002), ("Chef B", 0.004)):
+        chef_timings = timing.StageTimings()
+        chef_timings.add("cosine", seconds)
+        timings.add_chef(name, chef_timings)
+
+    header = timings.to_header()
+    assert "service;dur=15.00" in header
+    assert 'chef-cosine;dur=4.00;desc="max of 2 chefs"' in header
+
+    debug = timings.as_dict()
+    assert debug["stages_ms"]["service"] == 15.0
+    assert debug["chefs_ms"]["Chef A"]["cosine"] == 2.0
+
+
+def test_chef_service_collects_per_chef_stages():
+    """Test that chef stages recorded in worker threads reach the request timings."""
+    chef = Chef("Timed Chef")
+    chef.train([
+        Recipe(id=1, title="Pasta", ingredients="pasta, eggs, cheese",
+               instructions="Cook", NER_ingredients="pasta, eggs, cheese"),
+        Recipe(id=2, title="Salad", ingredients="lettuce, tomato, oil",
+               instructions="Mix", NER_ingredients="lettuce, tomato, oil"),
+    ])
+
+    with patch.object(ChefService, "_load_chefs"):
+        ChefService._instance = None
+        service = ChefService()
+    service._chefs = [chef]
+
+    timings = timing.StageTimings()
+    token = timing.activate(timings)
+    try:
+        service.get_recommendations(["pasta", "eggs"], top_n=2)
+    finally:
+        timing.deactivate(token)
+        ChefService._instance = None
+
+    assert {"chefs", "merge", "cleanup"} <= set(timings.stages)
+    chef_stages = timings.chefs["Timed Chef"].stages
+    assert {"normalize", "overlap", "transform", "cosine", "topk", "results"} <= set(chef_stages)
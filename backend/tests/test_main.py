@@ -141,3 +141,19 @@ def test_application_initialization():
     assert cors_options["allow_headers"] == ["*"]
     assert cors_options["expose_headers"] == ["*"]
     assert cors_options["max_age"] == 600
+
+def test_middleware_stack_is_pure_asgi():
+    """Test that no BaseHTTPMiddleware wraps requests (it buffers streams and adds a task per request)."""
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    assert all(middleware.cls is not BaseHTTPMiddleware for middleware in fastapi_app.user_middleware)
+
+def test_cors_preflight_rejects_unknown_origin():
+    """Test that preflight requests from origins outside the allow list are refused."""
+    client = TestClient(fastapi_app)
+    response = client.options(
+        "/api/v1/recipes",
+        headers={**TEST_HEADERS, "Origin": "http://evil.example"}
+    )
+    assert response.status_code == 400
+    assert "access-control-allow-origin" not in response.headers
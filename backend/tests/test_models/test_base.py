@@ -26,3 +26,14 @@ def test_base_model_to_dict():
     
     # Verify the dictionary has the correct number of keys
     assert len(result) == 2
+
+def test_base_model_to_dict_with_slots():
+    """Test that to_dict() also reads __slots__ attributes"""
+    class SlottedModel(BaseModel):
+        __slots__ = ("name", "_hidden")
+
+        def __init__(self):
+            self.name = "slotted"
+            self._hidden = True
+
+    assert SlottedModel().to_dict() == {"name": "slotted"}
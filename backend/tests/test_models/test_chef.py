@@ -346,3 +346,54 @@ def test_chef_get_recommendations_edge_cases():
     assert empty_chef.get_recommendations(["pasta"], top_n=2) == []
     
     # Test with error in TF-IDF transformation is removed as it's already covered by other tests
+
+def test_chef_memory_usage():
+    """Test the per-component memory accounting of a trained chef"""
+    chef = Chef("Memory Chef")
+    chef.train(SAMPLE_RECIPES[:2])
+
+    report = chef.memory_usage()
+    for key in ("tfidf_data", "tfidf_indices", "tfidf_indptr", "vocabulary", "idf",
+                "recipe_objects", "recipe_strings"):
+        assert report[key] > 0, f"Expected bytes for {key}"
+    assert report["tfidf_data"] == chef.tfidf_matrix.data.nbytes
+    assert report["total"] == sum(v for k, v in report.items() if k != "total")
+
+    # Untrained chefs report zeros instead of failing
+    empty_report = Chef("Empty Chef").memory_usage()
+    assert empty_report["tfidf_data"] == 0
+    assert empty_report["recipe_strings"] == 0
+
+
+def test_chef_sparse_engine_matches_exact():
+    """Test that the sparse dot-product engine ranks and scores like the exact engine."""
+    chef = Chef("Engine Chef")
+    chef.train(SAMPLE_RECIPES[:2])
+
+    exact = chef.get_recommendations(["pasta", "eggs", "onion"], top_n=2, engine="exact")
+    sparse = chef.get_recommendations(["pasta", "eggs", "onion"], top_n=2, engine="sparse")
+
+    assert [r["id"] for r in sparse] == [r["id"] for r in exact]
+    for a, b in zip(exact, sparse):
+        assert b["similarity_score"] == pytest.approx(a["similarity_score"])
+
+    with pytest.raises(ValueError, match="Unknown scoring engine"):
+        chef.get_recommendations(["pasta"], engine="missing")
+
+def test_chef_float32_scores_match_float64():
+    """Test that a float32 chef keeps float32 weights and scores within tolerance of float64."""
+    chef = Chef("Float Chef")
+    chef.train(SAMPLE_RECIPES)
+    query = ["pasta", "eggs", "chicken", "curry powder"]
+    expected = chef.get_recommendations(query, top_n=4, engine="exact")
+    float64_bytes = chef.memory_usage()["tfidf_data"]
+
+    chef.to_float32()
+    assert chef.tfidf_matrix.dtype == np.float32
+    assert chef.vectorizer.idf_.dtype == np.float32
+    assert chef.memory_usage()["tfidf_data"] == float64_bytes // 2
+    for engine in ("exact", "sparse"):
+        results = chef.get_recommendations(query, top_n=4, engine=engine)
+        assert [r["id"] for r in results] == [r["id"] for r in expected]
+        for a, b in zip(expected, results):
+            assert b["similarity_score"] == pytest.approx(a["similarity_score"], abs=1e-6)
@@ -0,0 +1,57 @@
+import ast
+import json
+from collections import Counter
+
+import pytest
+
+from app.models.Training.generate_corpus import CorpusGenerator, format_ner, write_csv
+from app.models.Training.train_chefs import load_and_preprocess_data
+
+
+def test_rows_have_recipenlg_columns():
+    """Test that generated rows carry the RecipeNLG columns and JSON lists"""
+    rows = list(CorpusGenerator(seed=1, vocab_size=500).rows(50, start_id=10))
+    assert len(rows) == 50
+    assert rows[0][""] == "10"
+    for row in rows:
+        assert set(row) == {"", "title", "ingredients", "directions", "link", "source", "NER"}
+        assert isinstance(json.loads(row["ingredients"]), list)
+        assert isinstance(json.loads(row["directions"]), list)
+
+
+def test_ner_formats():
+    """Test each NER format and the format mix"""
+    items = ["salt", "black pepper"]
+    assert json.loads(format_ner(items, "json")) == items
+    assert ast.literal_eval(format_ner(items, "python")) == items
+    assert format_ner(items, "comma") == "salt, black pepper"
+    with pytest.raises(ValueError):
+        format_ner(items, "xml")
+    with pytest.raises(ValueError):
+        CorpusGenerator(ner_formats={"xml": 1.0})
+
+    rows = CorpusGenerator(seed=2, ner_formats={"comma": 1.0}).rows(20)
+    assert all(not row["NER"].startswith("[") for row in rows)
+
+
+def test_ingredients_are_zipf_distributed():
+    """Test that a few head ingredients dominate while the tail is long"""
+    counts = Counter()
+    for recipe in CorpusGenerator(seed=3, vocab_size=2000, ner_formats={"json": 1.0}).recipes(2000):
+        ner = json.loads(recipe.NER_ingredients)
+        assert len(set(ner)) == len(ner)
+        counts.update(ner)
+    most_common = counts.most_common()
+    assert most_common[0][1] > 10 * most_common[len(most_common) // 2][1]
+    assert len(counts) > 500
+
+
+def test_csv_is_loadable_for_training(tmp_path):
+    """Test that the streamed CSV is accepted by load_and_preprocess_data"""
+    path = tmp_path / "recipes.csv"
+    written = write_csv(str(path), CorpusGenerator(seed=4).rows(120))
+    assert written == 120
+
+    df = load_and_preprocess_data(str(path), sample_size=100)
+    assert len(df) == 100
+    assert list(df.columns) == ["title", "ingredients", "directions", "NER"]
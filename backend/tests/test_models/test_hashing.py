@@ -0,0 +1,89 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from app.models.chef import Chef
+from app.models.hashing import HashingChef, HashingTfidfVectorizer
+from app.models.Training.generate_corpus import CorpusGenerator, write_csv
+from app.models.Training.train_chefs import create_chefs, load_and_preprocess_data
+from benchmarks.common import query_sets, synthetic_recipes
+
+DOCUMENTS = ["eggs flour butter sugar", "olive oil garlic basil", "flour water salt yeast eggs",
+             "butter garlic shrimp lemon", "sugar eggs milk vanilla"]
+
+
+def test_hashing_vectorizer_fit_and_transform():
+    """Test IDF, normalization and that chunked fitting matches one pass."""
+    vectorizer = HashingTfidfVectorizer(n_features=2 ** 12)
+    matrix = vectorizer.fit_transform(DOCUMENTS)
+    assert matrix.shape == (5, 2 ** 12)
+    np.testing.assert_allclose(np.sqrt(matrix.multiply(matrix).sum(axis=1)).A.ravel(), 1.0)
+    # A training document transforms to its own row
+    np.testing.assert_allclose(vectorizer.transform([DOCUMENTS[2]]).toarray(), matrix[2].toarray())
+    # Smoothed IDF: ln((1 + n) / (1 + df)) + 1
+    eggs = vectorizer.transform(["eggs"]).indices[0]
+    assert vectorizer.document_frequency[eggs] == 3
+    assert vectorizer.idf_[eggs] == pytest.approx(np.log(6 / 4) + 1)
+
+    chunked = HashingTfidfVectorizer(n_features=2 ** 12).fit_transform(DOCUMENTS, chunk_size=2)
+    assert (abs(chunked - matrix) > 1e-12).nnz == 0
+
+    streamed = HashingTfidfVectorizer(n_features=2 ** 12).partial_fit(DOCUMENTS[:3]).partial_fit(DOCUMENTS[3:])
+    np.testing.assert_array_equal(streamed.idf_, vectorizer.idf_)
+
+
+def test_hashing_vectorizer_max_df_and_collisions():
+    """Test that buckets in too many documents get no weight and collisions are counted."""
+    vectorizer = HashingTfidfVectorizer(n_features=2 ** 12, max_df=0.5)
+    matrix = vectorizer.fit_transform(DOCUMENTS)
+    eggs = vectorizer._counts(["eggs"]).indices[0]  # In 3 of 5 documents
+    assert vectorizer.idf_[eggs] == 0
+    assert eggs not in matrix.indices
+
+    assert HashingTfidfVectorizer(n_features=1).collision_rate(["a", "b"]) == 1.0
+    assert HashingTfidfVectorizer(n_features=2 ** 20).collision_rate(["eggs", "flour", "salt"]) == 0.0
+    assert HashingTfidfVectorizer(n_features=2).collision_rate([]) == 0.0
+
+
+def test_hashing_chef_recommendations_track_tfidf_chef():
+    """Test that a HashingChef has no vocabulary and, without collisions, ranks as the TF-IDF chef."""
+    recipes = list(synthetic_recipes(400, seed=5))
+    chef, hashed = Chef("Reference"), HashingChef("Hashed", n_features=2 ** 22)
+    chef.train(recipes)
+    hashed.train(recipes)
+    assert hashed.vectorizer.collision_rate(list(chef.vectorizer.vocabulary_)) == 0.0
+
+    assert not hasattr(hashed.vectorizer, "vocabulary_")
+    assert hashed.query_encoder() is None
+    assert hashed.memory_usage()["vocabulary"] == 0
+    loaded = pickle.loads(pickle.dumps(hashed))
+
+    # Query terms unseen in training get no weight, as out-of-vocabulary terms in TfidfVectorizer
+    queries = query_sets(20, 4, seed=6) + [["eggs", "unobtainium"]]
+    for query in queries:
+        expected = chef.get_recommendations(query, top_n=10, engine="sparse")
+        results = loaded.get_recommendations(query, top_n=10, engine="sparse")
+        assert results == hashed.get_recommendations(query, top_n=10, engine="sparse")
+        scores = [r["similarity_score"] for r in expected]
+        assert [r["similarity_score"] for r in results] == pytest.approx(scores, abs=1e-9)
+        by_id = {r["id"]: r for r in expected}
+        for result in results:
+            if result["id"] not in by_id:  # Only a different choice among equal scores
+                assert result["similarity_score"] == pytest.approx(scores[-1], abs=1e-9)
+
+    hashed.quantize("uint8")
+    assert hashed.get_recommendations(query_sets(1, 4, seed=6)[0], top_n=3, engine="fused")
+
+
+def test_create_chefs_hashing_mode(tmp_path):
+    """Test that train_chefs can build HashingChefs."""
+    path = tmp_path / "recipes.csv"
+    write_csv(str(path), CorpusGenerator(seed=4).rows(60))
+    df = load_and_preprocess_data(str(path), sample_size=60)
+
+    chefs = create_chefs(df, num_chefs=2, recipes_per_chef=30, mode="hashing", n_features=2 ** 14)
+    assert [type(chef) for chef in chefs] == [HashingChef, HashingChef]
+    assert chefs[0].tfidf_matrix.shape == (30, 2 ** 14)
+    with pytest.raises(ValueError):
+        create_chefs(df, num_chefs=1, recipes_per_chef=30, mode="bm25")
@@ -0,0 +1,124 @@
+import copy
+
+import numpy as np
+import pytest
+
+from app.models.chef import Chef, ingredient_documents
+from app.models.hashing import HashingChef
+from app.models.recipe_store import RecipeStore
+from benchmarks.common import query_sets, synthetic_recipes
+
+RECIPES = list(synthetic_recipes(300, seed=11))
+INITIAL, ADDED = RECIPES[:240], RECIPES[240:]
+
+
+def _rows(store):
+    return [(r.id, r.title, r.ingredients, r.instructions, r.NER_ingredients, r.cuisine) for r in store]
+
+
+def test_append_matches_store_built_at_once():
+    """Test that an appended store has the same rows, overlaps and postings as a full build."""
+    full = RecipeStore.from_recipes(RECIPES)
+    store = RecipeStore.from_recipes(INITIAL)
+    store.ner_postings()
+    appended = store.append(ADDED)
+
+    assert len(store) == len(INITIAL)  # The original is unchanged
+    assert _rows(appended) == _rows(full)
+    for query in query_sets(10, 4, seed=12):
+        query = set(query)
+        np.testing.assert_array_equal(appended.overlap_scores(query), full.overlap_scores(query))
+
+    # Incrementally merged postings equal ones built from scratch
+    offsets, rows = appended.ner_postings()
+    appended._ner_postings = None
+    rebuilt_offsets, rebuilt_rows = appended.ner_postings()
+    np.testing.assert_array_equal(offsets, rebuilt_offsets)
+    np.testing.assert_array_equal(rows, rebuilt_rows)
+    assert store.append([])._ner_postings is not None
+
+
+def test_append_to_externalized_store(tmp_path):
+    """Test that existing rows are still read from disk and new ones from memory."""
+    store = RecipeStore.from_recipes(INITIAL)
+    store.externalize(tmp_path / "chef.rtext", block_rows=16)
+    appended = store.append(ADDED)
+
+    assert appended.external is store.external
+    assert _rows(appended) == _rows(RecipeStore.from_recipes(RECIPES))
+
+
+def test_add_recipes_matches_refit_with_the_same_vocabulary():
+    """Test that add_recipes + refresh_idf equals weighting the whole corpus from scratch."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    chef = Chef("Incremental")
+    chef.train(INITIAL)
+    vocabulary = dict(chef.vectorizer.vocabulary_.items())
+    reference = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), vocabulary=vocabulary)
+    expected = reference.fit_transform(ingredient_documents(RECIPES))
+
+    chef.add_recipes(ADDED, refresh_idf=True)
+    assert chef.tfidf_matrix.shape == expected.shape
+    assert abs(chef.tfidf_matrix - expected).max() < 1e-12
+    np.testing.assert_allclose(chef.vectorizer.idf_, reference.idf_)
+    assert chef.stale_rows == 0
+    assert len(chef.recipes) == len(RECIPES)
+
+    query = query_sets(1, 4, seed=13)[0]
+    exact = chef.get_recommendations(query, top_n=5)
+    fused = chef.get_recommendations(query, top_n=5, engine="fused")
+    assert [r["id"] for r in exact] == [r["id"] for r in fused]
+    assert [r["similarity_score"] for r in exact] == pytest.approx([r["similarity_score"] for r in fused])
+
+
+def test_add_recipes_defers_the_idf_refresh():
+    """Test that small additions keep the IDF until the stale fraction is exceeded."""
+    chef = Chef("Deferred")
+    chef.train(INITIAL)
+    idf = chef.vectorizer.idf_.copy()
+    served = copy.copy(chef)
+
+    chef.add_recipes(ADDED[:5])
+    assert chef.stale_rows == 5
+    np.testing.assert_array_equal(chef.vectorizer.idf_, idf)
+    # New rows are weighted with the current IDF
+    rows = chef.vectorizer.transform(ingredient_documents(ADDED[:5]))
+    assert abs(chef.tfidf_matrix[-5:] - rows).max() < 1e-12
+
+    chef.add_recipes(ADDED[5:])  # 60 of 300 rows: above IDF_REFRESH_FRACTION
+    assert chef.stale_rows == 0
+    assert not np.array_equal(chef.vectorizer.idf_, idf)
+    # The copy taken before the update still serves the original model
+    assert served.tfidf_matrix.shape[0] == len(INITIAL)
+    np.testing.assert_array_equal(served.vectorizer.idf_, idf)
+
+
+def test_add_recipes_to_hashing_chef_matches_training():
+    """Test that a HashingChef extended incrementally equals one trained on everything."""
+    chef, expected = HashingChef("Incremental", n_features=2 ** 16), HashingChef("Full", n_features=2 ** 16)
+    chef.train(INITIAL)
+    expected.train(RECIPES)
+    chef.add_recipes(ADDED, refresh_idf=True)
+
+    assert abs(chef.tfidf_matrix - expected.tfidf_matrix).max() < 1e-12
+    np.testing.assert_allclose(chef.vectorizer.idf_, expected.vectorizer.idf_)
+    np.testing.assert_array_equal(chef.vectorizer.document_frequency, expected.vectorizer.document_frequency)
+    assert chef.vectorizer.n_documents == len(RECIPES)
+
+
+def test_add_recipes_edge_cases():
+    """Test untrained, float32, column-major and quantized chefs."""
+    chef = Chef("Untrained")
+    chef.add_recipes(INITIAL)
+    assert chef.tfidf_matrix.shape[0] == len(INITIAL)
+
+    chef.to_float32()
+    chef.column_major()
+    chef.add_recipes(ADDED, refresh_idf=True)
+    assert chef.tfidf_matrix.format == "csc"
+    assert chef.tfidf_matrix.dtype == np.float32 and chef.vectorizer.idf_.dtype == np.float32
+
+    chef.quantize("uint8")
+    with pytest.raises(ValueError):
+        chef.add_recipes(ADDED)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from app.models import kernels
+from app.models.chef import Chef
+from benchmarks.common import query_sets, synthetic_recipes
+
+
+def _postings(seed=0, n_rows=500):
+    rng = np.random.default_rng(seed)
+    cosine_rows = np.concatenate([np.sort(rng.choice(n_rows, 60, replace=False)) for _ in range(4)]).astype(np.int32)
+    cosine_values = rng.random(len(cosine_rows))
+    overlap_rows = np.concatenate([np.sort(rng.choice(n_rows, 80, replace=False)) for _ in range(3)]).astype(np.int32)
+    ner_offsets = np.concatenate(([0], np.cumsum(rng.integers(0, 6, n_rows))))
+    return cosine_rows, cosine_values, overlap_rows, ner_offsets
+
+
+def _dense_reference(cosine_rows, cosine_values, overlap_rows, ner_offsets, cosine_weight, k):
+    n_rows = len(ner_offsets) - 1
+    cosine = np.bincount(cosine_rows, weights=cosine_values, minlength=n_rows)
+    sizes = np.diff(ner_offsets)
+    overlap = np.divide(np.bincount(overlap_rows, minlength=n_rows), sizes,
+                        out=np.zeros(n_rows), where=sizes > 0)
+    hybrid = cosine_weight * cosine + (1 - cosine_weight) * overlap
+    top = [row for row in np.lexsort((-np.arange(n_rows), -hybrid))[:k] if hybrid[row] > 0]
+    return np.array(top), hybrid[top], cosine[top], overlap[top]
+
+
+def test_gather_postings():
+    """Test that posting positions cover exactly the requested lists, in order."""
+    indptr = np.array([0, 3, 3, 7, 9])
+    positions, lengths = kernels.gather_postings(indptr, np.array([2, 0, 1]))
+    assert positions.tolist() == [3, 4, 5, 6, 0, 1, 2]
+    assert lengths.tolist() == [4, 3, 0]
+    assert kernels.gather_postings(indptr, np.array([1]))[0].tolist() == []
+
+
+@pytest.mark.parametrize("reduce", [kernels._reduce_top_k_numpy, kernels._reduce_top_k_loop])
+@pytest.mark.parametrize("cosine_weight,k", [(0.7, 10), (0.0, 5), (1.0, 1000)])
+def test_reductions_match_dense_scoring(reduce, cosine_weight, k):
+    """Test that both reductions return the dense path's top-k, scores and components."""
+    postings = _postings()
+    expected = _dense_reference(*postings, cosine_weight, k)
+    actual = reduce(*postings, cosine_weight, k)
+    assert actual[0].tolist() == expected[0].tolist()
+    for a, b in zip(actual[1:], expected[1:]):
+        np.testing.assert_allclose(a, b, rtol=1e-12)
+
+
+def test_fused_top_k_jit_requires_numba():
+    """Test that asking for the JIT kernel without numba fails clearly, and k=0 returns nothing."""
+    postings = _postings()
+    assert len(kernels.fused_top_k(*postings, 0.7, 0)[0]) == 0
+    if kernels.jit_kernel() is None:
+        with pytest.raises(ImportError):
+            kernels.fused_top_k(*postings, 0.7, 5, jit=True)
+    else:
+        rows = kernels.fused_top_k(*postings, 0.7, 5, jit=True)[0]
+        assert rows.tolist() == kernels.fused_top_k(*postings, 0.7, 5, jit=False)[0].tolist()
+
+
+def test_chef_fused_engine_matches_sparse():
+    """Test that the fused engine returns the sparse engine's recommendations, also when quantized."""
+    chef = Chef("Fused Chef")
+    chef.train(list(synthetic_recipes(400, seed=7)))
+    queries = query_sets(15, 4, seed=8) + [["not an ingredient"], []]
+
+    for query in queries:
+        for cosine_weight in (0.7, 0.0):
+            expected = chef.get_recommendations(query, top_n=8, cosine_weight=cosine_weight, engine="sparse")
+            results = chef.get_recommendations(query, top_n=8, cosine_weight=cosine_weight, engine="fused")
+            scores = [r["similarity_score"] for r in expected]
+            assert [r["similarity_score"] for r in results] == pytest.approx(scores, abs=1e-12)
+            # Same recipes, up to the order of (and choice among) equal scores
+            by_id = {r["id"]: r for r in expected}
+            for result in results:
+                if result["id"] in by_id:
+                    assert result["score_components"] == pytest.approx(
+                        by_id[result["id"]]["score_components"], abs=1e-12)
+                else:
+                    assert result["similarity_score"] == pytest.approx(scores[-1], abs=1e-12)
+    # Queries never change the model; a column-major one gives the same results
+    assert chef.tfidf_matrix.format == "csr"
+    expected = chef.get_recommendations(queries[0], top_n=8, engine="fused")
+    chef.column_major()
+    assert chef.tfidf_matrix.format == "csc"
+    assert chef.get_recommendations(queries[0], top_n=8, engine="fused") == expected
+    assert chef.get_recommendations(queries[0], engine="exact")
+
+    chef.quantize("uint8")
+    for query in queries[:5]:
+        expected = chef.get_recommendations(query, top_n=8, engine="quantized")
+        results = chef.get_recommendations(query, top_n=8, engine="fused")
+        assert [r["similarity_score"] for r in results] == pytest.approx(
+            [r["similarity_score"] for r in expected], abs=1e-6)
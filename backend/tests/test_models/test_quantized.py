@@ -0,0 +1,93 @@
+import pickle
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from app.models.chef import Chef
+from app.models.quantized import QuantizedMatrix, parse_quantization
+from benchmarks.common import query_sets, synthetic_recipes
+
+
+def _matrix(seed=0):
+    rng = np.random.default_rng(seed)
+    matrix = sparse.random(200, 50, density=0.1, format="csr", random_state=seed)
+    matrix.data = rng.random(matrix.nnz)
+    matrix.data[matrix.indptr[3]:matrix.indptr[4]] = 0  # An empty row
+    matrix.eliminate_zeros()
+    return matrix
+
+
+@pytest.mark.parametrize("dtype,scale,tolerance", [
+    ("uint8", "term", 0.02), ("uint8", "row", 0.02), ("float16", "term", 0.005),
+])
+def test_quantized_dot_matches_float(dtype, scale, tolerance):
+    """Test that scores from quantized postings stay close to the float mat-vec."""
+    matrix = _matrix()
+    quantized = QuantizedMatrix.from_sparse(matrix, dtype=dtype, scale=scale)
+    assert quantized.dtype == dtype
+    assert quantized.nnz == matrix.nnz
+    assert quantized.shape == matrix.shape
+
+    query_indices = np.array([1, 7, 8, 30, 49])
+    query_values = np.array([0.5, 0.2, 0.9, 0.1, 0.3])
+    dense = np.zeros(matrix.shape[1])
+    dense[query_indices] = query_values
+    expected = matrix @ dense
+
+    scores = quantized.dot(query_indices, query_values)
+    assert scores.dtype == np.float32
+    assert np.abs(scores - expected).max() < tolerance
+    assert scores[3] == 0
+
+
+def test_quantized_uint8_memory_and_validation():
+    """Test that uint8 weights take a byte per entry and reject negative or unknown formats."""
+    matrix = _matrix()
+    quantized = QuantizedMatrix.from_sparse(matrix, dtype="uint8", scale="term")
+    usage = quantized.memory_usage()
+    assert usage["data"] == matrix.nnz + matrix.shape[1] * 4
+    # Small weights keep their posting instead of rounding to zero
+    assert quantized.data.min() >= 1
+    assert pickle.loads(pickle.dumps(quantized)).dot([1], [1.0]).tolist() == quantized.dot([1], [1.0]).tolist()
+
+    with pytest.raises(ValueError):
+        QuantizedMatrix.from_sparse(-matrix, dtype="uint8")
+    with pytest.raises(ValueError):
+        QuantizedMatrix.from_sparse(matrix, dtype="int4")
+
+
+def test_parse_quantization():
+    """Test parsing of MODEL_QUANTIZATION values."""
+    assert parse_quantization("uint8") == ("uint8", "term")
+    assert parse_quantization("uint8-row") == ("uint8", "row")
+    assert parse_quantization("float16") == ("float16", "term")
+    with pytest.raises(ValueError):
+        parse_quantization("uint8-column")
+
+
+def test_chef_quantize_keeps_rankings():
+    """Test that a quantized chef returns (nearly) the exact top-k with smaller weights."""
+    recipes = list(synthetic_recipes(500, seed=3))
+    reference = Chef("Reference Chef")
+    reference.train(recipes)
+    chef = Chef("Quantized Chef")
+    chef.train(recipes)
+
+    with pytest.raises(ValueError):
+        chef.get_recommendations(["flour"], engine="quantized")
+
+    float_bytes = chef.memory_usage()["tfidf_data"]
+    chef.quantize("uint8")
+    assert isinstance(chef.tfidf_matrix, QuantizedMatrix)
+    assert chef.memory_usage()["tfidf_data"] < float_bytes / 4
+
+    overlap = []
+    for query in query_sets(20, 4, seed=4):
+        expected = [r["id"] for r in reference.get_recommendations(query, top_n=10, engine="exact")]
+        # Every engine scores from the quantized weights once the chef is quantized
+        results = chef.get_recommendations(query, top_n=10, engine="quantized")
+        assert results == chef.get_recommendations(query, top_n=10, engine="sparse")
+        if expected:
+            overlap.append(len(set(expected) & {r["id"] for r in results}) / len(expected))
+    assert np.mean(overlap) > 0.95
@@ -0,0 +1,81 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.models.chef import Chef
+from app.models.query_encoder import QueryEncoder, shared_encoder
+from benchmarks.common import query_sets, synthetic_recipes
+
+QUERIES = [
+    "eggs flour butter", "The Eggs and eggs, flour-butter!! a", "", "of the",
+    "crème brûlée café", "olive oil garlic olive oil",
+]
+
+
+def _assert_same_row(expected, actual, atol=0.0):
+    assert actual.shape == expected.shape
+    assert actual.dtype == expected.dtype
+    assert actual.indices.tolist() == expected.indices.tolist()
+    np.testing.assert_allclose(actual.data, expected.data, rtol=0, atol=atol)
+
+
+def test_encoder_matches_chef_vectorizer():
+    """Test that the encoder reproduces transform() for a trained chef, in float64 and float32."""
+    chef = Chef("Encoder Chef")
+    chef.train(list(synthetic_recipes(300, seed=1)))
+    queries = QUERIES + [" ".join(query) for query in query_sets(30, 5, seed=2)]
+
+    encoder = chef.query_encoder()
+    assert isinstance(encoder, QueryEncoder)
+    for query in queries:
+        _assert_same_row(chef.vectorizer.transform([query]), encoder.encode(query), atol=1e-15)
+
+    chef.to_float32()
+    encoder = chef.query_encoder()
+    for query in queries:
+        _assert_same_row(chef.vectorizer.transform([query]), encoder.encode(query), atol=1e-7)
+
+
+@pytest.mark.parametrize("params", [
+    {"ngram_range": (2, 3), "sublinear_tf": True},
+    {"binary": True, "norm": "l1", "lowercase": False},
+    {"use_idf": False, "norm": None},
+])
+def test_encoder_matches_vectorizer_options(params):
+    """Test parity with transform() across vectorizer options."""
+    documents = ["eggs flour butter sugar", "Olive oil garlic basil", "flour water salt yeast eggs"]
+    vectorizer = TfidfVectorizer(**params).fit(documents)
+    encoder = QueryEncoder.from_vectorizer(vectorizer)
+    for query in QUERIES:
+        _assert_same_row(vectorizer.transform([query]), encoder.encode(query), atol=1e-15)
+
+
+def test_encoder_unsupported_vectorizers():
+    """Test that vectorizers the encoder can't reproduce fall back to transform()."""
+    documents = ["eggs flour", "olive oil"]
+    assert QueryEncoder.from_vectorizer(TfidfVectorizer()) is None  # Not fitted
+    assert QueryEncoder.from_vectorizer(TfidfVectorizer(analyzer="char").fit(documents)) is None
+    assert QueryEncoder.from_vectorizer(TfidfVectorizer(strip_accents="ascii").fit(documents)) is None
+    assert QueryEncoder.from_vectorizer(TfidfVectorizer(tokenizer=str.split, token_pattern=None).fit(documents)) is None
+
+
+def test_encoder_shared_between_identical_chefs():
+    """Test that chefs with the same vocabulary share one encoder and its query cache."""
+    recipes = list(synthetic_recipes(200, seed=3))
+    first, second, other = Chef("First"), Chef("Second"), Chef("Other")
+    first.train(recipes)
+    second.train(recipes)
+    other.train(recipes[:100])
+
+    assert first.query_encoder() is second.query_encoder()
+    assert second.vectorizer.vocabulary_ is first.vectorizer.vocabulary_
+    assert other.query_encoder() is not first.query_encoder()
+    assert first.query_encoder().encode("eggs flour") is second.query_encoder().encode("eggs flour")
+
+    # The encoder isn't pickled; the loaded chef rebuilds (and shares) it
+    loaded = pickle.loads(pickle.dumps(first))
+    assert "_query_encoder" not in loaded.__dict__
+    assert loaded.query_encoder() is first.query_encoder()
+    assert shared_encoder(loaded.vectorizer) is first.query_encoder()
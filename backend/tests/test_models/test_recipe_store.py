@@ -0,0 +1,71 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from app.models.chef import Chef
+from app.models.ingredients import normalize_ingredient, parse_ner_ingredients
+from app.models.recipe import Recipe
+from app.models.recipe_store import RecipeStore
+from app.models.Training.generate_corpus import CorpusGenerator
+
+RECIPES = [
+    Recipe(id=10, title="Crème brûlée", ingredients='["cream", "sugar"]', instructions="Bake.",
+           NER_ingredients='["cream", "sugar"]', cuisine="French"),
+    Recipe(id=11, title="Toast", ingredients=None, instructions="", NER_ingredients="bread, Butter"),
+    Recipe(id=12, title="Water", ingredients="water", instructions="Pour.", NER_ingredients=None),
+]
+
+
+def test_store_round_trips_rows():
+    """Test that rows decode to the original values, including None and non-ASCII text."""
+    store = RecipeStore.from_recipes(RECIPES)
+    assert len(store) == 3
+    for original, restored in zip(RECIPES, store):
+        assert restored.to_dict() == original.to_dict()
+    assert store[-1].title == "Water"
+    assert [r.id for r in store[1:]] == [11, 12]
+    assert store.value("title", 0) == "Crème brûlée"
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_store_overlap_matches_parsed_ingredients():
+    """Test that vectorized overlap equals the set-based overlap on parsed NER strings."""
+    recipes = list(CorpusGenerator(seed=5, vocab_size=300).recipes(300))
+    store = RecipeStore.from_recipes(recipes)
+    query = {normalize_ingredient(i) for i in ("Salt", "butter ", "garlic", "unknown thing")}
+    expected = []
+    for recipe in recipes:
+        ingredients = parse_ner_ingredients(recipe.NER_ingredients)
+        expected.append(len(query & ingredients) / len(ingredients) if ingredients else 0)
+    np.testing.assert_array_equal(store.overlap_scores(query), np.array(expected))
+    assert not store.overlap_scores(set()).any()
+
+
+def test_store_is_compact_and_picklable():
+    """Test that the store takes less memory than the Recipe objects and survives a pickle round trip."""
+    recipes = list(CorpusGenerator(seed=1, vocab_size=300).recipes(2000))
+    store = RecipeStore.from_recipes(recipes)
+    restored = pickle.loads(pickle.dumps(store))
+    assert restored[1999].to_dict() == recipes[1999].to_dict()
+    assert store.offsets["title"].dtype == np.uint32
+
+    legacy_chef, store_chef = Chef("Legacy"), Chef("Store")
+    legacy_chef.recipes, store_chef.recipes = recipes, store
+    legacy, columnar = legacy_chef.memory_usage(), store_chef.memory_usage()
+    assert columnar["recipe_strings"] == len(store.text)
+    assert columnar["recipe_objects"] + columnar["recipe_strings"] < \
+        0.8 * (legacy["recipe_objects"] + legacy["recipe_strings"])
+
+
+def test_recipe_slots_and_legacy_pickles():
+    """Test that Recipe has no __dict__ and still loads state pickled before __slots__."""
+    recipe = RECIPES[0]
+    assert not hasattr(recipe, "__dict__")
+    assert pickle.loads(pickle.dumps(recipe)).to_dict() == recipe.to_dict()
+
+    legacy = Recipe.__new__(Recipe)
+    legacy.__setstate__({"id": 1, "title": "Old", "ingredients": "a", "instructions": "b",
+                         "NER_ingredients": "a", "cuisine": None, "_similarity_score": 0.0})
+    assert legacy.title == "Old" and legacy.similarity_score == 0.0
@@ -0,0 +1,80 @@
+import pickle
+
+import pytest
+
+from app.core.metrics import CACHE_REQUESTS, registry
+from app.models.chef import Chef
+from app.models.recipe_store import RecipeStore
+from app.models.text_store import BlockTextStore
+from benchmarks.common import query_sets, synthetic_recipes
+
+FIELDS = ["ingredients", "instructions"]
+ROWS = [[f"ingredients {i} ✓", "step " * (i % 7)] for i in range(103)]
+
+
+def test_block_store_round_trip(tmp_path):
+    """Test that rows read back intact across full and partial blocks."""
+    store = BlockTextStore.write(tmp_path / "text.rtext", FIELDS, ROWS, block_rows=10, codec="zlib")
+    assert len(store) == 103
+    assert store.fields == FIELDS
+    for row in (0, 9, 10, 57, 102):
+        assert store.row(row) == ROWS[row]
+    with pytest.raises(IndexError):
+        store.row(103)
+    store.close()
+
+
+def test_block_store_lru_cache(tmp_path):
+    """Test that decompressed blocks are cached, counted and evicted least recently used first."""
+    store = BlockTextStore.write(tmp_path / "text.rtext", FIELDS, ROWS, block_rows=10, codec="zlib")
+    store.cache_blocks = 2
+    hits_before = registry.value(CACHE_REQUESTS.name, "recipe_text", "hit") or 0
+
+    store.row(0)
+    store.row(1)  # Same block
+    store.row(15)
+    store.row(0)
+    store.row(25)  # Evicts block 1 (rows 10-19)
+    assert list(store._cache) == [0, 2]
+    assert registry.value(CACHE_REQUESTS.name, "recipe_text", "hit") == hits_before + 2
+    assert store.cached_bytes() > 0
+
+
+def test_block_store_rejects_other_files(tmp_path):
+    """Test that a file without the store markers is refused."""
+    path = tmp_path / "model.joblib"
+    path.write_bytes(b"not a text store at all")
+    with pytest.raises(ValueError, match="Not a recipe text store"):
+        BlockTextStore(path).row(0)
+
+
+def test_block_store_lz4(tmp_path):
+    """Test the optional lz4 codec."""
+    pytest.importorskip("lz4")
+    store = BlockTextStore.write(tmp_path / "text.rtext", FIELDS, ROWS, codec="lz4")
+    assert store.row(42) == ROWS[42]
+
+
+def test_externalized_chef_matches_in_memory(tmp_path):
+    """Test that a chef with text on disk returns the same results and survives moving its files."""
+    chef = Chef("Disk Chef")
+    chef.train(list(synthetic_recipes(300, vocab_size=500)))
+    queries = query_sets(5, 4, vocab_size=500)
+    expected = [chef.get_recommendations(q, top_n=5) for q in queries]
+    in_memory = chef.memory_usage()["recipe_strings"]
+
+    external = chef.recipes.externalize(tmp_path / "chef.rtext", block_rows=16)
+    assert external.fields == list(RecipeStore.EXTERNAL_FIELDS)
+    assert set(chef.recipes.offsets) == {"title", "cuisine"}
+    assert chef.memory_usage()["recipe_strings"] < in_memory / 2
+    assert [chef.get_recommendations(q, top_n=5) for q in queries] == expected
+
+    moved = tmp_path / "moved"
+    moved.mkdir()
+    data = pickle.dumps(chef)
+    (tmp_path / "chef.rtext").rename(moved / "chef.rtext")
+    external.close()
+    loaded = pickle.loads(data)
+    loaded.recipes.locate_text(moved, cache_blocks=4)
+    assert [loaded.get_recommendations(q, top_n=5) for q in queries] == expected
+    assert loaded.recipes.external.cache_blocks == 4
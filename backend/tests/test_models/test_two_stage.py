@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from app.models.chef import Chef
+from benchmarks.common import query_sets, synthetic_recipes
+
+
+@pytest.fixture(scope="module")
+def chef():
+    chef = Chef("Two Stage")
+    chef.train(list(synthetic_recipes(1500, seed=21)))
+    return chef
+
+
+def _scores(results):
+    return [round(r["similarity_score"], 9) for r in results]
+
+
+def test_two_stage_rescores_candidates_exactly(chef):
+    """Test that every two-stage result carries the exact engine's score for that recipe."""
+    for query in query_sets(20, 5, seed=22):
+        exact = {r["id"]: r for r in chef.get_recommendations(query, top_n=200, engine="sparse")}
+        for result in chef.get_recommendations(query, top_n=10, engine="two_stage"):
+            assert result["score_components"]["overlap_score"] > 0
+            if result["id"] in exact:
+                assert result["similarity_score"] == pytest.approx(exact[result["id"]]["similarity_score"])
+
+
+def test_two_stage_with_every_candidate_matches_overlap_ranking(chef):
+    """Test that with all matching rows as candidates, pure overlap ranking equals the exact engine."""
+    for query in query_sets(20, 5, seed=23):
+        expected = chef.get_recommendations(query, top_n=10, cosine_weight=0.0, engine="sparse")
+        results = chef.get_recommendations(query, top_n=10, cosine_weight=0.0, engine="two_stage",
+                                           candidates=len(chef.recipes))
+        assert _scores(results) == _scores(expected)
+
+
+def test_stage_one_candidates(chef):
+    """Test candidate counts, ordering and the adaptive default."""
+    query = query_sets(1, 5, seed=24)[0]
+    assert chef.candidate_count(10, 0.0) == 200
+    assert chef.candidate_count(10, 0.7) > chef.candidate_count(10, 0.3)
+    assert chef.candidate_count(10, 1.0) == 4000
+
+    rows = chef.stage_one(query, top_n=10, cosine_weight=0.7)
+    assert len(rows) <= chef.candidate_count(10, 0.7)
+    assert np.all(np.diff(rows) > 0)
+    few = chef.stage_one(query, candidates=5)
+    assert len(few) == 5 and set(few) <= set(chef.stage_one(query, candidates=len(chef.recipes)))
+    # The candidates with the highest overlap are kept
+    overlap = chef.recipes.overlap_scores(set(query))
+    assert overlap[few].min() >= np.sort(overlap)[-5]
+
+    assert chef.get_recommendations(["unknown ingredient"], engine="two_stage") == []
+    for invalid in (0, -5):
+        with pytest.raises(ValueError):
+            chef.get_recommendations(query, engine="two_stage", candidates=invalid)
+        with pytest.raises(ValueError):
+            chef.stage_one(query, candidates=invalid)
+
+
+def test_two_stage_on_column_major_and_quantized_chefs(chef):
+    """Test that CSC and quantized matrices are scored from their postings."""
+    import copy
+
+    query = query_sets(1, 5, seed=25)[0]
+    expected = chef.get_recommendations(query, top_n=8, engine="two_stage")
+    column_major = copy.copy(chef)
+    column_major.tfidf_matrix = chef.tfidf_matrix.tocsc()
+    assert _scores(column_major.get_recommendations(query, top_n=8, engine="two_stage")) == _scores(expected)
+
+    quantized = copy.copy(chef)
+    quantized.vectorizer = copy.deepcopy(chef.vectorizer)
+    quantized.quantize("float16")
+    results = quantized.get_recommendations(query, top_n=8, engine="two_stage")
+    assert [r["similarity_score"] for r in results] == pytest.approx(
+        [r["similarity_score"] for r in expected], abs=1e-3)
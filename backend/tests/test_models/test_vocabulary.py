@@ -0,0 +1,79 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.models.chef import Chef
+from app.models.vocabulary import CompactVocabulary
+from benchmarks.common import synthetic_recipes
+
+
+def test_compact_vocabulary_mapping():
+    """Test lookups, iteration and equality against the source dict, across blocks."""
+    vocabulary = {f"term {i:04d} ✓": i for i in range(300)}
+    compact = CompactVocabulary.from_dict(vocabulary)
+
+    assert compact.indices is None  # Numbered in sorted order, like TfidfVectorizer
+    assert len(compact) == 300
+    assert dict(compact.items()) == vocabulary
+    for term in ("term 0000 ✓", "term 0063 ✓", "term 0064 ✓", "term 0299 ✓"):
+        assert compact[term] == vocabulary[term]
+    for missing in ("", "a", "term 0000", "term 0300 ✓", "zzz"):
+        assert compact.get(missing) is None
+        assert missing not in compact
+    with pytest.raises(KeyError):
+        compact["zzz"]
+    assert compact.get(42, -1) == -1
+    assert compact.lookup(["term 0005 ✓", "nope"]).tolist() == [5, -1]
+    assert compact == CompactVocabulary.from_dict(vocabulary)
+    assert compact == vocabulary
+
+
+def test_compact_vocabulary_other_numbering_and_pickle():
+    """Test that a non-sorted numbering is kept and that pickles round-trip without the block index."""
+    vocabulary = {"b": 0, "a": 2, "c": 1}
+    compact = CompactVocabulary.from_dict(vocabulary)
+    assert compact.indices.tolist() == [2, 0, 1]
+    assert dict(compact.items()) == vocabulary
+
+    compact.get("a")
+    state = compact.__getstate__()
+    assert set(state) == {"text", "offsets", "indices"}
+    loaded = pickle.loads(pickle.dumps(compact))
+    assert loaded == compact
+    assert loaded["c"] == 1
+
+
+def test_compact_vocabulary_in_vectorizer():
+    """Test that sklearn's transform and feature names work with a compact vocabulary_."""
+    documents = ["eggs flour butter", "olive oil garlic", "flour water salt"]
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2)).fit(documents)
+    expected = vectorizer.transform(["flour butter garlic"])
+    names = vectorizer.get_feature_names_out()
+
+    vectorizer.vocabulary_ = CompactVocabulary.from_dict(vectorizer.vocabulary_)
+    assert (vectorizer.transform(["flour butter garlic"]) != expected).nnz == 0
+    assert list(vectorizer.get_feature_names_out()) == list(names)
+
+
+def test_chef_trains_compact_vocabulary():
+    """Test that trained chefs keep a compact vocabulary that is smaller and scores the same."""
+    chef = Chef("Vocabulary Chef")
+    chef.train(list(synthetic_recipes(300, seed=2)))
+    assert isinstance(chef.vectorizer.vocabulary_, CompactVocabulary)
+    compact_bytes = chef.memory_usage()["vocabulary"]
+    results = chef.get_recommendations(["flour", "eggs"], top_n=5)
+
+    legacy = Chef("Legacy Chef")
+    legacy.train(list(synthetic_recipes(300, seed=2)))
+    legacy.vectorizer.vocabulary_ = dict(legacy.vectorizer.vocabulary_.items())
+    legacy._query_encoder = (None, None)
+    assert legacy.memory_usage()["vocabulary"] > 3 * compact_bytes
+    assert legacy.get_recommendations(["flour", "eggs"], top_n=5) == [
+        dict(result, chef="Legacy Chef") for result in results]
+
+    legacy.compact_vocabulary()
+    assert legacy.vectorizer.vocabulary_ == chef.vectorizer.vocabulary_
+    assert np.array_equal(legacy.query_encoder().encode("flour eggs").indices,
+                          chef.query_encoder().encode("flour eggs").indices)
@@ -102,6 +102,14 @@ def test_load_chefs_with_models(mock_absolute, mock_glob, mock_load):
     assert len(service._chefs) == 1
     assert service._chefs[0].name == "Test Chef"
     mock_load.assert_called_once_with(mock_file)
+    mock_chef.column_major.assert_not_called()
+
+    # The fused engine's column-major matrix is prepared at load time
+    from app.core.config import settings
+    service._chefs = []
+    with patch.object(settings, "SCORING_ENGINE", "fused"):
+        service._load_chefs()
+    mock_chef.column_major.assert_called_once()
 
 
 @patch("app.services.chef_service.joblib.load")
@@ -158,6 +166,124 @@ def test_get_recommendations_with_chef_error(caplog):
 
     # Verify error was logged
     assert any(
-        "Error from Error Chef" in record.message and "Chef error" in str(record)
+        "Error from Error Chef" in record.getMessage() and "Chef error" in record.getMessage()
         for record in caplog.records
     )
+
+
+def test_get_recommendations_records_metrics():
+    """Test that per-chef latency, errors and results are recorded as metrics."""
+    from app.core.metrics import registry, CHEF_ERRORS, CHEF_QUEUE_DEPTH
+
+    chef = MagicMock(spec=Chef)
+    chef.name = "Metrics Chef"
+    chef.get_recommendations.return_value = [{"title": "R", "similarity_score": 0.5}]
+    error_chef = MagicMock(spec=Chef)
+    error_chef.name = "Metrics Error Chef"
+    error_chef.get_recommendations.side_effect = Exception("boom")
+
+    service = ChefService()
+    service._chefs = [chef, error_chef]
+    errors_before = registry.value(CHEF_ERRORS.name, "Metrics Error Chef") or 0
+
+    service.get_recommendations(["salt"], 5)
+
+    assert registry.value(CHEF_ERRORS.name, "Metrics Error Chef") == errors_before + 1
+    assert (registry.value(CHEF_QUEUE_DEPTH.name) or 0) == 0
+    text = registry.render()
+    assert 'fridgepal_chef_scoring_duration_seconds_count{chef="Metrics Chef"}' in text
+    assert 'fridgepal_chef_results_count{chef="Metrics Chef"}' in text
+
+
+def test_shadow_engine_comparison_records_metrics():
+    """Test that a sampled request is re-scored with the shadow engine off the response path."""
+    from app.core.metrics import registry, SHADOW_COMPARISONS
+    from app.core.config import settings
+
+    chef = MagicMock(spec=Chef)
+    chef.name = "Shadow Chef"
+
+    def recommend(ingredients, top_n, cosine_weight, engine):
+        score = 0.5 if engine == "exact" else 0.49
+        return [{"id": 1, "title": "R", "similarity_score": score},
+                {"id": 2 if engine == "exact" else 3, "title": "S", "similarity_score": 0.1}]
+
+    chef.get_recommendations.side_effect = recommend
+    service = ChefService()
+    service._chefs = [chef]
+    compared_before = registry.value(SHADOW_COMPARISONS.name, "Shadow Chef", "compared") or 0
+
+    with patch.object(settings, "SHADOW_ENGINE", "sparse"), \
+            patch.object(settings, "SHADOW_SAMPLE_RATE", 1.0):
+        results = service.get_recommendations(["salt"], 2)
+        # Wait for the shadow thread to finish its comparison
+        service._shadow_executor.submit(lambda: None).result(timeout=5)
+
+    assert [r["similarity_score"] for r in results] == [0.5, 0.1]
+    assert registry.value(SHADOW_COMPARISONS.name, "Shadow Chef", "compared") == compared_before + 1
+    text = registry.render()
+    assert 'fridgepal_shadow_rank_overlap_bucket{chef="Shadow Chef",le="0.5"}' in text
+    assert 'fridgepal_shadow_scoring_duration_seconds_count{engine="sparse",chef="Shadow Chef"}' in text
+    assert 'fridgepal_shadow_score_delta_count{chef="Shadow Chef"}' in text
+    assert not service._shadow_lock.locked()
+
+
+def test_get_recommendations_reuses_planned_executor(mock_chef):
+    """Test that requests share one scoring pool sized by the concurrency plan."""
+    from app.core import concurrency
+
+    service = ChefService()
+    service._chefs = [mock_chef]
+    with patch.object(ChefService, "_executor", None), \
+            patch.object(concurrency, "_plan", concurrency.plan_concurrency(cpus=3, workers=1)):
+        service.get_recommendations(["salt"], 2)
+        executor = ChefService._executor
+        service.get_recommendations(["salt"], 2)
+        assert ChefService._executor is executor
+        assert executor._max_workers == 3
+        executor.shutdown()
+
+
+def test_add_recipes_swaps_in_an_updated_chef():
+    """Test that added recipes go to a copy of the chef that replaces it."""
+    from benchmarks.common import synthetic_recipes
+
+    recipes = list(synthetic_recipes(60, seed=3))
+    chef = Chef("Live Chef")
+    chef.train(recipes[:50])
+    with patch("app.services.chef_service.ChefService._load_chefs"):
+        service = ChefService()
+    service._chefs = [chef]
+
+    updated = service.add_recipes("Live Chef", recipes[50:])
+    assert service.get_chefs() == [updated]
+    assert len(updated.recipes) == 60 and len(chef.recipes) == 50
+    assert service._model_sources["Live Chef"]["added_recipes"] == 10
+    with pytest.raises(ValueError):
+        service.add_recipes("Missing Chef", recipes[50:])
+
+
+def test_two_stage_candidates_setting():
+    """Test that TWO_STAGE_CANDIDATES is only passed to the two-stage engine."""
+    from app.core.config import settings
+    from app.services.chef_service import engine_options
+
+    assert engine_options("two_stage") == {}
+    with patch.object(settings, "TWO_STAGE_CANDIDATES", 500):
+        assert engine_options("two_stage") == {"candidates": 500}
+        assert engine_options("sparse") == {}
+
+
+def test_unknown_engine_fails_at_startup():
+    """Test that a misspelled engine setting is rejected instead of every request returning nothing."""
+    from app.core.config import settings
+    from app.services.chef_service import check_engines
+
+    check_engines()
+    with patch.object(settings, "SCORING_ENGINE", "fuzed"):
+        with pytest.raises(ValueError, match="SCORING_ENGINE='fuzed'"):
+            check_engines()
+    with patch.object(settings, "SHADOW_ENGINE", "sprase"), \
+            patch.object(ChefService, "_instance", None):
+        with pytest.raises(ValueError, match="SHADOW_ENGINE"):
+            ChefService()